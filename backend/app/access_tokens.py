@@ -0,0 +1,258 @@
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from backend.app import crud
+from backend.app.database import get_db
+from backend.app.metrics import record_auth
+from backend.app.token_cache import RevocationChannel, token_cache
+
+ACCESS_TOKEN_MODE_DB = "db"
+ACCESS_TOKEN_MODE_SIGNED = "signed"
+
+_SIGNED_TOKEN_SALT = "access-token"
+
+
+def parse_signing_keys(raw: str) -> dict[str, str]:
+    """Parse 'kid:secret,kid:secret' into a key ring."""
+    keys = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError("ACCESS_TOKEN_SIGNING_KEYS entries must look like kid:secret")
+        keys[kid] = secret
+    return keys
+
+
+def check_access_token_config(config):
+    """
+    Refuse to start in signed mode without a key ring holding the signing
+    key id: tokens must never be signed with a secret from the repo.
+    """
+    if config["ACCESS_TOKEN_MODE"] != ACCESS_TOKEN_MODE_SIGNED:
+        return
+    if not config["ACCESS_TOKEN_SIGNING_KEYS"]:
+        raise RuntimeError("ACCESS_TOKEN_MODE=signed needs ACCESS_TOKEN_SIGNING_KEYS (or ACCESS_TOKEN_SECRET)")
+    if config["ACCESS_TOKEN_SIGNING_KEY_ID"] not in config["ACCESS_TOKEN_SIGNING_KEYS"]:
+        raise RuntimeError("ACCESS_TOKEN_SIGNING_KEY_ID is not in ACCESS_TOKEN_SIGNING_KEYS")
+
+
+def _token_serializer(kid: str) -> URLSafeTimedSerializer:
+    secret = current_app.config["ACCESS_TOKEN_SIGNING_KEYS"][kid]
+    return URLSafeTimedSerializer(secret, salt=_SIGNED_TOKEN_SALT)
+
+
+def is_signed_token(token: str) -> bool:
+    """
+    True if `token` should be checked as a signed token: it has the shape of
+    one, and signed tokens are in use (signed mode, or a key ring configured
+    explicitly, e.g. while switching modes). Otherwise it is looked up as a
+    DB token and rejected there.
+    """
+    # itsdangerous output is dot-separated; token_urlsafe() never contains a dot.
+    if "." not in token:
+        return False
+    return (
+        current_app.config["ACCESS_TOKEN_MODE"] == ACCESS_TOKEN_MODE_SIGNED
+        or bool(current_app.config["ACCESS_TOKEN_SIGNING_KEYS"])
+    )
+
+
+def generate_access_token(user_id: int, ttl_seconds: int) -> dict:
+    """Issue a signed, self-describing access token."""
+    kid = current_app.config["ACCESS_TOKEN_SIGNING_KEY_ID"]
+    issued_at = int(time.time())
+    claims = {
+        "uid": user_id,
+        "iat": issued_at,
+        "exp": issued_at + ttl_seconds,
+        "kid": kid,
+        "jti": secrets.token_urlsafe(12),
+    }
+    return {"token": _token_serializer(kid).dumps(claims), **claims}
+
+
+def check_signed_token(token: str) -> tuple[dict | None, str]:
+    """(claims, "valid"), or (None, "invalid" / "expired")."""
+    try:
+        _, unverified = URLSafeTimedSerializer("", salt=_SIGNED_TOKEN_SALT).loads_unsafe(token)
+    except Exception:
+        return None, "invalid"
+    if not isinstance(unverified, dict):
+        return None, "invalid"
+
+    kid = unverified.get("kid")
+    if kid not in current_app.config["ACCESS_TOKEN_SIGNING_KEYS"]:
+        return None, "invalid"
+    try:
+        claims = _token_serializer(kid).loads(token)
+    except BadSignature:
+        return None, "invalid"
+
+    if claims.get("exp", 0) <= time.time():
+        return None, "expired"
+    return claims, "valid"
+
+
+def verify_signed_token(token: str) -> dict | None:
+    """Return the token's claims if the signature, key id and expiry check out."""
+    return check_signed_token(token)[0]
+
+
+class Denylist:
+    """
+    Revoked signed-token ids (jti -> exp epoch) held in memory.
+
+    Loaded from `access_token_denylist` once per process, then kept current
+    through a `RevocationChannel` so other local workers see logouts
+    immediately. If the channel loses track the list is reloaded. Logouts on
+    other hosts are picked up by re-querying the rows added recently every
+    `reload_seconds` (0 disables), which bounds how long a revoked token
+    stays valid there.
+    """
+
+    def __init__(self, channel: RevocationChannel | None = None, reload_seconds: float = 30.0):
+        self.channel = channel
+        self.reload_seconds = reload_seconds
+        self._entries = {}
+        self._prune_at = 1024
+        self._loaded = False
+        self._synced_at = 0.0  # time.monotonic() of the last query
+        self._lock = threading.Lock()
+
+    def contains(self, jti: str, load) -> bool:
+        self._sync(load)
+        with self._lock:
+            exp = self._entries.get(jti)
+        return exp is not None and exp > time.time()
+
+    def add(self, jti: str, exp: float):
+        with self._lock:
+            self._add(jti, exp)
+        if self.channel:
+            self.channel.publish(f"{jti}:{int(exp)}")
+
+    def _sync(self, load):
+        if self.channel:
+            lines = self.channel.poll()
+            if lines is None:
+                self._loaded = False
+            elif lines:
+                with self._lock:
+                    for line in lines:
+                        jti, _, exp = line.rpartition(":")
+                        self._add(jti, float(exp))
+
+        started = time.monotonic()
+        if not self._loaded:
+            rows = load(None)
+            now = time.time()
+            with self._lock:
+                self._entries = {row["jti"]: now + row["expires_in"] for row in rows}
+                self._loaded = True
+                self._synced_at = started
+        elif self.reload_seconds > 0 and started - self._synced_at >= self.reload_seconds:
+            # Overlap the previous query by one interval: a row's created_at
+            # is its transaction's start, which may predate its commit.
+            rows = load(started - self._synced_at + self.reload_seconds)
+            now = time.time()
+            with self._lock:
+                for row in rows:
+                    self._add(row["jti"], now + row["expires_in"])
+                self._synced_at = started
+
+    def _add(self, jti: str, exp: float):
+        self._entries[jti] = exp
+        if len(self._entries) >= self._prune_at:
+            # Entries are only needed until the token would have expired anyway.
+            now = time.time()
+            self._entries = {k: v for k, v in self._entries.items() if v > now}
+            self._prune_at = max(1024, 2 * len(self._entries))
+
+
+def _default_denylist_channel() -> RevocationChannel | None:
+    path = os.getenv(
+        "ACCESS_TOKEN_DENYLIST_CHANNEL_PATH",
+        os.path.join(tempfile.gettempdir(), "daily_goal_access_token_denylist"),
+    )
+    return RevocationChannel(path) if path else None
+
+
+denylist = Denylist(
+    channel=_default_denylist_channel(),
+    reload_seconds=float(os.getenv("ACCESS_TOKEN_DENYLIST_RELOAD_SECONDS", "30")),
+)
+
+
+def issue_access_token(user_id: int) -> str:
+    ttl_seconds = current_app.config["ACCESS_TOKEN_TTL_SECONDS"]
+    if current_app.config["ACCESS_TOKEN_MODE"] == ACCESS_TOKEN_MODE_SIGNED:
+        return generate_access_token(user_id, ttl_seconds)["token"]
+    return crud.create_access_token(get_db(), user_id, ttl_seconds=ttl_seconds)["token"]
+
+
+def authenticate_access_token(token: str) -> int | None:
+    """
+    Resolve a bearer token to a user id, or None if it is invalid.
+
+    Signed tokens are checked against the key ring and the denylist without a
+    DB round-trip. DB tokens go through the token cache, then Postgres.
+    Every outcome is counted in `auth_outcomes_total`.
+    """
+    if is_signed_token(token):
+        claims, outcome = check_signed_token(token)
+        if claims and denylist.contains(
+            claims["jti"], lambda within_seconds: crud.get_denied_access_tokens(get_db(), within_seconds)
+        ):
+            claims, outcome = None, "revoked"
+        record_auth(ACCESS_TOKEN_MODE_SIGNED, outcome)
+        return claims["uid"] if claims else None
+
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        record_auth(ACCESS_TOKEN_MODE_DB, "valid")
+        return cached_user_id
+
+    ttl_seconds = current_app.config["ACCESS_TOKEN_TTL_SECONDS"]
+    slide_threshold = current_app.config["ACCESS_TOKEN_SLIDE_THRESHOLD"]
+    token_row = crud.slide_access_token(get_db(), token, ttl_seconds, slide_threshold)
+    if not token_row:
+        # Rejections only: one more lookup to tell expired from revoked.
+        record_auth(ACCESS_TOKEN_MODE_DB, crud.get_access_token_status(get_db(), token))
+        return None
+    record_auth(ACCESS_TOKEN_MODE_DB, "valid")
+
+    # Serve from cache only until the token would be due for another slide.
+    token_cache.put(
+        token,
+        token_row["user_id"],
+        token_row["expires_in"] - ttl_seconds * (1 - slide_threshold),
+    )
+    return token_row["user_id"]
+
+
+def revoke_access_token(token: str) -> bool:
+    """Revoke either kind of access token. Commits before evicting caches."""
+    if is_signed_token(token):
+        claims = verify_signed_token(token)
+        if not claims:
+            return False
+        revoked = crud.deny_access_token(get_db(), claims["jti"], claims["exp"])
+        get_db().commit()
+        denylist.add(claims["jti"], claims["exp"])
+        return revoked
+
+    revoked = crud.revoke_access_token_by_token(get_db(), token)
+    # Commit before evicting so no worker can re-cache the token from a
+    # not-yet-committed revocation.
+    get_db().commit()
+    token_cache.invalidate(token)
+    return revoked
@@ -0,0 +1,150 @@
+"""
+ASGI entry point: `uvicorn backend.app.asgi:app` (see `make run-async`).
+
+Serves the Flask app of backend/app/main.py -- same routes, same JSON --
+from an asyncio event loop. Each request runs in its own greenlet
+(backend/app/green.py); while it waits on Postgres, the pool or the
+password hasher, the loop carries on with the others. A process holds
+thousands of idle keep-alive connections and as many requests in flight as
+the pool lets through, instead of one per thread.
+
+The app code stays synchronous: connections, crud.py and the pool are the
+same, with psycopg2 in green mode for the life of the server.
+"""
+
+import asyncio
+import io
+import sys
+
+from backend.app import green
+from backend.app.main import app as flask_app
+
+
+class RequestBody(io.RawIOBase):
+    """`wsgi.input` reading the ASGI request body as the app consumes it."""
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._buffer = b""
+        self._more = True
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer and self._more:
+            message = green.await_(self._receive())
+            if message["type"] == "http.disconnect":
+                raise OSError("Client disconnected")
+            self._buffer = message.get("body", b"")
+            self._more = message.get("more_body", False)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class AsgiApp:
+    """
+    ASGI app running a WSGI app on request greenlets. Lifespan startup puts
+    psycopg2 in green mode; shutdown takes it out again.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await green.run(self._handle, scope, receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                green.enable()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                green.disable()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _handle(self, scope, receive, send):
+        body = RequestBody(receive)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            started["message"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+            }
+
+        def send_body(chunk: bytes, more: bool):
+            if not started.get("sent"):
+                green.await_(send(started["message"]))
+                started["sent"] = True
+            green.await_(send({"type": "http.response.body", "body": chunk, "more_body": more}))
+
+        chunks = self.wsgi_app(wsgi_environ(scope, body), start_response)
+        # A streamed body is generated while it is sent: stop early (and give
+        # its connection back) if the client goes away.
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            for chunk in chunks:
+                if disconnected.done():
+                    return
+                if chunk:
+                    send_body(chunk, more=True)
+            send_body(b"", more=False)
+        finally:
+            disconnected.cancel()
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+
+
+async def _wait_for_disconnect(receive):
+    # Skips whatever of the request body the app left unread.
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def wsgi_environ(scope, body) -> dict:
+    """PEP 3333 environ for an ASGI http `scope`."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+app = AsgiApp(flask_app)
@@ -0,0 +1,337 @@
+import argparse
+import csv
+import io
+import itertools
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import date, datetime, timezone
+
+from backend.app import crud, green
+from backend.app.database import database
+from backend.app.errors import BadRequest
+from backend.app.read_cache import read_cache
+
+FORMATS = ("csv", "ndjson")
+
+_MAX_KEY_LENGTH = 200
+
+
+class _Done:
+    pass
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _is_utf8(value: str) -> bool:
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def read_records(stream, fmt: str):
+    """
+    Yield (line, record, error) from a binary stream of CSV (with header) or
+    NDJSON. `record` is a dict of strings/values, or None when `error` says
+    why the line could not be parsed. Reads incrementally.
+    """
+    # Bytes that are not UTF-8 survive decoding as lone surrogates, so a bad
+    # line is reported on its own instead of ending the whole import.
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="surrogateescape", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                # Raised before the record's first line is counted.
+                yield reader.line_num + 1, None, f"Invalid CSV: {exc}"
+                continue
+            if any(isinstance(value, str) and not _is_utf8(value) for value in record.values()):
+                yield reader.line_num, None, "Invalid UTF-8"
+                continue
+            yield reader.line_num, record, None
+
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        if not _is_utf8(raw):
+            yield line, None, "Invalid UTF-8"
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield line, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield line, None, "Expected a JSON object"
+            continue
+        yield line, record, None
+
+
+def _text(record: dict, field: str) -> str | None:
+    value = record.get(field)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _timestamp(record: dict, field: str) -> str | None:
+    value = _text(record, field)
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def validate_record(record: dict) -> tuple[tuple | None, str | None]:
+    """Return (row in GOAL_HISTORY_COLUMNS order, None) or (None, error)."""
+    project_key = _text(record, "project_key")
+    project_name = _text(record, "project_name")
+    if not project_key:
+        return None, "project_key required"
+    if len(project_key) > _MAX_KEY_LENGTH:
+        return None, f"project_key longer than {_MAX_KEY_LENGTH} characters"
+    if not project_name:
+        return None, "project_name required"
+
+    goal_text = _text(record, "goal_text")
+    raw_goal_date = _text(record, "goal_date")
+    if bool(goal_text) != bool(raw_goal_date):
+        return None, "goal_date and goal_text must be given together"
+
+    for field in ("project_created_at", "project_archived_at", "goal_created_at"):
+        try:
+            _timestamp(record, field)
+        except ValueError:
+            return None, f"{field} is not an ISO timestamp"
+    try:
+        goal_date = date.fromisoformat(raw_goal_date).isoformat() if raw_goal_date else None
+    except ValueError:
+        return None, "goal_date is not an ISO date"
+
+    return (
+        project_key,
+        project_name,
+        _text(record, "project_description"),
+        _timestamp(record, "project_created_at"),
+        _timestamp(record, "project_archived_at"),
+        goal_date,
+        goal_text,
+        _timestamp(record, "goal_created_at"),
+    ), None
+
+
+def import_goal_history(
+    conn,
+    user_id: int,
+    records,
+    chunk_size: int = 5000,
+    max_rows: int | None = None,
+    max_errors: int = 1000,
+) -> dict:
+    """
+    Import (line, record, error) tuples from `read_records` as new projects
+    and goals for `user_id`.
+
+    Records are validated `chunk_size` at a time and each chunk of valid rows
+    is COPYed into a temp staging table, so memory stays bounded by the chunk
+    size however long the input is. Invalid rows are skipped and reported by
+    line (the first `max_errors` of them). Once everything is staged, projects
+    and goals are inserted set-based. Does not commit.
+
+    In green mode, which refuses COPY, each chunk is staged with one INSERT.
+    """
+    started = time.monotonic()
+    report = {"rows": 0, "projects": 0, "goals": 0, "error_count": 0, "errors": []}
+
+    def add_error(line, error):
+        report["error_count"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"line": line, "error": error})
+
+    crud.create_goal_history_staging(conn)
+
+    records = iter(records)
+    while chunk := list(itertools.islice(records, chunk_size)):
+        report["rows"] += len(chunk)
+        if max_rows is not None and report["rows"] > max_rows:
+            raise BadRequest(f"At most {max_rows} rows per import")
+
+        rows = []
+        for line, record, error in chunk:
+            row, error = validate_record(record) if error is None else (None, error)
+            if error:
+                add_error(line, error)
+            else:
+                rows.append((line, *row))
+
+        if not rows:
+            continue
+        if green.enabled():
+            crud.stage_goal_history(conn, rows)
+            continue
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+        buffer.seek(0)
+        crud.copy_goal_history_in(conn, buffer)
+
+    for line in crud.get_duplicate_goal_history_lines(conn, max_errors):
+        add_error(line, "Duplicate goal_date for this project_key")
+
+    report.update(crud.insert_goal_history(conn, user_id))
+    report["errors"].sort(key=lambda error: error["line"])
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+
+def stream_goal_history(conn, user_id: int, fmt: str = "csv", max_chunks: int = 64):
+    """
+    Yield the COPY TO STDOUT export as byte chunks.
+
+    COPY writes into a file object synchronously, so it runs on a helper
+    thread feeding a queue of at most `max_chunks` chunks: memory stays
+    bounded and a slow client slows the COPY down. If the consumer stops
+    early, the COPY is aborted.
+
+    In green mode, which refuses COPY, rows come from a server-side cursor
+    instead, on the caller's thread, in the same format.
+    """
+    if green.enabled():
+        yield from _iter_goal_history_chunks(conn, user_id, fmt)
+        return
+
+    chunks = queue.Queue(maxsize=max_chunks)
+    cancelled = threading.Event()
+    failure = []
+
+    class QueueWriter:
+        def write(self, data):
+            while not cancelled.is_set():
+                try:
+                    chunks.put(data, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _Cancelled()
+
+    def run():
+        try:
+            crud.copy_goal_history_out(conn, user_id, QueueWriter(), fmt)
+        except BaseException as exc:
+            failure.append(exc)
+        finally:
+            while not cancelled.is_set():
+                try:
+                    chunks.put(_Done, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    worker = threading.Thread(target=run, name="goal-history-export", daemon=True)
+    worker.start()
+    try:
+        while (chunk := chunks.get()) is not _Done:
+            yield chunk
+    finally:
+        cancelled.set()
+        worker.join()
+
+    if failure and not isinstance(failure[0], _Cancelled):
+        raise failure[0]
+
+
+def _iter_goal_history_chunks(conn, user_id: int, fmt: str, rows_per_chunk: int = 500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if fmt == "csv":
+        writer.writerow(crud.GOAL_HISTORY_COLUMNS)
+    for count, row in enumerate(crud.iter_goal_history(conn, user_id, fmt), start=1):
+        if fmt == "ndjson":
+            buffer.write(row["line"] + "\n")
+        else:
+            writer.writerow(row[column] for column in crud.GOAL_HISTORY_COLUMNS)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _user_id_for_email(conn, email: str) -> int:
+    user = crud.get_user_by_email(conn, email)
+    if not user:
+        raise SystemExit(f"No user with email {email}")
+    return user["id"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.app.bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write a user's projects and goals")
+    export.add_argument("--email", required=True)
+    export.add_argument("--format", choices=FORMATS, default="csv")
+    export.add_argument("--output", "-o", help="file to write (default: stdout)")
+
+    load = commands.add_parser("import", help="load projects and goals for a user")
+    load.add_argument("--email", required=True)
+    load.add_argument("--format", choices=FORMATS, default="csv")
+    load.add_argument("--chunk-size", type=int, default=5000)
+    load.add_argument("--dry-run", action="store_true", help="validate and roll back")
+    load.add_argument("input", nargs="?", help="file to read (default: stdin)")
+
+    args = parser.parse_args(argv)
+
+    conn = database.connect()
+    try:
+        user_id = _user_id_for_email(conn, args.email)
+
+        if args.command == "export":
+            output = open(args.output, "wb") if args.output else sys.stdout.buffer
+            try:
+                crud.copy_goal_history_out(conn, user_id, output, args.format)
+            finally:
+                if args.output:
+                    output.close()
+            conn.rollback()
+            return 0
+
+        source = open(args.input, "rb") if args.input else sys.stdin.buffer
+        try:
+            report = import_goal_history(
+                conn,
+                user_id,
+                read_records(source, args.format),
+                chunk_size=args.chunk_size,
+            )
+        finally:
+            if args.input:
+                source.close()
+
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        read_cache.end_transaction(conn)
+        report["dry_run"] = args.dry_run
+        print(json.dumps(report))
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
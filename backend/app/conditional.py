@@ -0,0 +1,45 @@
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+from backend.app import crud
+from backend.app.database import get_db
+from backend.app.read_cache import read_cache
+
+
+def _apply_cache_headers(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    # Always revalidate; the body differs between JSON and NDJSON.
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Accept")
+    return response
+
+
+def etag_by_data_version(view):
+    """
+    Tag a user's GET response with their data version and answer a matching
+    If-None-Match with 304 before the view runs, so no list query is issued
+    and nothing is serialized.
+
+    The version is read before the view's queries: a write landing in
+    between makes the ETag older than the body, which costs the client one
+    extra full response later, never a stale 304. The view only gets
+    read-cache entries stored at that version, so a body cached before a
+    write whose invalidation has not arrived never goes out under the newer
+    ETag.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = crud.get_data_version(get_db(), g.user_id)
+        etag = f"{g.user_id}-{version}"
+        if request.if_none_match.contains_weak(etag):
+            return _apply_cache_headers(Response(status=304), etag)
+
+        with read_cache.at_data_version(g.user_id, version):
+            response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            _apply_cache_headers(response, etag)
+        return response
+
+    return wrapper
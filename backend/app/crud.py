@@ -1,42 +1,88 @@
 from psycopg2.extras import RealDictCursor
 from psycopg2 import errors as pg_errors
-from backend.app.errors import DailyGoalAlreadyExists, ProjectNotFound
-from werkzeug.security import generate_password_hash, check_password_hash
+from psycopg2 import sql as pg_sql
+from backend.app.errors import (
+    DailyGoalAlreadyExists,
+    ProjectAlreadyArchived,
+    ProjectNotArchived,
+    ProjectNotFound,
+)
+from backend.app.passwords import password_hasher
+from backend.app.read_cache import read_cache
 from datetime import datetime, timedelta, timezone
+import itertools
 import secrets
+import uuid
+
+
+def _iter_rows(conn, sql: str, params: tuple, itersize: int):
+    """Yield rows from a server-side (named) cursor, `itersize` at a time."""
+    cur = conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+    cur.itersize = itersize
+    try:
+        cur.execute(sql, params)
+        yield from cur
+    finally:
+        cur.close()
 
 
 def create_project(conn, user_id: int, name: str, description: str = None) -> int:
     cur = conn.cursor()
     cur.execute(
         """
-        INSERT INTO projects (user_id, name, description)
-        VALUES (%s, %s, %s)
-        RETURNING id;
+        WITH created AS (
+            INSERT INTO projects (user_id, name, description)
+            VALUES (%s, %s, %s)
+            RETURNING id
+        ),
+        bumped AS (
+            UPDATE users SET data_version = data_version + 1 WHERE id = %s
+        )
+        SELECT id FROM created;
         """,
-        (user_id, name, description),
+        (user_id, name, description, user_id),
     )
     new_id = cur.fetchone()["id"]
     cur.close()
+    read_cache.invalidate(conn, user_id, "projects")
     return new_id
 
 
-def get_projects(conn, user_id: int):
+@read_cache.cached("projects")
+def get_projects(conn, user_id: int, limit: int = None, after_id: int = None):
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
         SELECT id, name, description, created_at
         FROM projects
-        WHERE user_id = %s AND archived_at IS NULL
-        ORDER BY id;
+        WHERE user_id = %s
+          AND archived_at IS NULL
+          AND (%s::integer IS NULL OR id > %s)
+        ORDER BY id
+        LIMIT %s;
         """,
-        (user_id,),
+        (user_id, after_id, after_id, limit),
     )
     rows = cur.fetchall()
     cur.close()
     return rows
 
 
+def iter_projects(conn, user_id: int, itersize: int = 2000):
+    return _iter_rows(
+        conn,
+        """
+        SELECT id, name, description, created_at
+        FROM projects
+        WHERE user_id = %s AND archived_at IS NULL
+        ORDER BY id;
+        """,
+        (user_id,),
+        itersize,
+    )
+
+
+@read_cache.cached("projects")
 def get_project(conn, project_id: int, user_id: int):
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
@@ -52,32 +98,52 @@ def get_project(conn, project_id: int, user_id: int):
     return project
 
 
-def project_exists(conn, project_id: int, user_id: int) -> bool:
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT 1 FROM projects WHERE id = %s AND user_id = %s;",
-        (project_id, user_id),
-    )
-    exists = cur.fetchone() is not None
+def get_data_version(conn, user_id: int) -> int:
+    """Bumped by every project/goal write of this user; backs the ETags."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("SELECT data_version FROM users WHERE id = %s;", (user_id,))
+    row = cur.fetchone()
     cur.close()
-    return exists
+    return row["data_version"] if row else 0
 
 
-def update_project(conn, project_id: int, user_id: int, name: str = None, description: str = None) -> dict | None:
+def update_project(conn, project_id: int, user_id: int, name: str = None, description: str = None) -> dict:
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
-        UPDATE projects
-        SET
-            name = COALESCE(%s, name),
-            description = COALESCE(%s, description)
-        WHERE id = %s AND user_id = %s AND archived_at IS NULL
-        RETURNING id, name, description;
+        WITH updated AS (
+            UPDATE projects
+            SET
+                name = COALESCE(%s, name),
+                description = COALESCE(%s, description)
+            WHERE id = %s AND user_id = %s AND archived_at IS NULL
+            RETURNING id, name, description
+        ),
+        bumped AS (
+            UPDATE users SET data_version = data_version + 1
+            WHERE id = %s AND EXISTS (SELECT 1 FROM updated)
+        )
+        SELECT
+            u.id, u.name, u.description,
+            CASE
+                WHEN u.id IS NOT NULL THEN 'updated'
+                WHEN EXISTS (SELECT 1 FROM projects WHERE id = %s AND user_id = %s) THEN 'archived'
+                ELSE 'not_found'
+            END AS outcome
+        FROM (SELECT 1) AS one
+        LEFT JOIN updated u ON TRUE;
         """,
-        (name, description, project_id, user_id),
+        (name, description, project_id, user_id, user_id, project_id, user_id),
     )
     row = cur.fetchone()
     cur.close()
+
+    outcome = row.pop("outcome")
+    if outcome == "not_found":
+        raise ProjectNotFound()
+    if outcome == "archived":
+        raise ProjectNotFound("Project not found or archived")
+    read_cache.invalidate(conn, user_id, "projects")
     return row
 
 
@@ -85,125 +151,534 @@ def archive_project(conn, project_id: int, user_id: int) -> bool:
     cur = conn.cursor()
     cur.execute(
         """
-        UPDATE projects
-        SET archived_at = CURRENT_TIMESTAMP
-        WHERE id = %s AND user_id = %s AND archived_at IS NULL
-        RETURNING id;
+        WITH updated AS (
+            UPDATE projects
+            SET archived_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND user_id = %s AND archived_at IS NULL
+            RETURNING id
+        ),
+        bumped AS (
+            UPDATE users SET data_version = data_version + 1
+            WHERE id = %s AND EXISTS (SELECT 1 FROM updated)
+        )
+        SELECT CASE
+            WHEN EXISTS (SELECT 1 FROM updated) THEN 'archived'
+            WHEN EXISTS (SELECT 1 FROM projects WHERE id = %s AND user_id = %s) THEN 'already_archived'
+            ELSE 'not_found'
+        END AS outcome;
         """,
-        (project_id, user_id),
+        (project_id, user_id, user_id, project_id, user_id),
     )
-    updated = cur.fetchone() is not None
+    outcome = cur.fetchone()["outcome"]
     cur.close()
-    return updated
 
+    if outcome == "not_found":
+        raise ProjectNotFound()
+    if outcome == "already_archived":
+        raise ProjectAlreadyArchived()
+    read_cache.invalidate(conn, user_id, "projects")
+    return True
 
-def get_archived_projects(conn, user_id: int):
+
+@read_cache.cached("projects")
+def get_archived_projects(
+    conn, user_id: int, limit: int = None, before: tuple = None
+):
+    """`before` is the (archived_at, id) of the last row already seen."""
+    before_archived_at, before_id = before or (None, None)
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
         SELECT id, name, description, created_at, archived_at
         FROM projects
-        WHERE user_id = %s AND archived_at IS NOT NULL
-        ORDER BY archived_at DESC, id DESC;
+        WHERE user_id = %s
+          AND archived_at IS NOT NULL
+          AND (%s::timestamp IS NULL OR (archived_at, id) < (%s::timestamp, %s))
+        ORDER BY archived_at DESC, id DESC
+        LIMIT %s;
         """,
-        (user_id,),
+        (user_id, before_archived_at, before_archived_at, before_id, limit),
     )
     rows = cur.fetchall()
     cur.close()
     return rows
 
 
+def iter_archived_projects(conn, user_id: int, itersize: int = 2000):
+    return _iter_rows(
+        conn,
+        """
+        SELECT id, name, description, created_at, archived_at
+        FROM projects
+        WHERE user_id = %s AND archived_at IS NOT NULL
+        ORDER BY archived_at DESC, id DESC;
+        """,
+        (user_id,),
+        itersize,
+    )
+
+
 def restore_project(conn, project_id: int, user_id: int) -> bool:
     cur = conn.cursor()
     cur.execute(
         """
-        UPDATE projects
-        SET archived_at = NULL
-        WHERE id = %s AND user_id = %s AND archived_at IS NOT NULL
-        RETURNING id;
+        WITH updated AS (
+            UPDATE projects
+            SET archived_at = NULL
+            WHERE id = %s AND user_id = %s AND archived_at IS NOT NULL
+            RETURNING id
+        ),
+        bumped AS (
+            UPDATE users SET data_version = data_version + 1
+            WHERE id = %s AND EXISTS (SELECT 1 FROM updated)
+        )
+        SELECT CASE
+            WHEN EXISTS (SELECT 1 FROM updated) THEN 'restored'
+            WHEN EXISTS (SELECT 1 FROM projects WHERE id = %s AND user_id = %s) THEN 'not_archived'
+            ELSE 'not_found'
+        END AS outcome;
         """,
-        (project_id, user_id),
+        (project_id, user_id, user_id, project_id, user_id),
     )
-    updated = cur.fetchone() is not None
+    outcome = cur.fetchone()["outcome"]
     cur.close()
-    return updated
+
+    if outcome == "not_found":
+        raise ProjectNotFound()
+    if outcome == "not_archived":
+        raise ProjectNotArchived()
+    read_cache.invalidate(conn, user_id, "projects")
+    return True
 
 
 def create_daily_goal(conn, project_id: int, user_id: int, goal_text: str) -> int:
     cur = conn.cursor()
     try:
+        # INSERT ... SELECT: inserts nothing when the project isn't the user's.
         cur.execute(
             """
-            INSERT INTO daily_goals (project_id, user_id, goal_text)
-            VALUES (%s, %s, %s)
-            RETURNING id;
+            WITH created AS (
+                INSERT INTO daily_goals (project_id, user_id, goal_text, goal_date)
+                SELECT id, user_id, %s, user_today(user_id)
+                FROM projects
+                WHERE id = %s AND user_id = %s
+                RETURNING id
+            ),
+            bumped AS (
+                UPDATE users SET data_version = data_version + 1
+                WHERE id = %s AND EXISTS (SELECT 1 FROM created)
+            )
+            SELECT id FROM created;
             """,
-            (project_id, user_id, goal_text),
+            (goal_text, project_id, user_id, user_id),
         )
-        return cur.fetchone()["id"]
+        row = cur.fetchone()
+        if not row:
+            raise ProjectNotFound()
+        read_cache.invalidate(conn, user_id, f"goals:{project_id}")
+        return row["id"]
 
     except pg_errors.UniqueViolation as e:
         raise DailyGoalAlreadyExists() from e
 
-    except pg_errors.ForeignKeyViolation as e:
-        raise ProjectNotFound() from e
-
     finally:
         cur.close()
 
 
-def get_daily_goals(conn, project_id: int, user_id: int):
+@read_cache.cached("goals:{project_id}")
+def get_daily_goals(
+    conn, project_id: int, user_id: int, limit: int = None, before_date: str = None
+):
+    """Goals newest first. Raises ProjectNotFound if the project isn't the user's."""
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
-        SELECT id, goal_text, created_at
-        FROM daily_goals
-        WHERE project_id = %s AND user_id = %s
-        ORDER BY created_at DESC, id DESC;
+        SELECT g.id, g.goal_text, g.created_at, g.goal_date
+        FROM projects p
+        LEFT JOIN LATERAL (
+            SELECT id, goal_text, created_at, goal_date
+            FROM daily_goals
+            WHERE user_id = p.user_id
+              AND project_id = p.id
+              AND (%s::date IS NULL OR goal_date < %s::date)
+            ORDER BY goal_date DESC
+            LIMIT %s
+        ) g ON TRUE
+        WHERE p.id = %s AND p.user_id = %s;
         """,
-        (project_id, user_id),
+        (before_date, before_date, limit, project_id, user_id),
     )
-    goals = cur.fetchall()
+    rows = cur.fetchall()
     cur.close()
-    return goals
+
+    if not rows:
+        raise ProjectNotFound()
+    # A project without goals comes back as one all-NULL goal row.
+    return [row for row in rows if row["id"] is not None]
+
+
+def iter_daily_goals(conn, project_id: int, user_id: int, itersize: int = 2000):
+    """
+    Stream goals newest first. The first fetch happens here, so a missing
+    project raises ProjectNotFound before any response is started.
+    """
+    rows = _iter_rows(
+        conn,
+        """
+        SELECT g.id, g.goal_text, g.created_at
+        FROM projects p
+        LEFT JOIN LATERAL (
+            SELECT id, goal_text, created_at
+            FROM daily_goals
+            WHERE user_id = p.user_id AND project_id = p.id
+            ORDER BY goal_date DESC
+        ) g ON TRUE
+        WHERE p.id = %s AND p.user_id = %s;
+        """,
+        (project_id, user_id),
+        itersize,
+    )
+    first = next(rows, None)
+    if first is None:
+        raise ProjectNotFound()
+    if first["id"] is None:
+        rows.close()
+        return iter(())
+    return itertools.chain([first], rows)
 
 
 def get_todays_goal(conn, project_id: int, user_id: int):
+    """Today's goal or None. Raises ProjectNotFound if the project isn't the user's."""
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
-        SELECT id, project_id, goal_text, created_at
-        FROM daily_goals
-        WHERE project_id = %s
-          AND user_id = %s
-          AND DATE(created_at) = CURRENT_DATE
-        ORDER BY created_at DESC
-        LIMIT 1;
+        SELECT g.id, p.id AS project_id, g.goal_text, g.created_at
+        FROM projects p
+        LEFT JOIN daily_goals g
+            ON g.user_id = p.user_id
+           AND g.project_id = p.id
+           AND g.goal_date = user_today(%s)
+        WHERE p.id = %s AND p.user_id = %s;
         """,
-        (project_id, user_id),
+        (user_id, project_id, user_id),
     )
-    goal = cur.fetchone()
+    row = cur.fetchone()
     cur.close()
-    return goal
+
+    if not row:
+        raise ProjectNotFound()
+    if row["id"] is None:
+        return None
+    return row
+
+
+def upsert_daily_goals_today(conn, user_id: int, items: list) -> list:
+    """
+    Upsert today's goal for many projects in one statement.
+
+    `items` is a list of (project_id, goal_text) with distinct project ids.
+    Ownership is checked by the same join that feeds the multi-row
+    INSERT ... ON CONFLICT. Returns one row per item, in input order; rows for
+    projects that don't exist or belong to someone else have `id` None.
+    """
+    if not items:
+        return []
+
+    project_ids = [project_id for project_id, _ in items]
+    goal_texts = [goal_text for _, goal_text in items]
+
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        WITH input AS (
+            SELECT *
+            FROM unnest(%s::integer[], %s::text[]) WITH ORDINALITY
+                AS t(project_id, goal_text, position)
+        ),
+        upserted AS (
+            INSERT INTO daily_goals (project_id, user_id, goal_text, goal_date)
+            SELECT p.id, p.user_id, i.goal_text, user_today(p.user_id)
+            FROM input i
+            JOIN projects p ON p.id = i.project_id AND p.user_id = %s
+            ON CONFLICT (user_id, project_id, goal_date)
+            DO UPDATE SET goal_text = EXCLUDED.goal_text
+            RETURNING id, project_id, user_id, goal_text, created_at, (xmax = 0) AS inserted
+        ),
+        bumped AS (
+            UPDATE users SET data_version = data_version + 1
+            WHERE id = %s AND EXISTS (SELECT 1 FROM upserted)
+        )
+        SELECT i.project_id, u.id, u.user_id, u.goal_text, u.created_at, u.inserted
+        FROM input i
+        LEFT JOIN upserted u ON u.project_id = i.project_id
+        ORDER BY i.position;
+        """,
+        (project_ids, goal_texts, user_id, user_id),
+    )
+    rows = cur.fetchall()
+    cur.close()
+    for row in rows:
+        if row["id"] is not None:
+            read_cache.invalidate(conn, user_id, f"goals:{row['project_id']}")
+    return rows
 
 
 def upsert_daily_goal_today(
     conn, project_id: int, user_id: int, goal_text: str
 ) -> dict:
+    row = upsert_daily_goals_today(conn, user_id, [(project_id, goal_text)])[0]
+    if row["id"] is None:
+        raise ProjectNotFound()
+    return {
+        "id": row["id"],
+        "project_id": row["project_id"],
+        "user_id": row["user_id"],
+        "goal_text": row["goal_text"],
+        "created_at": row["created_at"],
+        "inserted": row["inserted"],
+    }
+
+
+def get_projects_with_todays_goal(conn, user_id: int):
+    """Active projects, each with today's goal (or None), in one query."""
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
-        INSERT INTO daily_goals (project_id, user_id, goal_text)
-        VALUES (%s, %s, %s)
-        ON CONFLICT (user_id, project_id, (date(created_at)))
-        DO UPDATE SET goal_text = EXCLUDED.goal_text
-        RETURNING id, project_id, user_id, goal_text, created_at, (xmax = 0) AS inserted;
+        SELECT
+            p.id, p.name, p.description, p.created_at, p.archived_at,
+            g.id AS goal_id, g.goal_text, g.created_at AS goal_created_at
+        FROM projects p
+        LEFT JOIN daily_goals g
+            ON g.user_id = p.user_id
+           AND g.project_id = p.id
+           AND g.goal_date = user_today(%s)
+        WHERE p.user_id = %s AND p.archived_at IS NULL
+        ORDER BY p.id;
         """,
-        (project_id, user_id, goal_text),
+        (user_id, user_id),
     )
-    row = cur.fetchone()
+    rows = cur.fetchall()
     cur.close()
-    return row
+
+    projects = []
+    for row in rows:
+        goal_id = row.pop("goal_id")
+        goal_text = row.pop("goal_text")
+        goal_created_at = row.pop("goal_created_at")
+        row["today_goal"] = None
+        if goal_id is not None:
+            row["today_goal"] = {
+                "id": goal_id,
+                "project_id": row["id"],
+                "goal_text": goal_text,
+                "created_at": goal_created_at,
+            }
+        projects.append(row)
+    return projects
+
+
+GOAL_HISTORY_COLUMNS = (
+    "project_key",
+    "project_name",
+    "project_description",
+    "project_created_at",
+    "project_archived_at",
+    "goal_date",
+    "goal_text",
+    "goal_created_at",
+)
+
+_GOAL_HISTORY_EXPORT_SQL = """
+    SELECT
+        p.id::text AS project_key,
+        p.name AS project_name,
+        p.description AS project_description,
+        p.created_at AS project_created_at,
+        p.archived_at AS project_archived_at,
+        g.goal_date,
+        g.goal_text,
+        g.created_at AS goal_created_at
+    FROM projects p
+    LEFT JOIN daily_goals g
+        ON g.user_id = p.user_id
+       AND g.project_id = p.id
+    WHERE p.user_id = %s
+    ORDER BY p.id, g.goal_date
+"""
+
+
+def copy_goal_history_out(conn, user_id: int, file, fmt: str = "csv"):
+    """
+    COPY a user's projects and goals TO STDOUT into `file`, one row per goal
+    (a project without goals gets one row with empty goal columns).
+    `fmt` is "csv" (with header) or "ndjson".
+    """
+    cur = conn.cursor()
+    query = cur.mogrify(_GOAL_HISTORY_EXPORT_SQL, (user_id,)).decode()
+    if fmt == "ndjson":
+        # CSV mode with delimiter/quote characters JSON text never contains
+        # (row_to_json escapes control characters), so each line is the raw
+        # JSON object; text mode would double every backslash.
+        cur.copy_expert(
+            f"COPY (SELECT row_to_json(r)::text FROM ({query}) r) TO STDOUT "
+            "WITH (FORMAT csv, DELIMITER E'\\x02', QUOTE E'\\x01')",
+            file,
+        )
+    else:
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", file)
+    cur.close()
+
+
+def iter_goal_history(conn, user_id: int, fmt: str = "csv", itersize: int = 2000):
+    """
+    copy_goal_history_out without COPY, for when psycopg2 is in green mode
+    (see backend/app/green.py). Yields one row at a time from a server-side
+    cursor: {"line": <JSON text>} for "ndjson", else every column as
+    Postgres' text, the way COPY writes it.
+    """
+    if fmt == "ndjson":
+        sql = f"SELECT row_to_json(r)::text AS line FROM ({_GOAL_HISTORY_EXPORT_SQL}) r"
+    else:
+        columns = ", ".join(f"{column}::text" for column in GOAL_HISTORY_COLUMNS)
+        sql = f"SELECT {columns} FROM ({_GOAL_HISTORY_EXPORT_SQL}) r"
+    yield from _iter_rows(conn, sql, (user_id,), itersize)
+
+
+def create_goal_history_staging(conn):
+    """Temp table the import COPYs validated rows into; dropped at commit."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TEMP TABLE import_goal_history (
+            line                INTEGER NOT NULL,
+            project_key         TEXT NOT NULL,
+            project_name        TEXT NOT NULL,
+            project_description TEXT,
+            project_created_at  TIMESTAMP,
+            project_archived_at TIMESTAMP,
+            goal_date           DATE,
+            goal_text           TEXT,
+            goal_created_at     TIMESTAMP
+        ) ON COMMIT DROP;
+        """
+    )
+    cur.close()
+
+
+def copy_goal_history_in(conn, file):
+    """COPY one chunk of validated rows (CSV, all fields quoted) into staging."""
+    columns = ", ".join(("line",) + GOAL_HISTORY_COLUMNS)
+    cur = conn.cursor()
+    cur.copy_expert(
+        f"COPY import_goal_history ({columns}) FROM STDIN "
+        f"WITH (FORMAT csv, FORCE_NULL ({columns}))",
+        file,
+    )
+    cur.close()
+
+
+def stage_goal_history(conn, rows: list):
+    """
+    copy_goal_history_in without COPY, for when psycopg2 is in green mode:
+    one INSERT of (line, *GOAL_HISTORY_COLUMNS) tuples, as unnest()ed arrays.
+    """
+    columns = ", ".join(("line",) + GOAL_HISTORY_COLUMNS)
+    types = ("integer", "text", "text", "text", "timestamp", "timestamp", "date", "text", "timestamp")
+    arrays = ", ".join(f"%s::{type_}[]" for type_ in types)
+    cur = conn.cursor()
+    cur.execute(
+        f"INSERT INTO import_goal_history ({columns}) SELECT * FROM unnest({arrays});",
+        tuple(list(column) for column in zip(*rows)),
+    )
+    cur.close()
+
+
+def get_duplicate_goal_history_lines(conn, limit: int) -> list:
+    """Staged goal rows that repeat a (project_key, goal_date) seen on an earlier line."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT line
+        FROM (
+            SELECT
+                line,
+                row_number() OVER (PARTITION BY project_key, goal_date ORDER BY line) AS seen
+            FROM import_goal_history
+            WHERE goal_date IS NOT NULL
+        ) staged
+        WHERE seen > 1
+        ORDER BY line
+        LIMIT %s;
+        """,
+        (limit,),
+    )
+    lines = [row["line"] for row in cur.fetchall()]
+    cur.close()
+    return lines
+
+
+def insert_goal_history(conn, user_id: int) -> dict:
+    """
+    Create one new project per staged project_key (attributes from its first
+    line) and insert the staged goals under it; for a repeated goal_date the
+    first line wins. Set-based: three statements
+    regardless of row count. Returns the number of projects and goals created.
+    """
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        CREATE TEMP TABLE import_project_ids ON COMMIT DROP AS
+        SELECT DISTINCT ON (project_key)
+            project_key,
+            nextval(pg_get_serial_sequence('projects', 'id'))::integer AS project_id,
+            project_name,
+            project_description,
+            project_created_at,
+            project_archived_at
+        FROM import_goal_history
+        ORDER BY project_key, line;
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO projects (id, user_id, name, description, created_at, archived_at)
+        SELECT
+            project_id,
+            %s,
+            project_name,
+            project_description,
+            COALESCE(project_created_at, CURRENT_TIMESTAMP),
+            project_archived_at
+        FROM import_project_ids;
+        """,
+        (user_id,),
+    )
+    projects = cur.rowcount
+    cur.execute(
+        """
+        INSERT INTO daily_goals (project_id, user_id, goal_text, goal_date, created_at)
+        SELECT DISTINCT ON (ids.project_id, staged.goal_date)
+            ids.project_id,
+            %s,
+            staged.goal_text,
+            staged.goal_date,
+            COALESCE(staged.goal_created_at, staged.goal_date::timestamp)
+        FROM import_goal_history staged
+        JOIN import_project_ids ids USING (project_key)
+        WHERE staged.goal_date IS NOT NULL
+        ORDER BY ids.project_id, staged.goal_date, staged.line
+        ON CONFLICT (user_id, project_id, goal_date) DO NOTHING;
+        """,
+        (user_id,),
+    )
+    goals = cur.rowcount
+    cur.execute(
+        "UPDATE users SET data_version = data_version + 1 WHERE id = %s;",
+        (user_id,),
+    )
+    cur.close()
+    read_cache.invalidate(conn, user_id)
+    return {"projects": projects, "goals": goals}
 
 
 def get_user_by_id(conn, user_id: int):
@@ -218,7 +693,10 @@ def get_user_by_id(conn, user_id: int):
 
 
 def update_password(conn, user_id: int, new_password: str) -> bool:
-    password_hash = generate_password_hash(new_password)
+    return update_password_hash(conn, user_id, password_hasher.hash(new_password))
+
+
+def update_password_hash(conn, user_id: int, password_hash: str) -> bool:
     cur = conn.cursor()
     cur.execute(
         "UPDATE users SET password_hash = %s WHERE id = %s RETURNING id;",
@@ -240,16 +718,21 @@ def get_user_by_email(conn, email: str):
     return row
 
 
-def create_user(conn, email: str, password: str) -> dict:
-    password_hash = generate_password_hash(password)
+def create_user(conn, email: str, password: str, timezone_name: str = "UTC") -> dict:
+    return create_user_with_password_hash(conn, email, password_hasher.hash(password), timezone_name)
+
+
+def create_user_with_password_hash(
+    conn, email: str, password_hash: str, timezone_name: str = "UTC"
+) -> dict:
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute(
         """
-        INSERT INTO users (email, password_hash)
-        VALUES (%s, %s)
-        RETURNING id, email;
+        INSERT INTO users (email, password_hash, timezone)
+        VALUES (%s, %s, %s)
+        RETURNING id, email, timezone;
         """,
-        (email, password_hash),
+        (email, password_hash, timezone_name),
     )
     row = cur.fetchone()
     cur.close()
@@ -260,10 +743,12 @@ def verify_user_password(conn, email: str, password: str) -> dict | None:
     user = get_user_by_email(conn, email)
     if not user:
         return None
-    if not user["password_hash"]:
-        return None
-    if not check_password_hash(user["password_hash"], password):
+    if not password_hasher.verify(user["password_hash"], password):
         return None
+    if password_hasher.needs_rehash(user["password_hash"]):
+        # Stored with older KDF parameters: upgrade while we have the password.
+        user["password_hash"] = password_hasher.hash(password)
+        update_password_hash(conn, user["id"], user["password_hash"])
     return user
 
 
@@ -414,24 +899,72 @@ def create_access_token(conn, user_id: int, ttl_seconds: int) -> dict:
     return row
 
 
-def slide_access_token(conn, token: str, ttl_seconds: int) -> dict | None:
+def slide_access_token(
+    conn, token: str, ttl_seconds: int, slide_threshold: float = 0.0
+) -> dict | None:
+    """
+    Validate an access token and slide its expiry.
+
+    The expiry is only pushed out once `slide_threshold` (0..1) of the TTL has
+    elapsed since it was last set, so most calls are a read-only lookup and
+    only the occasional one writes. A threshold of 0 slides on every call.
+    """
     cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT
+            id,
+            user_id,
+            expires_at,
+            EXTRACT(EPOCH FROM expires_at - CURRENT_TIMESTAMP)::float AS expires_in,
+            expires_at <= CURRENT_TIMESTAMP + (%s * INTERVAL '1 second') AS needs_slide
+        FROM access_tokens
+        WHERE token = %s
+          AND revoked_at IS NULL
+          AND expires_at > CURRENT_TIMESTAMP;
+        """,
+        (ttl_seconds * (1 - slide_threshold), token),
+    )
+    row = cur.fetchone()
+    if not row or not row.pop("needs_slide"):
+        cur.close()
+        return row
+
     cur.execute(
         """
         UPDATE access_tokens
         SET expires_at = CURRENT_TIMESTAMP + (%s * INTERVAL '1 second')
-        WHERE token = %s
+        WHERE id = %s
           AND revoked_at IS NULL
-          AND expires_at > CURRENT_TIMESTAMP
-        RETURNING id, user_id;
+        RETURNING
+            id,
+            user_id,
+            expires_at,
+            EXTRACT(EPOCH FROM expires_at - CURRENT_TIMESTAMP)::float AS expires_in;
         """,
-        (ttl_seconds, token),
+        (ttl_seconds, row["id"]),
     )
     row = cur.fetchone()
     cur.close()
     return row
 
 
+def get_access_token_status(conn, token: str) -> str:
+    """Why `slide_access_token` rejected a token: "revoked", "expired" or "invalid" (unknown)."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT CASE WHEN revoked_at IS NOT NULL THEN 'revoked' ELSE 'expired' END AS status
+        FROM access_tokens
+        WHERE token = %s;
+        """,
+        (token,),
+    )
+    row = cur.fetchone()
+    cur.close()
+    return row["status"] if row else "invalid"
+
+
 def revoke_access_token(conn, access_token_value: str) -> bool:
     cursor = conn.cursor()
     cursor.execute(
@@ -464,3 +997,195 @@ def revoke_access_token_by_token(conn, token: str) -> bool:
     was_revoked = cursor.fetchone() is not None
     cursor.close()
     return was_revoked
+
+
+def deny_access_token(conn, jti: str, expires_at_epoch: float) -> bool:
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO access_token_denylist (jti, expires_at)
+        VALUES (%s, to_timestamp(%s))
+        ON CONFLICT (jti) DO NOTHING
+        RETURNING jti;
+        """,
+        (jti, expires_at_epoch),
+    )
+    denied = cur.fetchone() is not None
+    cur.close()
+    return denied
+
+
+def get_denied_access_tokens(conn, within_seconds: float = None) -> list:
+    """Unexpired denylist rows; only those added in the last `within_seconds` if given."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT jti, EXTRACT(EPOCH FROM expires_at - CURRENT_TIMESTAMP)::float AS expires_in
+        FROM access_token_denylist
+        WHERE expires_at > CURRENT_TIMESTAMP
+          AND (%s::float IS NULL OR created_at >= CURRENT_TIMESTAMP - (%s * INTERVAL '1 second'));
+        """,
+        (within_seconds, within_seconds),
+    )
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def purge_expired_tokens(conn, table: str, batch_size: int, grace_seconds: int) -> int:
+    """
+    Delete up to `batch_size` rows from access_tokens / refresh_tokens that
+    expired or were revoked more than `grace_seconds` ago. Returns rows deleted.
+    """
+    if table not in ("access_tokens", "refresh_tokens"):
+        raise ValueError(f"Not a token table: {table}")
+
+    cur = conn.cursor()
+    cur.execute(
+        pg_sql.SQL(
+            """
+            DELETE FROM {table}
+            WHERE id IN (
+                SELECT id
+                FROM {table}
+                WHERE expires_at < CURRENT_TIMESTAMP - (%s * INTERVAL '1 second')
+                   OR revoked_at < CURRENT_TIMESTAMP - (%s * INTERVAL '1 second')
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            );
+            """
+        ).format(table=pg_sql.Identifier(table)),
+        (grace_seconds, grace_seconds, batch_size),
+    )
+    deleted = cur.rowcount
+    cur.close()
+    return deleted
+
+
+def purge_expired_denylist(conn, batch_size: int) -> int:
+    cur = conn.cursor()
+    cur.execute(
+        """
+        DELETE FROM access_token_denylist
+        WHERE jti IN (
+            SELECT jti
+            FROM access_token_denylist
+            WHERE expires_at < CURRENT_TIMESTAMP
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        );
+        """,
+        (batch_size,),
+    )
+    deleted = cur.rowcount
+    cur.close()
+    return deleted
+
+
+def try_advisory_lock(conn, key: int) -> bool:
+    """
+    Session-level: held across commits until `advisory_unlock` (or the
+    connection closes). Advisory locks are database-wide, so the key is paired
+    with the current schema: apps (or test workers) sharing a database in
+    separate schemas don't lock each other out. `key` must fit in an int4.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT pg_try_advisory_lock(hashtext(current_schema()), %s) AS locked;", (key,))
+    locked = cur.fetchone()["locked"]
+    cur.close()
+    return locked
+
+
+def advisory_unlock(conn, key: int):
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_unlock(hashtext(current_schema()), %s);", (key,))
+    cur.close()
+
+
+def is_partitioned(conn, table: str) -> bool:
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)
+        ) AS partitioned;
+        """,
+        (table,),
+    )
+    partitioned = cur.fetchone()["partitioned"]
+    cur.close()
+    return partitioned
+
+
+def create_token_partitions(conn, table: str, days_ahead: int) -> list[str]:
+    """Create daily partitions for today .. today + days_ahead. Returns the new ones."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("SELECT create_token_partitions(%s, %s) AS name;", (table, days_ahead))
+    created = [row["name"] for row in cur.fetchall()]
+    cur.close()
+    return created
+
+
+def get_token_partitions(conn, table: str) -> list:
+    """
+    Partitions of `table` with their upper bound (None for the default
+    partition) and whether that bound is already in the past.
+    """
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT
+            name,
+            range_end,
+            range_end IS NOT NULL AND range_end <= CURRENT_DATE AS is_past
+        FROM (
+            SELECT
+                child.relname AS name,
+                substring(
+                    pg_get_expr(child.relpartbound, child.oid) FROM 'TO \\(''([^'']+)''\\)'
+                )::timestamp AS range_end
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+        ) partitions
+        ORDER BY range_end NULLS LAST;
+        """,
+        (table,),
+    )
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def partition_has_live_tokens(conn, partition: str, grace_seconds: int) -> bool:
+    """True if any row is not yet purgeable (see purge_expired_tokens)."""
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        pg_sql.SQL(
+            """
+            SELECT EXISTS (
+                SELECT 1
+                FROM {partition}
+                WHERE expires_at >= CURRENT_TIMESTAMP - (%s * INTERVAL '1 second')
+                  AND (revoked_at IS NULL
+                       OR revoked_at >= CURRENT_TIMESTAMP - (%s * INTERVAL '1 second'))
+            ) AS live;
+            """
+        ).format(partition=pg_sql.Identifier(partition)),
+        (grace_seconds, grace_seconds),
+    )
+    live = cur.fetchone()["live"]
+    cur.close()
+    return live
+
+
+def drop_token_partition(conn, partition: str, lock_timeout_ms: int = 2000):
+    """
+    Drop one partition. Dropping briefly locks the parent table, so give up
+    after `lock_timeout_ms` rather than queueing every token lookup behind a
+    long-running transaction.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT set_config('lock_timeout', %s, true);", (f"{lock_timeout_ms}ms",))
+    cur.execute(pg_sql.SQL("DROP TABLE {partition};").format(partition=pg_sql.Identifier(partition)))
+    cur.close()
@@ -1,11 +1,237 @@
 import os
+import threading
+import time
+from collections import deque
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
+from flask import g
+
+from backend.app import green
+from backend.app.errors import PoolTimeout
+from backend.app.instrumentation import InstrumentedConnection, record_checkout
 
 load_dotenv()
 
 
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of Postgres connections.
+
+    Connections are opened lazily up to `max_size`; `min_size` of them are
+    kept around when idle. A checkout waits at most `timeout` seconds for a
+    free slot before raising `PoolTimeout`. Connections that sat idle for
+    longer than `max_idle_seconds` are pinged before being handed out, and
+    every returned connection is rolled back if it was left mid-transaction.
+
+    Request greenlets of the ASGI server wait for a slot on the event loop
+    (`green.Waiter`) instead of blocking its thread on the condition.
+    """
+
+    def __init__(
+        self,
+        connect,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5.0,
+        max_idle_seconds: float = 300.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: need 0 <= min_size <= max_size, max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+
+        self._cond = threading.Condition()
+        self._green_waiters = deque()
+        # (conn, returned_at) pairs; most recently returned at the end.
+        self._idle = []
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        with self._cond:
+            stale = self._prune_idle()
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    open_new = False
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now, connect outside the lock.
+                    self._size += 1
+                    conn, returned_at = None, None
+                    open_new = True
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout()
+                waited = True
+                self._wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            wait_seconds = time.monotonic() - started
+            if waited:
+                self._waits += 1
+            self._total_wait_seconds += wait_seconds
+            self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+        for old in stale:
+            self._close_quietly(old)
+
+        try:
+            if open_new:
+                return self._connect()
+            if not self._is_healthy(conn, returned_at):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._discarded += 1
+                return self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._notify()
+            raise
+
+    def putconn(self, conn, discard: bool = False):
+        if not discard:
+            discard = not self._reset(conn)
+
+        with self._cond:
+            self._in_use -= 1
+            keep = not discard and not self._closed
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                self._discarded += 1
+            self._notify()
+
+        if not keep:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "total_wait_seconds": self._total_wait_seconds,
+                "max_wait_seconds": self._max_wait_seconds,
+                "avg_wait_seconds": (
+                    self._total_wait_seconds / self._checkouts if self._checkouts else 0.0
+                ),
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+            while self._green_waiters:
+                self._green_waiters.popleft().set()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def _wait(self, timeout: float):
+        """Wait for a putconn() or close(). Caller holds the lock."""
+        if not green.in_request():
+            self._cond.wait(timeout)
+            return
+        waiter = green.Waiter()
+        self._green_waiters.append(waiter)
+        self._cond.release()
+        try:
+            waiter.wait(timeout)
+        finally:
+            self._cond.acquire()
+            if waiter in self._green_waiters:
+                self._green_waiters.remove(waiter)
+
+    def _notify(self):
+        """Wake one waiting thread and one waiting greenlet. Caller holds the lock."""
+        self._cond.notify()
+        if self._green_waiters:
+            self._green_waiters.popleft().set()
+
+    def _prune_idle(self) -> list:
+        """Drop connections idle past max_idle_seconds, down to min_size. Caller holds the lock."""
+        cutoff = time.monotonic() - self.max_idle_seconds
+        stale = []
+        # Oldest returns sit at the front of the list.
+        while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.pop(0)
+            self._size -= 1
+            self._discarded += 1
+            stale.append(conn)
+        return stale
+
+    def _is_healthy(self, conn, returned_at: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.max_idle_seconds:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _reset(self, conn) -> bool:
+        """Roll back anything left open. Returns False if the conn is unusable."""
+        if conn.closed:
+            return False
+        try:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
 class Database:
     def __init__(self):
         self.host = os.getenv("DB_HOST", "localhost")
@@ -14,12 +240,63 @@ class Database:
         self.user = os.getenv("DB_USER")
         self.password = os.getenv("DB_PASSWORD")
 
-    def get_connection(self):
+        self.pool_min_size = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+        self.pool_max_size = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+        self.pool_timeout = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "5"))
+        self.pool_max_idle = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def connect(self, connection_factory=InstrumentedConnection):
         return psycopg2.connect(
             host=self.host,
             port=self.port,
             dbname=self.dbname,
             user=self.user,
             password=self.password,
+            connection_factory=connection_factory,
             cursor_factory=RealDictCursor,
         )
+
+    @property
+    def pool(self) -> ConnectionPool:
+        # Built lazily and per process, so forked workers never share sockets.
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != pid:
+                    self._pool = ConnectionPool(
+                        self.connect,
+                        min_size=self.pool_min_size,
+                        max_size=self.pool_max_size,
+                        timeout=self.pool_timeout,
+                        max_idle_seconds=self.pool_max_idle,
+                    )
+                    self._pool_pid = pid
+        return self._pool
+
+    def get_connection(self):
+        return self.pool.getconn()
+
+    def release_connection(self, conn, discard: bool = False):
+        self.pool.putconn(conn, discard=discard)
+
+    def pool_stats(self) -> dict:
+        return self.pool.stats()
+
+
+database = Database()
+
+
+def get_db():
+    """
+    Request-scoped connection, checked out of the pool on first use.
+    Routes that never call this never touch the pool.
+    """
+    if "db_conn" not in g:
+        started = time.perf_counter()
+        g.db_conn = database.get_connection()
+        record_checkout(time.perf_counter() - started)
+    return g.db_conn
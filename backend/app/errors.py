@@ -1,3 +1,6 @@
+import math
+
+
 class AppError(Exception):
     status_code = 400
     message = "Application error"
@@ -17,11 +20,45 @@ class ProjectNotFound(AppError):
     message = "Project not found"
 
 
+class ProjectAlreadyArchived(AppError):
+    status_code = 409
+    message = "Project already archived"
+
+
+class ProjectNotArchived(AppError):
+    status_code = 409
+    message = "Project is not archived"
+
+
 class Unauthorized(AppError):
     status_code = 401
     message = "Unauthorized"
 
 
+class Forbidden(AppError):
+    status_code = 403
+    message = "Forbidden"
+
+
 class BadRequest(AppError):
     status_code = 400
     message = "Bad request"
+
+
+class PoolTimeout(AppError):
+    status_code = 503
+    message = "Database is busy, try again shortly"
+
+
+class HashingBusy(AppError):
+    status_code = 503
+    message = "Too many sign-in requests in progress, try again shortly"
+
+
+class TooManyRequests(AppError):
+    status_code = 429
+    message = "Too many attempts, try again later"
+
+    def __init__(self, message: str | None = None, retry_after: float = 0):
+        super().__init__(message)
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
@@ -0,0 +1,131 @@
+"""
+Run the app's blocking code on an asyncio event loop.
+
+The ASGI server (`backend/app/asgi.py`) runs each request in its own
+greenlet. Where that code would block -- a query, a pool checkout, a
+password hash -- it calls `await_()` instead, which parks the request's
+greenlet until the awaitable is done while the loop serves other requests.
+Outside a request greenlet (threads, CLIs, the Flask server) the same calls
+block as they always did.
+
+Queries get there through psycopg2's coroutine support: once `enable()`
+installs `wait_for_connection` as its wait callback, psycopg2 drives libpq
+in non-blocking mode and calls it whenever it would wait on the socket.
+"""
+
+import asyncio
+import sys
+
+import greenlet
+from psycopg2 import OperationalError, extensions
+from psycopg2.extras import wait_select
+
+
+class RequestGreenlet(greenlet.greenlet):
+    """Greenlet of one request; its parent is the loop's, waiting in `run()`."""
+
+
+def in_request() -> bool:
+    return isinstance(greenlet.getcurrent(), RequestGreenlet)
+
+
+def await_(awaitable):
+    """Wait for `awaitable` from a request greenlet and return its result."""
+    current = greenlet.getcurrent()
+    if not isinstance(current, RequestGreenlet):
+        raise RuntimeError("await_() called outside a request greenlet")
+    return current.parent.switch(awaitable)
+
+
+async def run(fn, *args, **kwargs):
+    """Call `fn` in a new request greenlet, awaiting whatever it hands to `await_()`."""
+    child = RequestGreenlet(fn, greenlet.getcurrent())
+    result = child.switch(*args, **kwargs)
+    while not child.dead:
+        try:
+            value = await result
+        except BaseException:
+            result = child.throw(*sys.exc_info())
+        else:
+            result = child.switch(value)
+    return result
+
+
+def blocking(fn, *args, **kwargs):
+    """`fn(*args, **kwargs)`, on a thread of the loop's executor when in a request greenlet."""
+    if not in_request():
+        return fn(*args, **kwargs)
+    return await_(asyncio.get_running_loop().run_in_executor(None, lambda: fn(*args, **kwargs)))
+
+
+def result(future):
+    """Result of a concurrent.futures.Future, without blocking the loop."""
+    if not in_request():
+        return future.result()
+    return await_(asyncio.wrap_future(future))
+
+
+class Waiter:
+    """
+    Parks one request greenlet until `set()` is called, from any thread, or
+    a timeout passes. Create it in the greenlet that waits.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.create_future()
+
+    def set(self):
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def wait(self, timeout: float) -> bool:
+        done, _ = await_(asyncio.wait([self._future], timeout=timeout))
+        return bool(done)
+
+    def _wake(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+async def _ready(fd: int, write: bool):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    add, remove = (loop.add_writer, loop.remove_writer) if write else (loop.add_reader, loop.remove_reader)
+    # The selector can report the fd again before this coroutine resumes.
+    add(fd, lambda: future.done() or future.set_result(None))
+    try:
+        await future
+    finally:
+        remove(fd)
+
+
+def wait_for_connection(conn):
+    """psycopg2 wait callback: yield to the loop in a request greenlet, select() elsewhere."""
+    if not in_request():
+        return wait_select(conn)
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            await_(_ready(conn.fileno(), write=False))
+        elif state == extensions.POLL_WRITE:
+            await_(_ready(conn.fileno(), write=True))
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def enable():
+    """
+    Put psycopg2 in green mode for the whole process. It then refuses COPY
+    (`copy_expert`), so callers check `enabled()` and take another path.
+    """
+    extensions.set_wait_callback(wait_for_connection)
+
+
+def disable():
+    extensions.set_wait_callback(None)
+
+
+def enabled() -> bool:
+    return extensions.get_wait_callback() is not None
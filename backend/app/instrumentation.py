@@ -0,0 +1,322 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+from flask import request
+from psycopg2 import extensions, sql as pg_sql
+
+from backend.app.metrics import record_request
+
+request_logger = logging.getLogger("backend.app.requests")
+slow_query_logger = logging.getLogger("backend.app.slow_queries")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class RequestTiming:
+    """What one request spent its time on. Seconds unless noted."""
+
+    started: float
+    db_checkout_seconds: float = 0.0
+    sql_statements: int = 0
+    sql_seconds: float = 0.0
+    response_bytes: int | None = None
+    method: str | None = None
+    route: str | None = None
+    path: str | None = None
+    status: int = 500
+    streamed: bool = False
+
+    def wall_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+def record_checkout(seconds: float):
+    timing = _current.get()
+    if timing is not None:
+        timing.db_checkout_seconds += seconds
+
+
+def normalize_sql(query, conn=None) -> str:
+    """
+    One-line SQL text. crud passes parameters separately, so the template
+    is already free of literal values; only whitespace is collapsed.
+    """
+    if isinstance(query, pg_sql.Composable):
+        query = query.as_string(conn)
+    if isinstance(query, bytes):
+        query = query.decode()
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def _caller(module: str = "backend.app.crud") -> str | None:
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_globals.get("__name__") == module:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """
+    Logs statements slower than `threshold_seconds` (None disables) with the
+    crud.py function that issued them and their normalized SQL, and keeps
+    per-function counts.
+    """
+
+    def __init__(self, threshold_seconds: float | None = 0.2):
+        self.threshold_seconds = threshold_seconds
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def observe(self, conn, query, seconds: float):
+        if self.threshold_seconds is None or seconds < self.threshold_seconds:
+            return
+        function = _caller() or "unknown"
+        with self._lock:
+            self._counts[function] = self._counts.get(function, 0) + 1
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "function": function,
+                    "ms": round(seconds * 1000, 2),
+                    "sql": normalize_sql(query, conn),
+                }
+            )
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+def _threshold_from_env() -> float | None:
+    raw = os.getenv("SLOW_QUERY_MS", "200")
+    return float(raw) / 1000 if raw else None
+
+
+slow_query_log = SlowQueryLog(_threshold_from_env())
+
+
+def _observe(conn, query, started: float):
+    seconds = time.perf_counter() - started
+    timing = _current.get()
+    if timing is not None:
+        timing.sql_statements += 1
+        timing.sql_seconds += seconds
+    slow_query_log.observe(conn, query, seconds)
+
+
+class InstrumentedCursorMixin:
+    """Times execute/executemany/copy_expert into the current request and the slow-query log."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _observe(self.connection, query, started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _observe(self.connection, query, started)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            _observe(self.connection, sql, started)
+
+
+_cursor_classes = {}
+
+
+def instrumented_cursor_class(base):
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        cls = type(f"Instrumented{base.__name__}", (InstrumentedCursorMixin, base), {})
+        _cursor_classes[base] = cls
+    return cls
+
+
+class InstrumentedConnection(extensions.connection):
+    """
+    psycopg2 connection whose cursors, whatever `cursor_factory` a caller
+    passes, are timed. Commits count as statements too. Fetches from named
+    (server-side) cursors are not timed; only their DECLARE is.
+    """
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get("cursor_factory") or self.cursor_factory or extensions.cursor
+        kwargs["cursor_factory"] = instrumented_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _observe(self, "COMMIT", started)
+
+
+def _stream_and_finish(chunks, timing: RequestTiming):
+    # Statements issued while streaming (e.g. a server-side cursor's DECLARE) still count.
+    _current.set(timing)
+    try:
+        for chunk in chunks:
+            timing.response_bytes += len(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield chunk
+    finally:
+        try:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        finally:
+            _current.set(None)
+            _finish(timing)
+
+
+def server_timing(timing: RequestTiming) -> str:
+    return ", ".join(
+        [
+            f"db-checkout;dur={timing.db_checkout_seconds * 1000:.2f}",
+            f'sql;dur={timing.sql_seconds * 1000:.2f};desc="{timing.sql_statements} statements"',
+            f"app;dur={timing.wall_seconds() * 1000:.2f}",
+        ]
+    )
+
+
+class RouteTimings:
+    """Per-route totals since start: requests, wall/checkout/SQL time, statements, bytes."""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, timing: RequestTiming, wall_seconds: float):
+        with self._lock:
+            totals = self._routes.setdefault(
+                route,
+                {
+                    "requests": 0,
+                    "wall_seconds": 0.0,
+                    "max_wall_seconds": 0.0,
+                    "db_checkout_seconds": 0.0,
+                    "sql_statements": 0,
+                    "sql_seconds": 0.0,
+                    "response_bytes": 0,
+                },
+            )
+            totals["requests"] += 1
+            totals["wall_seconds"] += wall_seconds
+            totals["max_wall_seconds"] = max(totals["max_wall_seconds"], wall_seconds)
+            totals["db_checkout_seconds"] += timing.db_checkout_seconds
+            totals["sql_statements"] += timing.sql_statements
+            totals["sql_seconds"] += timing.sql_seconds
+            totals["response_bytes"] += timing.response_bytes or 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {route: dict(totals) for route, totals in self._routes.items()}
+
+
+route_timings = RouteTimings()
+
+
+def _finish(timing: RequestTiming):
+    wall_seconds = timing.wall_seconds()
+    route_timings.add(f"{timing.method} {timing.route}", timing, wall_seconds)
+    record_request(timing.method, timing.route, timing.status, wall_seconds)
+    if request_logger.isEnabledFor(logging.INFO):
+        request_logger.info(
+            json.dumps(
+                {
+                    "event": "request",
+                    "method": timing.method,
+                    "route": timing.route,
+                    "path": timing.path,
+                    "status": timing.status,
+                    "wall_ms": round(wall_seconds * 1000, 2),
+                    "db_checkout_ms": round(timing.db_checkout_seconds * 1000, 2),
+                    "sql_statements": timing.sql_statements,
+                    "sql_ms": round(timing.sql_seconds * 1000, 2),
+                    "response_bytes": timing.response_bytes,
+                }
+            )
+        )
+
+
+def _describe_request(timing: RequestTiming):
+    timing.method = request.method
+    timing.route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    timing.path = request.path
+
+
+def init_app(app):
+    """
+    Time every request of `app`. Register before any other before_request
+    hook so authentication is included, and before the DB teardown so the
+    commit is.
+
+    The Server-Timing header covers work done before the response is
+    returned. The log line and per-route totals are written once the request
+    is over: at teardown, or after the last chunk of a streamed body.
+    """
+    enabled = app.config.get("REQUEST_LOG_ENABLED", True)
+    request_logger.setLevel(logging.INFO if enabled else logging.WARNING)
+    if not logging.getLogger().handlers:
+        # Nothing configured logging (dev server): print the JSON lines as-is.
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logging.getLogger("backend.app").addHandler(handler)
+
+    @app.before_request
+    def start_request_timing():
+        _current.set(RequestTiming(started=time.perf_counter()))
+
+    @app.after_request
+    def add_server_timing(response):
+        timing = _current.get()
+        if timing is None:
+            return response
+        _describe_request(timing)
+        timing.status = response.status_code
+        if app.config.get("SERVER_TIMING_ENABLED", True):
+            response.headers["Server-Timing"] = server_timing(timing)
+        if response.is_streamed:
+            timing.streamed = True
+            timing.response_bytes = 0
+            response.response = _stream_and_finish(response.response, timing)
+            # Teardown runs before the body is sent; the stream finishes up.
+            _current.set(None)
+        else:
+            timing.response_bytes = response.content_length
+        return response
+
+    @app.teardown_request
+    def log_request_timing(exception=None):
+        timing = _current.get()
+        # stream_with_context runs teardown again after the last chunk, with
+        # the stream's timing current; the stream finishes that one itself.
+        if timing is None or timing.streamed:
+            return
+        _current.set(None)
+        if timing.method is None:
+            _describe_request(timing)
+        _finish(timing)
@@ -1,83 +1,187 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-from backend.app.database import Database
-from backend.app import crud
-from backend.app.errors import AppError, Unauthorized
+from werkzeug.middleware.proxy_fix import ProxyFix
+from backend.app.database import database, get_db
+from backend.app import crud, instrumentation
+from backend.app.conditional import etag_by_data_version
+from backend.app.errors import AppError, Forbidden, ProjectNotFound, Unauthorized
+from backend.app.json_provider import FastJSONProvider
+from backend.app.metrics import metrics, record_auth, record_pool
+from backend.app.maintenance import PurgeScheduler, maintenance_options_from_env
+from backend.app.pagination import CURSOR_DATE, CURSOR_ID, CURSOR_TIMESTAMP, page_request, paginate
+from backend.app.read_cache import read_cache
+from backend.app.streaming import release_after_stream, stream_rows, wants_stream
 import os
+from functools import partial
+import secrets
 from backend.app.routes.auth import blueprint as auth_blueprint
-from datetime import datetime, timezone
+from backend.app.routes.bulk import blueprint as bulk_blueprint
+from backend.app.access_tokens import authenticate_access_token, check_access_token_config, parse_signing_keys
 
 
 
 app = Flask(__name__)
-CORS(app)  # Allow all origins in dev; restrict in production
-app.config["ACCESS_TOKEN_SECRET"] = os.getenv(
-    "ACCESS_TOKEN_SECRET", "dev-only-change-me"
-)
+app.json = FastJSONProvider(app)  # orjson when installed; datetimes as UTC "...Z"
+CORS(app, expose_headers=["X-Next-Cursor", "ETag"])  # Allow all origins in dev; restrict in production
 app.config["ACCESS_TOKEN_TTL_SECONDS"] = int(
     os.getenv("ACCESS_TOKEN_TTL_SECONDS", "900")
 )
+# Fraction of the TTL that must elapse before a request extends the token.
+app.config["ACCESS_TOKEN_SLIDE_THRESHOLD"] = float(
+    os.getenv("ACCESS_TOKEN_SLIDE_THRESHOLD", "0.5")
+)
+app.config["PAGE_SIZE_DEFAULT"] = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+app.config["PAGE_SIZE_MAX"] = int(os.getenv("PAGE_SIZE_MAX", "500"))
+# Rows fetched per round-trip by server-side cursors in streaming mode.
+app.config["STREAM_ITERSIZE"] = int(os.getenv("STREAM_ITERSIZE", "2000"))
+# "db": opaque tokens stored in access_tokens. "signed": stateless tokens.
+app.config["ACCESS_TOKEN_MODE"] = os.getenv("ACCESS_TOKEN_MODE", "db")
+# Key ring for signed tokens as "kid:secret,..."; new tokens use the current kid.
+# Empty unless configured: there is no built-in secret to fall back on.
+app.config["ACCESS_TOKEN_SIGNING_KEYS"] = parse_signing_keys(
+    os.getenv("ACCESS_TOKEN_SIGNING_KEYS")
+    or (f"default:{os.environ['ACCESS_TOKEN_SECRET']}" if os.getenv("ACCESS_TOKEN_SECRET") else "")
+)
+app.config["ACCESS_TOKEN_SIGNING_KEY_ID"] = os.getenv(
+    "ACCESS_TOKEN_SIGNING_KEY_ID", "default"
+)
+check_access_token_config(app.config)
+# Upper bound on items in one PUT /goals/today.
+app.config["GOALS_BATCH_MAX_ITEMS"] = int(os.getenv("GOALS_BATCH_MAX_ITEMS", "200"))
+# POST /projects/import: rows validated + COPYed per chunk, and a cap per request.
+app.config["IMPORT_CHUNK_SIZE"] = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+app.config["IMPORT_MAX_ROWS"] = int(os.getenv("IMPORT_MAX_ROWS", "100000"))
+# Seconds between in-process token purges/partition rolls; 0 leaves it to cron + the CLI.
+app.config["TOKEN_PURGE_INTERVAL_SECONDS"] = float(
+    os.getenv("TOKEN_PURGE_INTERVAL_SECONDS", "0")
+)
+# Server-Timing header (db-checkout, sql, app) on every response.
+app.config["SERVER_TIMING_ENABLED"] = os.getenv("SERVER_TIMING_ENABLED", "1") not in ("0", "false")
+# One JSON line per request on the backend.app.requests logger.
+app.config["REQUEST_LOG_ENABLED"] = os.getenv("REQUEST_LOG_ENABLED", "1") not in ("0", "false")
+# If set, GET /metrics requires "Authorization: Bearer <this>"; otherwise only
+# local callers (127.0.0.1 / ::1) may read it.
+app.config["METRICS_BEARER_TOKEN"] = os.getenv("METRICS_BEARER_TOKEN", "")
+
+# Reverse proxies in front of the app (1 for a single nginx). remote_addr,
+# which per-IP rate limits key on, is then taken from that many trusted
+# X-Forwarded-For entries. 0 ignores the header: any client can send it.
+app.config["TRUSTED_PROXY_HOPS"] = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+if app.config["TRUSTED_PROXY_HOPS"] > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_HOPS"])
+
+# First, so its hooks wrap authentication and the DB teardown.
+instrumentation.init_app(app)
 
 app.register_blueprint(auth_blueprint)
-database = Database()
+app.register_blueprint(bulk_blueprint)
 
-
-def to_iso(dt):
-    if dt is None:
-        return None
-    if isinstance(dt, str):
-        return dt
-    if isinstance(dt, datetime):
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.isoformat().replace("+00:00", "Z")
-    return str(dt)
+token_purge_scheduler = None
+if app.config["TOKEN_PURGE_INTERVAL_SECONDS"] > 0:
+    token_purge_scheduler = PurgeScheduler(
+        app.config["TOKEN_PURGE_INTERVAL_SECONDS"], **maintenance_options_from_env()
+    )
 
 
 @app.before_request
-def open_db_connection():
-    g.db_conn = database.get_connection()
-
+def start_token_purge_scheduler():
+    # On the first request of each process, not at import: a pre-forking
+    # server that imports the app in its master (gunicorn --preload) would
+    # otherwise run the thread there and in no worker.
+    if token_purge_scheduler is not None:
+        token_purge_scheduler.start()
 
 
 @app.before_request
 def authenticate_request():
-    if request.path == "/health" or request.path.startswith("/auth/"):
+    # CORS preflights carry no credentials; flask-cors answers them.
+    if request.method == "OPTIONS":
+        return
+    if request.path in ("/health", "/metrics") or request.path.startswith("/auth/"):
         return
 
     authorization_header = request.headers.get("Authorization", "")
-    if not authorization_header.startswith("Bearer "):
-        raise Unauthorized("Missing or invalid Authorization header")
-
     access_token_value = authorization_header.removeprefix("Bearer ").strip()
-    if not access_token_value:
+    if not authorization_header.startswith("Bearer ") or not access_token_value:
+        record_auth("none", "missing")
         raise Unauthorized("Missing or invalid Authorization header")
 
-    token_row = crud.slide_access_token(
-        g.db_conn,
-        access_token_value,
-        app.config["ACCESS_TOKEN_TTL_SECONDS"],
-    )
-    if not token_row:
+    user_id = authenticate_access_token(access_token_value)
+    if user_id is None:
         raise Unauthorized("Invalid or expired token")
 
-    g.user_id = token_row["user_id"]
+    g.user_id = user_id
 
 
-@app.teardown_request
-def close_db_connection(exception=None):
-    conn = getattr(g, "db_conn", None)
-    if conn:
+def release_db_connection(conn, exception=None):
+    discard = False
+    try:
         if exception:
             conn.rollback()
         else:
             conn.commit()
-        conn.close()
+    except Exception:
+        # Don't hand a broken connection to the next request.
+        discard = True
+        raise
+    finally:
+        read_cache.end_transaction(conn)
+        database.release_connection(conn, discard=discard)
+        record_pool(database.pool_stats())
+
+
+@app.after_request
+def hold_db_connection_for_stream(response):
+    # A streamed body is generated after teardown; keep its connection checked
+    # out (and its transaction open) until the last chunk has been sent.
+    if response.is_streamed and "db_conn" in g:
+        response.response = release_after_stream(
+            response.response, partial(release_db_connection, g.pop("db_conn"))
+        )
+    return response
+
+
+@app.teardown_request
+def close_db_connection(exception=None):
+    conn = g.pop("db_conn", None)
+    if conn:
+        release_db_connection(conn, exception)
 
 
 @app.errorhandler(AppError)
 def handle_app_error(err: AppError):
-    return jsonify({"error": err.detail}), err.status_code
+    return jsonify({"error": err.detail}), err.status_code, getattr(err, "headers", None)
+
+
+def reject_body(project_id: int, error: str):
+    """400 for a body that failed validation, unless the project is missing or foreign.
+
+    The writes check ownership in the same statement, so only this error path
+    pays for a separate lookup; it keeps 404 ahead of 400/415 as before.
+    """
+    if not crud.get_project(get_db(), project_id, g.user_id):
+        raise ProjectNotFound()
+    request.get_json()  # 415 / 400 for a non-JSON or malformed body, as before
+    return jsonify({"error": error}), 400
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "ok"}), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus text format, summed over every worker process on this host."""
+    expected = app.config["METRICS_BEARER_TOKEN"]
+    if expected:
+        provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(provided, expected):
+            raise Unauthorized("Invalid metrics token")
+    elif request.remote_addr not in ("127.0.0.1", "::1"):
+        # No token configured: only scrapers on this host.
+        raise Forbidden("Metrics are only served to local callers unless METRICS_BEARER_TOKEN is set")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/projects", methods=["POST"])
@@ -89,30 +193,36 @@ def create_project():
     if not name:
         return jsonify({"error": "Project name required"}), 400
 
-    project_id = crud.create_project(g.db_conn, g.user_id, name, description)
+    project_id = crud.create_project(get_db(), g.user_id, name, description)
 
     return jsonify({"id": project_id, "name": name, "description": description}), 201
 
 
 @app.route("/projects", methods=["GET"])
+@etag_by_data_version
 def get_projects():
-    projects = crud.get_projects(g.db_conn, g.user_id)
-    return jsonify(projects), 200
+    if wants_stream():
+        return stream_rows(
+            crud.iter_projects(get_db(), g.user_id, app.config["STREAM_ITERSIZE"])
+        )
+
+    limit, after = page_request(cursor_fields=(CURSOR_ID,))
+    projects = crud.get_projects(
+        get_db(), g.user_id, limit=limit + 1, after_id=after[0] if after else None
+    )
+    projects, headers = paginate(projects, limit, lambda p: [p["id"]])
+    return jsonify(projects), 200, headers
 
 
 @app.route("/projects/<int:project_id>/goals", methods=["POST"])
 def create_daily_goal(project_id):
-    project = crud.get_project(g.db_conn, project_id, g.user_id)
-    if not project:
-        return jsonify({"error": "Project not found"}), 404
-
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     goal_text = data.get("goal_text")
 
     if not goal_text:
-        return jsonify({"error": "goal_text required"}), 400
+        return reject_body(project_id, "goal_text required")
 
-    goal_id = crud.create_daily_goal(g.db_conn, project_id, g.user_id, goal_text)
+    goal_id = crud.create_daily_goal(get_db(), project_id, g.user_id, goal_text)
 
     return jsonify(
         {"id": goal_id, "project_id": project_id, "goal_text": goal_text}
@@ -120,35 +230,57 @@ def create_daily_goal(project_id):
 
 
 @app.route("/projects/<int:project_id>/goals", methods=["GET"])
+@etag_by_data_version
 def get_daily_goals(project_id):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    goals = crud.get_daily_goals(g.db_conn, project_id, g.user_id)
-    return jsonify(goals), 200
+    if wants_stream():
+        return stream_rows(
+            crud.iter_daily_goals(
+                get_db(), project_id, g.user_id, app.config["STREAM_ITERSIZE"]
+            )
+        )
+
+    limit, after = page_request(cursor_fields=(CURSOR_DATE,))
+    goals = crud.get_daily_goals(
+        get_db(),
+        project_id,
+        g.user_id,
+        limit=limit + 1,
+        before_date=after[0] if after else None,
+    )
+    goals, headers = paginate(goals, limit, lambda goal: [goal["goal_date"].isoformat()])
+    for goal in goals:
+        del goal["goal_date"]
+    return jsonify(goals), 200, headers
 
 
 @app.route("/projects/<int:project_id>/archive", methods=["POST"])
 def archive_project(project_id):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    archived = crud.archive_project(g.db_conn, project_id, g.user_id)
-    if not archived:
-        return jsonify({"error": "Project already archived"}), 409
-
+    crud.archive_project(get_db(), project_id, g.user_id)
     return jsonify({"status": "archived", "project_id": project_id}), 200
 
 
 @app.route("/projects/archived", methods=["GET"])
+@etag_by_data_version
 def get_archived_projects():
-    projects = crud.get_archived_projects(g.db_conn, g.user_id)
-    return jsonify(projects), 200
+    if wants_stream():
+        return stream_rows(
+            crud.iter_archived_projects(get_db(), g.user_id, app.config["STREAM_ITERSIZE"])
+        )
+
+    limit, after = page_request(cursor_fields=(CURSOR_TIMESTAMP, CURSOR_ID))
+    projects = crud.get_archived_projects(
+        get_db(), g.user_id, limit=limit + 1, before=after
+    )
+    projects, headers = paginate(
+        projects, limit, lambda p: [p["archived_at"].isoformat(), p["id"]]
+    )
+    return jsonify(projects), 200, headers
 
 
 @app.route("/projects/<int:project_id>", methods=["GET"])
+@etag_by_data_version
 def get_project(project_id: int):
-    project = crud.get_project(g.db_conn, project_id, g.user_id)
+    project = crud.get_project(get_db(), project_id, g.user_id)
     if not project:
         return jsonify({"error": "Project not found"}), 404
     return jsonify(project), 200
@@ -156,78 +288,121 @@ def get_project(project_id: int):
 
 @app.route("/projects/<int:project_id>", methods=["PATCH"])
 def update_project(project_id: int):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     name = data.get("name")
     description = data.get("description")
 
     if not name and description is None:
-        return jsonify({"error": "At least one of name or description is required"}), 400
-
-    project = crud.update_project(g.db_conn, project_id, g.user_id, name, description)
-    if not project:
-        return jsonify({"error": "Project not found or archived"}), 404
+        return reject_body(project_id, "At least one of name or description is required")
 
+    project = crud.update_project(get_db(), project_id, g.user_id, name, description)
     return jsonify(project), 200
 
 
 @app.route("/projects/<int:project_id>", methods=["DELETE"])
 def delete_project(project_id: int):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    archived = crud.archive_project(g.db_conn, project_id, g.user_id)
-    if not archived:
-        return jsonify({"error": "Project already archived"}), 409
-
+    crud.archive_project(get_db(), project_id, g.user_id)
     return jsonify({"status": "archived", "project_id": project_id}), 200
 
 
 @app.route("/projects/<int:project_id>/restore", methods=["POST"])
 def restore_project(project_id: int):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    restored = crud.restore_project(g.db_conn, project_id, g.user_id)
-    if not restored:
-        return jsonify({"error": "Project is not archived"}), 409
-
+    crud.restore_project(get_db(), project_id, g.user_id)
     return jsonify({"status": "restored", "project_id": project_id}), 200
 
 
 @app.route("/projects/<int:project_id>/goals/today", methods=["GET"])
 def get_todays_goal(project_id: int):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    goal = crud.get_todays_goal(g.db_conn, project_id, g.user_id)
+    goal = crud.get_todays_goal(get_db(), project_id, g.user_id)
     if not goal:
         return jsonify({"error": "No goal set for today"}), 404
-
-    goal["created_at"] = to_iso(goal.get("created_at"))
     return jsonify(goal), 200
 
 
+@app.route("/today", methods=["GET"])
+def get_today():
+    projects = crud.get_projects_with_todays_goal(get_db(), g.user_id)
+    return jsonify(projects), 200
+
+
 @app.route("/projects/<int:project_id>/goals/today", methods=["PUT"])
 def upsert_today_goal(project_id):
-    if not crud.project_exists(g.db_conn, project_id, g.user_id):
-        return jsonify({"error": "Project not found"}), 404
-
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     goal_text = data.get("goal_text")
 
     if not goal_text:
-        return jsonify({"error": "goal_text required"}), 400
+        return reject_body(project_id, "goal_text required")
 
-    row = crud.upsert_daily_goal_today(g.db_conn, project_id, g.user_id, goal_text)
+    row = crud.upsert_daily_goal_today(get_db(), project_id, g.user_id, goal_text)
 
     status_code = 201 if row["inserted"] else 200
     row.pop("inserted", None)
     return jsonify(row), status_code
 
 
+@app.route("/goals/today", methods=["PUT"])
+def upsert_today_goals():
+    """Set today's goal for many projects in one request; one status per item."""
+    data = request.get_json(silent=True) or {}
+    goals = data.get("goals")
+    if not isinstance(goals, list):
+        return jsonify({"error": "goals must be a list"}), 400
+
+    max_items = app.config["GOALS_BATCH_MAX_ITEMS"]
+    if len(goals) > max_items:
+        return jsonify({"error": f"At most {max_items} goals per request"}), 400
+
+    results = [None] * len(goals)
+    items, positions, seen = [], [], set()
+    for position, item in enumerate(goals):
+        item = item if isinstance(item, dict) else {}
+        project_id = item.get("project_id")
+        goal_text = item.get("goal_text")
+
+        if type(project_id) is not int or not isinstance(goal_text, str) or not goal_text:
+            results[position] = {
+                "project_id": project_id,
+                "status": "invalid",
+                "error": "project_id and goal_text required",
+            }
+        elif not 1 <= project_id <= 2**31 - 1:
+            # projects.id is a SERIAL: anything else would fail the INTEGER cast.
+            results[position] = {
+                "project_id": project_id,
+                "status": "invalid",
+                "error": "project_id out of range",
+            }
+        elif project_id in seen:
+            results[position] = {
+                "project_id": project_id,
+                "status": "invalid",
+                "error": "Duplicate project_id",
+            }
+        else:
+            seen.add(project_id)
+            items.append((project_id, goal_text))
+            positions.append(position)
+
+    rows = crud.upsert_daily_goals_today(get_db(), g.user_id, items)
+    for position, row in zip(positions, rows):
+        if row["id"] is None:
+            results[position] = {
+                "project_id": row["project_id"],
+                "status": "not_found",
+                "error": "Project not found",
+            }
+            continue
+
+        inserted = row.pop("inserted")
+        results[position] = {
+            "project_id": row["project_id"],
+            "status": "created" if inserted else "updated",
+            "goal": row,
+        }
+
+    return jsonify({"results": results}), 200
+
+
 if __name__ == "__main__":
     # Port 5000 is taken by macOS AirPlay Receiver on Monterey+
     app.run(debug=True, port=8000)
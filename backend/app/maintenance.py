@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import errors as pg_errors
+
+from backend.app import crud
+from backend.app.database import database
+
+# Advisory lock keys (int4, per schema): one run of each job at a time across workers/hosts.
+_PURGE_LOCK_KEY = 0x70757267  # "purg"
+_PARTITION_LOCK_KEY = 0x70617274  # "part"
+
+TOKEN_TABLES = ("access_tokens", "refresh_tokens")
+
+
+@contextmanager
+def _job_lock(conn, key: int):
+    """
+    Session-level advisory lock around a whole job, so it holds across the
+    job's many short transactions. Yields whether it was taken.
+    """
+    locked = crud.try_advisory_lock(conn, key)
+    conn.commit()
+    try:
+        yield locked
+    finally:
+        if locked:
+            conn.rollback()
+            crud.advisory_unlock(conn, key)
+            conn.commit()
+
+
+def purge_tokens(
+    batch_size: int = 5000,
+    grace_seconds: int = 3600,
+    pause_seconds: float = 0.05,
+    db=database,
+) -> dict:
+    """
+    Delete expired and revoked rows from access_tokens, refresh_tokens and
+    access_token_denylist.
+
+    Rows go in batches of `batch_size`, each in its own short transaction,
+    with `pause_seconds` between batches so the purge never holds locks or
+    saturates I/O for long. Tokens are kept for `grace_seconds` after they
+    expire or are revoked. Returns rows removed per table and time spent;
+    if another purge is already running, returns immediately with
+    `skipped: True`.
+    """
+    started = time.monotonic()
+    report = {
+        "access_tokens": 0,
+        "refresh_tokens": 0,
+        "access_token_denylist": 0,
+        "batches": 0,
+        "skipped": False,
+    }
+
+    purges = [
+        ("access_tokens", lambda conn: crud.purge_expired_tokens(conn, "access_tokens", batch_size, grace_seconds)),
+        ("refresh_tokens", lambda conn: crud.purge_expired_tokens(conn, "refresh_tokens", batch_size, grace_seconds)),
+        ("access_token_denylist", lambda conn: crud.purge_expired_denylist(conn, batch_size)),
+    ]
+
+    conn = db.get_connection()
+    discard = False
+    try:
+        with _job_lock(conn, _PURGE_LOCK_KEY) as locked:
+            report["skipped"] = not locked
+            for table, purge in purges if locked else []:
+                while True:
+                    deleted = purge(conn)
+                    conn.commit()
+
+                    report[table] += deleted
+                    report["batches"] += 1
+                    if deleted < batch_size:
+                        break
+                    time.sleep(pause_seconds)
+    except Exception:
+        discard = True
+        conn.rollback()
+        raise
+    finally:
+        db.release_connection(conn, discard=discard)
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+
+def manage_token_partitions(
+    days_ahead: int = 7,
+    grace_seconds: int = 3600,
+    tables=TOKEN_TABLES,
+    db=database,
+) -> dict:
+    """
+    Keep the daily partitions of the token tables rolling: create one per day
+    up to `days_ahead` days out, and drop past partitions whose rows are all
+    purgeable (expired or revoked more than `grace_seconds` ago). A dropped
+    partition replaces what would otherwise be a DELETE of every row in it.
+
+    Tables that are not partitioned are left alone. A partition still holding
+    a live token (e.g. a long-slid access token) is kept and reported; the
+    row-level purge catches up with it. Returns what was created, dropped and
+    kept, any errors, and time spent.
+    """
+    started = time.monotonic()
+    report = {"created": [], "dropped": [], "kept": [], "errors": [], "skipped": False}
+
+    conn = db.get_connection()
+    discard = False
+    try:
+        with _job_lock(conn, _PARTITION_LOCK_KEY) as locked:
+            report["skipped"] = not locked
+            for table in tables if locked else []:
+                if not crud.is_partitioned(conn, table):
+                    conn.rollback()
+                    continue
+
+                try:
+                    report["created"] += crud.create_token_partitions(conn, table, days_ahead)
+                    conn.commit()
+                except psycopg2.Error as exc:
+                    # One table's failure doesn't stop the others.
+                    conn.rollback()
+                    report["errors"].append(f"{table}: {exc.pgerror or exc}".strip())
+
+                for partition in crud.get_token_partitions(conn, table):
+                    if not partition["is_past"]:
+                        continue
+                    if crud.partition_has_live_tokens(conn, partition["name"], grace_seconds):
+                        report["kept"].append(partition["name"])
+                        continue
+                    try:
+                        crud.drop_token_partition(conn, partition["name"])
+                        conn.commit()
+                        report["dropped"].append(partition["name"])
+                    except pg_errors.LockNotAvailable:
+                        conn.rollback()
+                        report["errors"].append(f"{partition['name']}: lock timeout")
+                conn.rollback()
+    except Exception:
+        discard = True
+        conn.rollback()
+        raise
+    finally:
+        db.release_connection(conn, discard=discard)
+
+    report["seconds"] = round(time.monotonic() - started, 3)
+    return report
+
+
+def run_token_maintenance(
+    batch_size: int = 5000,
+    grace_seconds: int = 3600,
+    pause_seconds: float = 0.05,
+    days_ahead: int = 7,
+    db=database,
+) -> dict:
+    """Roll partitions first so the row-level purge has less left to delete."""
+    return {
+        "partitions": manage_token_partitions(days_ahead, grace_seconds, db=db),
+        "purge": purge_tokens(batch_size, grace_seconds, pause_seconds, db=db),
+    }
+
+
+class PurgeScheduler:
+    """
+    Runs `run_token_maintenance` every `interval_seconds` on a daemon thread.
+
+    Every worker may start one; advisory locks keep runs from overlapping.
+    The most recent report (or error) is kept on `last_report` / `last_error`.
+    `start()` is cheap once running and may be called on every request: a
+    forked worker inherits the object but not the thread, and starts its own.
+    """
+
+    def __init__(self, interval_seconds: float, **options):
+        self.interval_seconds = interval_seconds
+        self.options = options
+        self.last_report = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="token-purge", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.last_report = run_token_maintenance(**self.options)
+                self.last_error = None
+            except Exception as exc:
+                # Keep the thread alive; the next run retries.
+                self.last_error = repr(exc)
+
+
+def maintenance_options_from_env() -> dict:
+    return {
+        "batch_size": int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "5000")),
+        "grace_seconds": int(os.getenv("TOKEN_PURGE_GRACE_SECONDS", "3600")),
+        "pause_seconds": float(os.getenv("TOKEN_PURGE_PAUSE_SECONDS", "0.05")),
+        "days_ahead": int(os.getenv("TOKEN_PARTITION_DAYS_AHEAD", "7")),
+    }
+
+
+def main(argv=None) -> int:
+    defaults = maintenance_options_from_env()
+
+    parser = argparse.ArgumentParser(prog="python -m backend.app.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    purge = commands.add_parser("purge-tokens", help="delete expired and revoked tokens")
+    purge.add_argument("--batch-size", type=int, default=defaults["batch_size"])
+    purge.add_argument("--grace-seconds", type=int, default=defaults["grace_seconds"])
+    purge.add_argument("--pause-seconds", type=float, default=defaults["pause_seconds"])
+
+    partitions = commands.add_parser(
+        "token-partitions", help="create upcoming token partitions and drop expired ones"
+    )
+    partitions.add_argument("--days-ahead", type=int, default=defaults["days_ahead"])
+    partitions.add_argument("--grace-seconds", type=int, default=defaults["grace_seconds"])
+
+    args = parser.parse_args(argv)
+
+    if args.command == "purge-tokens":
+        report = purge_tokens(
+            batch_size=args.batch_size,
+            grace_seconds=args.grace_seconds,
+            pause_seconds=args.pause_seconds,
+        )
+        print(json.dumps(report))
+    elif args.command == "token-partitions":
+        report = manage_token_partitions(
+            days_ahead=args.days_ahead,
+            grace_seconds=args.grace_seconds,
+        )
+        print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
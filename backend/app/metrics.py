@@ -0,0 +1,368 @@
+import bisect
+import fcntl
+import glob
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# name -> (type, help). Histogram buckets are shared by every histogram.
+FAMILIES = {
+    "http_requests_total": ("counter", "Requests handled, by route and status."),
+    "http_request_duration_seconds": ("histogram", "Request wall time, by route."),
+    "auth_outcomes_total": ("counter", "Bearer token checks, by token mode and outcome."),
+    "db_pool_connections": ("gauge", "Pooled connections per state, summed over live workers."),
+    "db_pool_checkouts_total": ("counter", "Connections checked out of the pool."),
+    "db_pool_timeouts_total": ("counter", "Checkouts that gave up waiting (503)."),
+    "db_pool_wait_seconds_total": ("counter", "Time spent waiting for a pooled connection."),
+    "metrics_dropped_series_total": ("counter", "Series not recorded because a worker's file was full."),
+}
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# Counters of exited workers, folded in by the next worker to start.
+ARCHIVE_NAME = "archived.json"
+
+_USED = struct.Struct("<Q")
+_KEY_LENGTH = struct.Struct("<Q")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class _ValueFile:
+    """
+    One process's samples: an append-only run of (key length, key, float64)
+    entries in a fixed-size mapping, with the bytes used in the first word.
+    Only the owning process writes to it, so no cross-process lock is needed;
+    an entry is complete before `used` is moved past it.
+    """
+
+    def __init__(self, path: str | None, size: int):
+        self.size = size - size % 8
+        if path:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.ftruncate(fd, self.size)
+            self.buffer = mmap.mmap(fd, self.size)
+            os.close(fd)
+        else:
+            self.buffer = mmap.mmap(-1, self.size)
+        self._values = memoryview(self.buffer).cast("d")
+        self._used = _USED.size
+        _USED.pack_into(self.buffer, 0, self._used)
+
+    def allocate(self, key: str) -> int | None:
+        """Append `key` with value 0; returns the index of its value, or None if full."""
+        encoded = key.encode()
+        padded = len(encoded) + (-len(encoded) % 8)
+        entry = _KEY_LENGTH.size + padded + 8
+        if self._used + entry > self.size:
+            return None
+        offset = self._used
+        _KEY_LENGTH.pack_into(self.buffer, offset, len(encoded))
+        self.buffer[offset + 8 : offset + 8 + len(encoded)] = encoded
+        value_offset = offset + 8 + padded
+        self._values[value_offset // 8] = 0.0
+        self._used += entry
+        _USED.pack_into(self.buffer, 0, self._used)
+        return value_offset // 8
+
+    def add(self, index: int, amount: float):
+        self._values[index] += amount
+
+    def set(self, index: int, value: float):
+        self._values[index] = value
+
+
+def read_samples(buffer) -> dict:
+    """Samples of one value file (any object supporting the buffer protocol)."""
+    (used,) = _USED.unpack_from(buffer, 0)
+    samples = {}
+    offset = _USED.size
+    while offset + 8 <= used:
+        (length,) = _KEY_LENGTH.unpack_from(buffer, offset)
+        key = bytes(buffer[offset + 8 : offset + 8 + length]).decode()
+        value_offset = offset + 8 + length + (-length % 8)
+        (value,) = struct.unpack_from("=d", buffer, value_offset)
+        samples[key] = value
+        offset = value_offset + 8
+    return samples
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms shared by the worker processes on a host.
+
+    Each process records into its own memory-mapped file in `directory`
+    (`<pid>.metrics`); `render` sums every file into Prometheus text format.
+    Recording is an in-memory float update under a process-local lock.
+    Counters from exited workers keep counting toward the totals; gauges only
+    come from live ones. A worker starting up folds the files of exited
+    workers into `archived.json` and removes them, so the directory holds one
+    file per live worker. With no directory, only this process's samples are
+    kept and rendered.
+    """
+
+    def __init__(self, directory: str | None = None, file_bytes: int = 1 << 20):
+        self.directory = directory
+        self.file_bytes = file_bytes
+        self._lock = threading.Lock()
+        self._pid = None
+        self._file = None
+        self._indexes = {}  # (name, labels) -> value index
+        self._histograms = {}  # (name, labels) -> ([bucket indexes], sum index, count index)
+        self._dropped = None
+
+    def inc(self, name: str, labels: tuple = (), amount: float = 1.0):
+        with self._lock:
+            index = self._index(name, labels)
+            if index is not None:
+                self._file.add(index, amount)
+
+    def set(self, name: str, labels: tuple = (), value: float = 0.0):
+        with self._lock:
+            index = self._index(name, labels)
+            if index is not None:
+                self._file.set(index, value)
+
+    def observe(self, name: str, labels: tuple, value: float):
+        with self._lock:
+            histogram = self._histogram(name, labels)
+            if histogram is None:
+                return
+            buckets, sum_index, count_index = histogram
+            # Stored per bucket; render() makes them cumulative.
+            self._file.add(buckets[bisect.bisect_left(BUCKETS, value)], 1.0)
+            self._file.add(sum_index, value)
+            self._file.add(count_index, 1.0)
+
+    def render(self) -> str:
+        totals = {}
+        for samples, alive in self._collect():
+            for key, value in samples.items():
+                family = self._family(key)
+                if family is None or (FAMILIES[family][0] == "gauge" and not alive):
+                    continue
+                totals.setdefault(family, {})
+                totals[family][key] = totals[family].get(key, 0.0) + value
+
+        lines = []
+        for family, samples in sorted(totals.items()):
+            kind, help_text = FAMILIES[family]
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            running, running_labels = 0.0, None
+            for key in sorted(samples, key=_sort_key):
+                value = samples[key]
+                if kind == "histogram" and key.startswith(f"{family}_bucket"):
+                    labels = _sort_key(key)[0]
+                    if labels != running_labels:
+                        running, running_labels = 0.0, labels
+                    running += value
+                    value = running
+                lines.append(f"{key} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _collect(self):
+        with self._lock:
+            self._ensure_file()
+            own = read_samples(self._file.buffer)
+        if not self.directory:
+            yield own, True
+            return
+
+        own_path = self._path(os.getpid())
+        yield own, True
+        # Shared: a worker folding files into the archive must not be seen halfway.
+        with self._archive_lock(fcntl.LOCK_SH):
+            yield self._read_archive(), False
+            for path, pid in self._worker_files():
+                if path == own_path:
+                    continue
+                try:
+                    with open(path, "rb") as f:
+                        samples = read_samples(f.read())
+                except (OSError, ValueError, struct.error):
+                    continue
+                yield samples, _pid_alive(pid)
+
+    def _worker_files(self):
+        for path in glob.glob(os.path.join(self.directory, "*.metrics")):
+            try:
+                yield path, int(os.path.basename(path).split(".")[0])
+            except ValueError:
+                continue
+
+    def _archive_lock(self, operation: int):
+        return _flock(os.path.join(self.directory, f".{ARCHIVE_NAME}.lock"), operation)
+
+    def _read_archive(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, ARCHIVE_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _fold_exited_workers(self):
+        """
+        Add the counters of exited workers' files (and of a file left by an
+        earlier process with this pid) to the archive, then remove the files.
+        Their gauges go, as render() would skip them anyway.
+        """
+        with self._archive_lock(fcntl.LOCK_EX):
+            archive = self._read_archive()
+            folded = []
+            for path, pid in self._worker_files():
+                if pid != os.getpid() and _pid_alive(pid):
+                    continue
+                try:
+                    with open(path, "rb") as f:
+                        samples = read_samples(f.read())
+                except (OSError, ValueError, struct.error):
+                    samples = {}
+                for key, value in samples.items():
+                    family = self._family(key)
+                    if family is not None and FAMILIES[family][0] != "gauge":
+                        archive[key] = archive.get(key, 0.0) + value
+                folded.append(path)
+            if not folded:
+                return
+            path = os.path.join(self.directory, ARCHIVE_NAME)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(archive, f)
+            os.replace(f"{path}.tmp", path)
+            for path in folded:
+                os.unlink(path)
+
+    @staticmethod
+    def _family(key: str) -> str | None:
+        name = key.partition("{")[0]
+        if name in FAMILIES:
+            return name
+        for suffix in ("_bucket", "_sum", "_count"):
+            if name.endswith(suffix) and name[: -len(suffix)] in FAMILIES:
+                return name[: -len(suffix)]
+        return None
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.metrics")
+
+    def _ensure_file(self):
+        # A forked worker gets a file of its own; the parent's indexes don't apply.
+        pid = os.getpid()
+        if self._file is None or self._pid != pid:
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                self._fold_exited_workers()
+            self._file = _ValueFile(self._path(pid) if self.directory else None, self.file_bytes)
+            self._pid = pid
+            self._indexes = {}
+            self._histograms = {}
+            self._dropped = self._file.allocate("metrics_dropped_series_total")
+
+    def _index(self, name: str, labels: tuple) -> int | None:
+        if self._pid != os.getpid():
+            self._ensure_file()
+        index = self._indexes.get((name, labels))
+        if index is None:
+            self._ensure_file()
+            index = self._file.allocate(_sample(name, labels))
+            if index is None:
+                if self._dropped is not None:
+                    self._file.add(self._dropped, 1.0)
+                return None
+            self._indexes[(name, labels)] = index
+        return index
+
+    def _histogram(self, name: str, labels: tuple):
+        if self._pid != os.getpid():
+            self._ensure_file()
+        histogram = self._histograms.get((name, labels))
+        if histogram is None:
+            buckets = [self._index(f"{name}_bucket", labels + (("le", _le(b)),)) for b in BUCKETS]
+            sum_index = self._index(f"{name}_sum", labels)
+            count_index = self._index(f"{name}_count", labels)
+            if None in buckets or sum_index is None or count_index is None:
+                return None
+            histogram = (buckets, sum_index, count_index)
+            self._histograms[(name, labels)] = histogram
+        return histogram
+
+
+@contextmanager
+def _flock(path: str, operation: int):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, operation)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _sort_key(key: str):
+    # Group a histogram's samples by labels, buckets in `le` order.
+    name, _, labels = key.partition("{")
+    labels = labels.rstrip("}")
+    le = -1.0
+    if labels.startswith('le="') or ',le="' in labels:
+        labels, _, raw = labels.rpartition('le="')
+        labels = labels.rstrip(",")
+        raw = raw.rstrip('"')
+        le = float("inf") if raw == "+Inf" else float(raw)
+    return (labels, name, le)
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def record_request(method: str, route: str, status: int, seconds: float):
+    metrics.inc("http_requests_total", (("method", method), ("route", route), ("status", status)))
+    metrics.observe("http_request_duration_seconds", (("method", method), ("route", route)), seconds)
+
+
+def record_auth(mode: str, outcome: str):
+    metrics.inc("auth_outcomes_total", (("mode", mode), ("outcome", outcome)))
+
+
+def record_pool(stats: dict):
+    metrics.set("db_pool_connections", (("state", "in_use"),), stats["in_use"])
+    metrics.set("db_pool_connections", (("state", "idle"),), stats["idle"])
+    # Cumulative per process, so setting them keeps each file's share monotonic.
+    metrics.set("db_pool_checkouts_total", (), stats["checkouts"])
+    metrics.set("db_pool_timeouts_total", (), stats["timeouts"])
+    metrics.set("db_pool_wait_seconds_total", (), stats["total_wait_seconds"])
+
+
+def _directory_from_env() -> str | None:
+    return os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "daily_goal_metrics")) or None
+
+
+metrics = Metrics(
+    _directory_from_env(),
+    file_bytes=int(os.getenv("METRICS_FILE_BYTES", str(1 << 20))),
+)
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, request
+
+from backend.app.errors import BadRequest
+
+
+def encode_cursor(values: list) -> str:
+    """Opaque cursor for the sort-key values of the last row on a page."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_id(value) -> bool:
+    # SERIAL columns: anything else fails the ::integer cast in SQL.
+    return type(value) is int and 1 <= value <= 2**31 - 1
+
+
+def _is_timestamp(value) -> bool:
+    try:
+        datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _is_date(value) -> bool:
+    try:
+        date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+# Checks for each kind of sort-key value a cursor may carry.
+CURSOR_ID = _is_id
+CURSOR_TIMESTAMP = _is_timestamp
+CURSOR_DATE = _is_date
+
+
+def decode_cursor(cursor: str, fields: tuple) -> list:
+    """Sort-key values of a cursor, each checked by its entry in `fields` (CURSOR_*)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise BadRequest("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise BadRequest("Invalid cursor")
+    if not all(is_valid(value) for is_valid, value in zip(fields, values)):
+        raise BadRequest("Invalid cursor")
+    return values
+
+
+def page_request(cursor_fields: tuple) -> tuple[int, list | None]:
+    """Read `limit` and `cursor` from the query string, clamped to the server max."""
+    default_size = current_app.config["PAGE_SIZE_DEFAULT"]
+    max_size = current_app.config["PAGE_SIZE_MAX"]
+
+    limit = request.args.get("limit", default_size, type=int)
+    if limit is None or limit < 1:
+        raise BadRequest("limit must be a positive integer")
+    limit = min(limit, max_size)
+
+    cursor = request.args.get("cursor")
+    after = decode_cursor(cursor, cursor_fields) if cursor else None
+    return limit, after
+
+
+def paginate(rows: list, limit: int, cursor_key) -> tuple[list, dict]:
+    """
+    Trim the look-ahead row; return the page and its response headers.
+
+    Callers fetch `limit + 1` rows. When the extra row is there, the page
+    gets an `X-Next-Cursor` header built from `cursor_key(last_row)`, the
+    JSON-safe sort-key values of the last row shown.
+    """
+    headers = {}
+    if len(rows) > limit:
+        del rows[limit:]
+        headers["X-Next-Cursor"] = encode_cursor(cursor_key(rows[-1]))
+    return rows, headers
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from backend.app import green
+from backend.app.errors import HashingBusy
+
+
+class PasswordHasher:
+    """
+    Runs the password KDF in a small process pool instead of on the request
+    thread, so a login burst is capped at `workers` CPUs and the rest of the
+    API keeps serving. At most `max_pending` hashes may be queued; callers
+    beyond that wait `queue_timeout` seconds, then get `HashingBusy` (503).
+
+    `method` is a werkzeug method string ("scrypt:32768:8:1",
+    "pbkdf2:sha256:600000", ...). Stored hashes made with other parameters
+    report `needs_rehash`. With `workers=0` hashing runs inline.
+
+    Under the ASGI server both waits (for a slot, for the worker) leave the
+    event loop free; inline hashing does not.
+    """
+
+    def __init__(
+        self,
+        method: str = "scrypt:32768:8:1",
+        workers: int = 2,
+        max_pending: int = 16,
+        queue_timeout: float = 2.0,
+    ):
+        self.method = method
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._canonical_method = None
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash: str, password: str) -> bool:
+        if not stored_hash:
+            return False
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        return stored_hash.split("$", 1)[0] != self.canonical_method
+
+    @property
+    def canonical_method(self) -> str:
+        # werkzeug expands shorthands ("scrypt") into full parameters.
+        if self._canonical_method is None:
+            self._canonical_method = generate_password_hash("", self.method).split("$", 1)[0]
+        return self._canonical_method
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False) and not green.blocking(
+            self._slots.acquire, timeout=self.queue_timeout
+        ):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return green.result(future)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # One pool per process: a forked worker must not reuse its parent's.
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+
+password_hasher = PasswordHasher(
+    method=os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1"),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16")),
+    queue_timeout=float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "2")),
+)
@@ -0,0 +1,195 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from backend.app.errors import TooManyRequests
+
+
+def _sliding_count(window_start: float, current: int, previous: int, window: float, now: float) -> float:
+    """Sliding-window estimate: previous bucket weighted by how much of it still overlaps."""
+    overlap = 1 - (now - window_start) / window
+    return current + previous * max(overlap, 0.0)
+
+
+def _advance(window_start: float, current: int, previous: int, window: float, now: float):
+    """Roll the two buckets forward so `now` falls in the current one."""
+    elapsed_windows = int((now - window_start) // window)
+    if elapsed_windows <= 0:
+        return window_start, current, previous
+    previous = current if elapsed_windows == 1 else 0
+    return window_start + elapsed_windows * window, 0, previous
+
+
+class MemoryBackend:
+    """Sliding-window counters in this process only."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        """Count one hit. Returns 0 if allowed, else seconds until retry."""
+        now = time.time()
+        with self._lock:
+            window_start, current, previous = self._counters.get(key, (now, 0, 0))
+            window_start, current, previous = _advance(window_start, current, previous, window, now)
+
+            if _sliding_count(window_start, current, previous, window, now) + 1 > limit:
+                self._counters[key] = (window_start, current, previous)
+                return window_start + window - now
+
+            self._counters[key] = (window_start, current + 1, previous)
+            if len(self._counters) > self.max_keys:
+                self._evict(now, window)
+            return 0.0
+
+    def _evict(self, now: float, window: float):
+        stale_before = now - 2 * window
+        self._counters = {k: v for k, v in self._counters.items() if v[0] > stale_before}
+        while len(self._counters) > self.max_keys:
+            self._counters.pop(next(iter(self._counters)))
+
+
+class SharedMemoryBackend:
+    """
+    Sliding-window counters in a memory-mapped file shared by every worker
+    process on the host, guarded by an flock.
+
+    The file is a fixed-size open-addressing table; each slot holds
+    (key hash, window length, window start, current count, previous count).
+    When a probe run is full, the slot with the oldest window is reused.
+    """
+
+    _SLOT = struct.Struct("<QddII")
+    _PROBES = 8
+
+    def __init__(self, path: str, slots: int = 65536):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._fd = None
+        self._pid = None
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        now = time.time()
+
+        with self._lock:
+            table = self._table()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset = self._find_slot(table, key_hash, now)
+                stored_hash, _, window_start, current, previous = self._SLOT.unpack_from(table, offset)
+                if stored_hash != key_hash:
+                    window_start, current, previous = now, 0, 0
+                window_start, current, previous = _advance(window_start, current, previous, window, now)
+
+                allowed = _sliding_count(window_start, current, previous, window, now) + 1 <= limit
+                if allowed:
+                    current += 1
+                self._SLOT.pack_into(table, offset, key_hash, window, window_start, current, previous)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        return 0.0 if allowed else window_start + window - now
+
+    def _find_slot(self, table, key_hash: int, now: float) -> int:
+        start = key_hash % self.slots
+        oldest_offset, oldest_start = None, None
+        for probe in range(self._PROBES):
+            offset = ((start + probe) % self.slots) * self._SLOT.size
+            stored_hash, stored_window, window_start, _, _ = self._SLOT.unpack_from(table, offset)
+            if stored_hash == key_hash:
+                return offset
+            if stored_hash == 0 or now - window_start >= 2 * stored_window:
+                return offset
+            if oldest_start is None or window_start < oldest_start:
+                oldest_offset, oldest_start = offset, window_start
+        return oldest_offset
+
+    def _table(self):
+        # Re-map after fork so each process holds its own fd for flock.
+        if self._mmap is None or self._pid != os.getpid():
+            size = self.slots * self._SLOT.size
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd = fd
+            self._mmap = mmap.mmap(fd, size)
+            self._pid = os.getpid()
+        return self._mmap
+
+
+@dataclass(frozen=True)
+class Rule:
+    scope: str  # "ip", "email" or "global"
+    limit: int
+    window: float
+
+    @classmethod
+    def parse(cls, scope: str, spec: str) -> "Rule | None":
+        """'20/60' -> 20 hits per 60 seconds. Empty spec disables the rule."""
+        if not spec:
+            return None
+        limit, _, window = spec.partition("/")
+        return cls(scope, int(limit), float(window or 60))
+
+
+class RateLimiter:
+    def __init__(self, backend, rules: dict[str, list[Rule]], enabled: bool = True):
+        self.backend = backend
+        self.rules = rules
+        self.enabled = enabled
+
+    def check(self, action: str, **identity):
+        """Count one attempt at `action`; raise TooManyRequests if any rule is exceeded."""
+        if not self.enabled:
+            return
+        for rule in self.rules.get(action, []):
+            subject = "*" if rule.scope == "global" else identity.get(rule.scope)
+            if subject is None:
+                continue
+            retry_after = self.backend.hit(
+                f"{action}:{rule.scope}:{subject}", rule.limit, rule.window
+            )
+            if retry_after > 0:
+                raise TooManyRequests(retry_after=retry_after)
+
+
+def _rules_from_env(action: str, defaults: dict[str, str]) -> list[Rule]:
+    rules = []
+    for scope, default in defaults.items():
+        spec = os.getenv(f"RATE_LIMIT_{action.upper()}_PER_{scope.upper()}", default)
+        rule = Rule.parse(scope, spec)
+        if rule:
+            rules.append(rule)
+    return rules
+
+
+def _backend_from_env():
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "shared":
+        return SharedMemoryBackend(
+            os.getenv(
+                "RATE_LIMIT_SHARED_PATH",
+                os.path.join(tempfile.gettempdir(), "daily_goal_rate_limits"),
+            )
+        )
+    return MemoryBackend()
+
+
+rate_limiter = RateLimiter(
+    _backend_from_env(),
+    {
+        "login": _rules_from_env("login", {"ip": "30/60", "email": "10/300", "global": "300/1"}),
+        "register": _rules_from_env("register", {"ip": "10/3600", "global": "50/1"}),
+    },
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "1") not in ("0", "false"),
+)
@@ -0,0 +1,235 @@
+import contextvars
+import inspect
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from backend.app.token_cache import RevocationChannel
+
+ALL_SCOPES = "*"
+
+# (user_id, data version) the current request answers for; see at_data_version().
+_data_version = contextvars.ContextVar("read_cache_data_version", default=None)
+
+
+def _copy(value):
+    # Callers reshape rows before serializing (pop/del keys), so
+    # neither the stored value nor the one handed out may be shared.
+    if isinstance(value, list):
+        return [dict(row) for row in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class ReadCache:
+    """
+    Bounded LRU + TTL cache of crud read results, keyed by user and query.
+
+    Entries are grouped by (user_id, scope), e.g. "projects" or "goals:42",
+    so a write drops exactly the reads it can affect. Writes invalidate
+    twice: immediately, and again once their transaction has committed or
+    rolled back, so nothing read inside the writing transaction outlives it.
+    A read that was already running when an invalidation arrived is not
+    stored (a generation counter detects this). With a channel,
+    invalidations reach every worker process on the host; values themselves
+    stay per process.
+
+    Inside `at_data_version()`, entries are also checked against the user's
+    data version, so a response tagged with that version never carries a
+    body cached at an older one, whatever invalidation went missing.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl_seconds: float = 30.0,
+        channel: RevocationChannel | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.channel = channel
+
+        self._entries = OrderedDict()  # (user_id, scope, key) -> (value, deadline, data version)
+        self._index = {}  # user_id -> {scope: set of entry keys}
+        self._pending = {}  # id(conn) -> {(user_id, scope)}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def cached(self, scope: str):
+        """
+        Decorate a crud read `fn(conn, ..., user_id, ...)`. `scope` is formatted
+        with the call's arguments, e.g. "goals:{project_id}". Exceptions are
+        not cached.
+        """
+
+        def decorator(fn):
+            signature = inspect.signature(fn)
+
+            @wraps(fn)
+            def wrapper(conn, *args, **kwargs):
+                if not self.enabled:
+                    return fn(conn, *args, **kwargs)
+
+                bound = signature.bind(conn, *args, **kwargs)
+                bound.apply_defaults()
+                params = {k: v for k, v in bound.arguments.items() if k != "conn"}
+                user_id = params["user_id"]
+                query = tuple(
+                    (name, tuple(v) if isinstance(v, list) else v) for name, v in params.items()
+                )
+                entry_key = (user_id, scope.format(**params), (fn.__name__, *query))
+                pinned = _data_version.get()
+                version = pinned[1] if pinned and pinned[0] == user_id else None
+
+                found, value, generation = self._get(entry_key, version)
+                if found:
+                    return value
+                value = fn(conn, *args, **kwargs)
+                self._put(entry_key, value, generation, version)
+                return _copy(value)
+
+            return wrapper
+
+        return decorator
+
+    @contextmanager
+    def at_data_version(self, user_id: int, version: int):
+        """
+        Within the block, serve `user_id`'s entries only if they were stored
+        at `version` (users.data_version), and store new ones under it.
+        """
+        token = _data_version.set((user_id, version))
+        try:
+            yield
+        finally:
+            _data_version.reset(token)
+
+    def invalidate(self, conn, user_id: int, scope: str = ALL_SCOPES):
+        """Drop `scope` for `user_id` now, and again at `end_transaction(conn)`."""
+        with self._lock:
+            self._pending.setdefault(id(conn), set()).add((user_id, scope))
+        self._invalidate(user_id, scope)
+
+    def end_transaction(self, conn):
+        """
+        Call once `conn` has committed or rolled back. After a rollback this
+        still matters: reads later in that transaction may have cached rows
+        that never existed for anyone else.
+        """
+        with self._lock:
+            pending = self._pending.pop(id(conn), ())
+        for user_id, scope in pending:
+            self._invalidate(user_id, scope)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def _get(self, entry_key, version: int | None = None) -> tuple[bool, object, int]:
+        self._apply_remote_invalidations()
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self._misses += 1
+                return False, None, self._generation
+            value, deadline, stored_version = entry
+            if deadline <= time.monotonic() or (version is not None and stored_version != version):
+                self._remove(entry_key)
+                self._misses += 1
+                return False, None, self._generation
+            self._entries.move_to_end(entry_key)
+            self._hits += 1
+            return True, _copy(value), self._generation
+
+    def _put(self, entry_key, value, generation: int, version: int | None = None):
+        user_id, scope, _ = entry_key
+        self._apply_remote_invalidations()
+        with self._lock:
+            if generation != self._generation:
+                # Something was invalidated while the query ran; it may be stale.
+                return
+            self._entries[entry_key] = (_copy(value), time.monotonic() + self.ttl_seconds, version)
+            self._entries.move_to_end(entry_key)
+            self._index.setdefault(user_id, {}).setdefault(scope, set()).add(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, entry_key):
+        user_id, scope, _ = entry_key
+        self._entries.pop(entry_key, None)
+        scopes = self._index.get(user_id)
+        if scopes and scope in scopes:
+            scopes[scope].discard(entry_key)
+            if not scopes[scope]:
+                del scopes[scope]
+            if not scopes:
+                del self._index[user_id]
+
+    def _invalidate(self, user_id: int, scope: str):
+        with self._lock:
+            self._drop(user_id, scope)
+            self._invalidations += 1
+        if self.channel:
+            self.channel.publish(f"{user_id}:{scope}")
+
+    def _drop(self, user_id: int, scope: str):
+        self._generation += 1
+        scopes = self._index.get(user_id, {})
+        names = list(scopes) if scope == ALL_SCOPES else [scope]
+        for name in names:
+            for entry_key in list(scopes.get(name, ())):
+                self._remove(entry_key)
+
+    def _apply_remote_invalidations(self):
+        if not self.channel:
+            return
+        lines = self.channel.poll()
+        if lines is None:
+            self.clear()
+            return
+        if lines:
+            with self._lock:
+                for line in lines:
+                    user_id, _, scope = line.partition(":")
+                    self._drop(int(user_id), scope)
+
+
+def _default_channel() -> RevocationChannel | None:
+    path = os.getenv(
+        "READ_CACHE_CHANNEL_PATH",
+        os.path.join(tempfile.gettempdir(), "daily_goal_read_cache_invalidations"),
+    )
+    return RevocationChannel(path) if path else None
+
+
+read_cache = ReadCache(
+    max_entries=int(os.getenv("READ_CACHE_MAX_ENTRIES", "5000")),
+    ttl_seconds=float(os.getenv("READ_CACHE_TTL_SECONDS", "30")),
+    channel=_default_channel(),
+)
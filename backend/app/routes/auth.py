@@ -1,20 +1,30 @@
-from flask import Blueprint, request, jsonify, g, current_app
-from itsdangerous import URLSafeTimedSerializer
-from werkzeug.security import check_password_hash
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import Blueprint, request, jsonify, current_app
 
 from backend.app import crud
+from backend.app.database import get_db
+from backend.app.passwords import password_hasher
+from backend.app.rate_limit import rate_limiter
+from backend.app.access_tokens import (
+    authenticate_access_token,
+    issue_access_token,
+    revoke_access_token,
+)
 
 
 blueprint = Blueprint("auth", __name__, url_prefix="/auth")
 
 
-def _token_serializer() -> URLSafeTimedSerializer:
-    return URLSafeTimedSerializer(current_app.config["ACCESS_TOKEN_SECRET"])
-
-
-def generate_access_token(user_id: int) -> str:
-    serializer = _token_serializer()
-    return serializer.dumps({"user_id": user_id})
+def _is_valid_timezone(name) -> bool:
+    # Goal days are computed with AT TIME ZONE, so only accept IANA names.
+    if not isinstance(name, str):
+        return False
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
 
 
 @blueprint.route("/register", methods=["POST"])
@@ -22,27 +32,30 @@ def register():
     payload = request.get_json(silent=True) or {}
     email = (payload.get("email") or "").strip().lower()
     password = payload.get("password") or ""
+    timezone_name = payload.get("timezone") or "UTC"
 
     if not email or not password:
         return jsonify({"error": "email and password required"}), 400
 
-    existing_user = crud.get_user_by_email(g.db_conn, email)
+    if not _is_valid_timezone(timezone_name):
+        return jsonify({"error": "Unknown timezone"}), 400
+
+    rate_limiter.check("register", ip=request.remote_addr)
+
+    existing_user = crud.get_user_by_email(get_db(), email)
     if existing_user:
         return jsonify({"error": "Email already registered"}), 409
 
-    created_user = crud.create_user(g.db_conn, email, password)
+    created_user = crud.create_user(get_db(), email, password, timezone_name)
 
-    access_token_row = crud.create_access_token(
-        g.db_conn,
-        created_user["id"],
-        ttl_seconds=current_app.config["ACCESS_TOKEN_TTL_SECONDS"],
-    )
-    refresh_token_row = crud.create_refresh_token(g.db_conn, created_user["id"])
+    access_token = issue_access_token(created_user["id"])
+    refresh_token_row = crud.create_refresh_token(get_db(), created_user["id"])
     return jsonify(
         {
             "id": created_user["id"],
             "email": created_user["email"],
-            "access_token": access_token_row["token"],
+            "timezone": created_user["timezone"],
+            "access_token": access_token,
             "refresh_token": refresh_token_row["token"],
             "expires_in": current_app.config["ACCESS_TOKEN_TTL_SECONDS"],
         }
@@ -58,21 +71,19 @@ def login():
     if not email or not password:
         return jsonify({"error": "email and password required"}), 400
 
-    user = crud.verify_user_password(g.db_conn, email, password)
+    rate_limiter.check("login", ip=request.remote_addr, email=email)
+
+    user = crud.verify_user_password(get_db(), email, password)
     if not user:
         return jsonify({"error": "Invalid email or password"}), 401
 
-    access_token_row = crud.create_access_token(
-        g.db_conn,
-        user["id"],
-        ttl_seconds=current_app.config["ACCESS_TOKEN_TTL_SECONDS"],
-    )
-    refresh_token_row = crud.create_refresh_token(g.db_conn, user["id"])
+    access_token = issue_access_token(user["id"])
+    refresh_token_row = crud.create_refresh_token(get_db(), user["id"])
     return jsonify(
         {
             "id": user["id"],
             "email": user["email"],
-            "access_token": access_token_row["token"],
+            "access_token": access_token,
             "refresh_token": refresh_token_row["token"],
             "expires_in": current_app.config["ACCESS_TOKEN_TTL_SECONDS"],
         }
@@ -87,18 +98,14 @@ def refresh():
     if not provided_refresh_token:
         return jsonify({"error": "refresh_token required"}), 400
 
-    refresh_result = crud.use_refresh_token(g.db_conn, provided_refresh_token)
+    refresh_result = crud.use_refresh_token(get_db(), provided_refresh_token)
     if not refresh_result:
         return jsonify({"error": "Invalid or expired refresh token"}), 401
 
-    access_token_row = crud.create_access_token(
-        g.db_conn,
-        refresh_result["user_id"],
-        ttl_seconds=current_app.config["ACCESS_TOKEN_TTL_SECONDS"],
-    )
+    access_token = issue_access_token(refresh_result["user_id"])
     return jsonify(
         {
-            "access_token": access_token_row["token"],
+            "access_token": access_token,
             "refresh_token": refresh_result["refresh_token"],
             "expires_at": refresh_result["expires_at"],
         }
@@ -119,16 +126,13 @@ def logout():
         provided_access_token = authorization_header.removeprefix("Bearer ").strip()
 
     refresh_was_revoked = crud.revoke_refresh_token_by_token(
-        g.db_conn,
+        get_db(),
         provided_refresh_token,
     )
 
     access_was_revoked = False
     if provided_access_token:
-        access_was_revoked = crud.revoke_access_token_by_token(
-            g.db_conn,
-            provided_access_token,
-        )
+        access_was_revoked = revoke_access_token(provided_access_token)
 
     # Don't fail logout if tokens are already expired/revoked/missing in DB.
     return jsonify(
@@ -147,12 +151,8 @@ def change_password():
         return jsonify({"error": "Missing or invalid Authorization header"}), 401
 
     access_token_value = authorization_header.removeprefix("Bearer ").strip()
-    token_row = crud.slide_access_token(
-        g.db_conn,
-        access_token_value,
-        current_app.config["ACCESS_TOKEN_TTL_SECONDS"],
-    )
-    if not token_row:
+    user_id = authenticate_access_token(access_token_value)
+    if user_id is None:
         return jsonify({"error": "Invalid or expired token"}), 401
 
     payload = request.get_json(silent=True) or {}
@@ -162,9 +162,9 @@ def change_password():
     if not current_password or not new_password:
         return jsonify({"error": "current_password and new_password are required"}), 400
 
-    user = crud.get_user_by_id(g.db_conn, token_row["user_id"])
-    if not user or not check_password_hash(user["password_hash"], current_password):
+    user = crud.get_user_by_id(get_db(), user_id)
+    if not user or not password_hasher.verify(user["password_hash"], current_password):
         return jsonify({"error": "Current password is incorrect"}), 401
 
-    crud.update_password(g.db_conn, token_row["user_id"], new_password)
+    crud.update_password(get_db(), user_id, new_password)
     return jsonify({"status": "password_changed"}), 200
@@ -0,0 +1,58 @@
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
+
+from backend.app import bulk
+from backend.app.database import get_db
+from backend.app.streaming import NDJSON_MIMETYPE
+
+
+blueprint = Blueprint("bulk", __name__, url_prefix="/projects")
+
+_MIMETYPES = {"csv": "text/csv", "ndjson": NDJSON_MIMETYPE}
+
+
+def _requested_format(default: str = "csv") -> str | None:
+    """`?format=`, else the Accept header on export and the body's Content-Type on import."""
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt if fmt in bulk.FORMATS else None
+    if request.method == "GET":
+        mimetype = request.accept_mimetypes.best_match([_MIMETYPES[default], NDJSON_MIMETYPE])
+    else:
+        mimetype = request.mimetype
+    if mimetype == NDJSON_MIMETYPE:
+        return "ndjson"
+    return default
+
+
+@blueprint.route("/export", methods=["GET"])
+def export_goal_history():
+    fmt = _requested_format()
+    if not fmt:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    chunks = bulk.stream_goal_history(get_db(), g.user_id, fmt)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=_MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="daily-goals.{fmt}"'},
+    )
+
+
+@blueprint.route("/import", methods=["POST"])
+def import_goal_history():
+    fmt = _requested_format()
+    if not fmt:
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    report = bulk.import_goal_history(
+        get_db(),
+        g.user_id,
+        bulk.read_records(request.stream, fmt),
+        chunk_size=current_app.config["IMPORT_CHUNK_SIZE"],
+        max_rows=current_app.config["IMPORT_MAX_ROWS"],
+    )
+
+    report["dry_run"] = request.args.get("dry_run") in ("1", "true")
+    if report["dry_run"]:
+        get_db().rollback()
+    return jsonify(report), 200
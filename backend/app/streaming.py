@@ -0,0 +1,69 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def wants_stream() -> bool:
+    """`?stream=1` for a chunked JSON array, `Accept: application/x-ndjson` for NDJSON."""
+    if request.args.get("stream") in ("1", "true"):
+        return True
+    return wants_ndjson()
+
+
+def wants_ndjson() -> bool:
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_rows(rows, rows_per_chunk: int = 500) -> Response:
+    """
+    Stream an iterable of rows as a JSON array (or NDJSON) without holding
+    the full result in memory. The request context (and so the pooled DB
+    connection behind a server-side cursor) stays open until the last chunk.
+    """
+    dumps = current_app.json.dumps
+    ndjson = wants_ndjson()
+
+    def generate():
+        buffer = []
+        first = True
+        if not ndjson:
+            yield "["
+        for row in rows:
+            if ndjson:
+                buffer.append(dumps(row) + "\n")
+            else:
+                buffer.append(dumps(row) if first else "," + dumps(row))
+                first = False
+            if len(buffer) >= rows_per_chunk:
+                yield "".join(buffer)
+                buffer.clear()
+        if buffer:
+            yield "".join(buffer)
+        if not ndjson:
+            yield "]"
+
+    mimetype = NDJSON_MIMETYPE if ndjson else "application/json"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def release_after_stream(chunks, release):
+    """
+    Yield `chunks`, then call `release(exception)` -- with None if the body
+    was sent in full. A streamed body is generated after the request's
+    teardown, so whatever it reads from (the pooled DB connection behind a
+    server-side cursor) is handed back here rather than there.
+    """
+    exception = None
+    try:
+        yield from chunks
+    except BaseException as exc:
+        exception = exc
+        raise
+    finally:
+        try:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+        finally:
+            release(exception)
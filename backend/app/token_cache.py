@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def _token_key(token: str) -> str:
+    # Never keep raw bearer tokens in memory maps or on disk.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationChannel:
+    """
+    Append-only file of revoked token keys, shared by worker processes on one host.
+
+    `publish` appends a line; `poll` returns lines appended since the last poll
+    (a single `os.stat` when nothing changed). When the file is rotated or
+    removed the reader has lost track and `poll` returns None, so the caller
+    should drop everything it has cached.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = None
+
+    def publish(self, key: str):
+        with open(self.path, "ab") as f:
+            f.write(f"{key}\n".encode())
+            size = f.tell()
+        if size > self.max_bytes:
+            self._rotate()
+
+    def poll(self) -> list[str] | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+
+        with self._lock:
+            inode = (st.st_dev, st.st_ino) if st else None
+            size = st.st_size if st else 0
+
+            if self._offset is None:
+                # First poll: only revocations from now on matter.
+                self._inode, self._offset = inode, size
+                return []
+            if inode != self._inode or size < self._offset:
+                self._inode, self._offset = inode, size
+                return None
+            if size == self._offset:
+                return []
+
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(size - self._offset)
+            # Leave a partially written trailing line for the next poll.
+            complete = chunk.rfind(b"\n") + 1
+            self._offset += complete
+            return chunk[:complete].decode().split()
+
+    def _rotate(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".")
+        os.close(fd)
+        os.replace(tmp_path, self.path)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of validated access tokens: token -> user_id.
+
+    Each entry carries its own deadline, capped by `ttl_seconds`. Callers pick
+    the lifetime so a hit is only served while the token would not need its
+    expiry slid. `invalidate` evicts locally and, when a channel is
+    configured, in every other worker process on the host.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 60.0,
+        channel: RevocationChannel | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.channel = channel
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> int | None:
+        if not self.enabled:
+            return None
+        self._apply_revocations()
+
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            user_id, valid_until = entry
+            if valid_until <= time.monotonic():
+                del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return user_id
+
+    def put(self, token: str, user_id: int, lifetime_seconds: float):
+        lifetime_seconds = min(lifetime_seconds, self.ttl_seconds)
+        if not self.enabled or lifetime_seconds <= 0:
+            return
+
+        key = _token_key(token)
+        with self._lock:
+            self._entries[key] = (user_id, time.monotonic() + lifetime_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, token: str):
+        key = _token_key(token)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._invalidations += 1
+        if self.channel:
+            self.channel.publish(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    def _apply_revocations(self):
+        if not self.channel:
+            return
+        keys = self.channel.poll()
+        if keys is None:
+            self.clear()
+            return
+        if keys:
+            with self._lock:
+                for key in keys:
+                    self._entries.pop(key, None)
+
+
+def _default_channel() -> RevocationChannel | None:
+    path = os.getenv(
+        "TOKEN_CACHE_CHANNEL_PATH",
+        os.path.join(tempfile.gettempdir(), "daily_goal_token_revocations"),
+    )
+    return RevocationChannel(path) if path else None
+
+
+token_cache = TokenCache(
+    max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60")),
+    channel=_default_channel(),
+)
@@ -0,0 +1,11 @@
+-- Revoked signed access tokens, keyed by the token's jti claim.
+-- Rows are only needed until expires_at; after that the token is rejected anyway.
+
+CREATE TABLE IF NOT EXISTS access_token_denylist (
+    jti        TEXT PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_access_token_denylist_expires_at
+    ON access_token_denylist(expires_at);
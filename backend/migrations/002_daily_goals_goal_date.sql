@@ -0,0 +1,29 @@
+-- Store each goal's calendar day in the owner's timezone so "today" and
+-- history lookups are plain index range scans instead of DATE(created_at)
+-- expression matches.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone TEXT NOT NULL DEFAULT 'UTC';
+
+-- Today's date for a user, in that user's timezone.
+CREATE OR REPLACE FUNCTION user_today(p_user_id INTEGER) RETURNS DATE
+LANGUAGE sql STABLE AS $$
+    SELECT (CURRENT_TIMESTAMP AT TIME ZONE timezone)::date FROM users WHERE id = p_user_id
+$$;
+
+ALTER TABLE daily_goals ADD COLUMN IF NOT EXISTS goal_date DATE;
+
+-- Existing rows keep the day the old unique index assigned them.
+-- On very large tables run this in id-range batches before the NOT NULL step.
+UPDATE daily_goals SET goal_date = DATE(created_at) WHERE goal_date IS NULL;
+
+ALTER TABLE daily_goals ALTER COLUMN goal_date SET NOT NULL;
+
+-- One goal per project per day, and covers the today/history reads
+-- (index-only scans).
+CREATE UNIQUE INDEX IF NOT EXISTS daily_goals_unique_user_project_goal_date
+    ON daily_goals (user_id, project_id, goal_date DESC)
+    INCLUDE (id, goal_text, created_at);
+
+DROP INDEX IF EXISTS daily_goals_unique_user_project_day;
+-- Redundant: user_id is the leading column of the index above.
+DROP INDEX IF EXISTS idx_daily_goals_user_id;
@@ -0,0 +1,10 @@
+-- Keyset pagination for GET /projects (ORDER BY id) and
+-- GET /projects/archived (ORDER BY archived_at DESC, id DESC).
+
+CREATE INDEX IF NOT EXISTS idx_projects_user_active
+    ON projects (user_id, id)
+    WHERE archived_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_projects_user_archived
+    ON projects (user_id, archived_at DESC, id DESC)
+    WHERE archived_at IS NOT NULL;
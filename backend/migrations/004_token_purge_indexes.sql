@@ -0,0 +1,16 @@
+-- Let the token purge (python -m backend.app.maintenance purge-tokens) find
+-- expired and revoked rows without scanning the whole table.
+
+CREATE INDEX IF NOT EXISTS idx_access_tokens_expires_at
+    ON access_tokens (expires_at);
+
+CREATE INDEX IF NOT EXISTS idx_access_tokens_revoked_at
+    ON access_tokens (revoked_at)
+    WHERE revoked_at IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires_at
+    ON refresh_tokens (expires_at);
+
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_revoked_at
+    ON refresh_tokens (revoked_at)
+    WHERE revoked_at IS NOT NULL;
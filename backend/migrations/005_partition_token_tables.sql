@@ -0,0 +1,119 @@
+-- Range-partition access_tokens and refresh_tokens by created_at, one
+-- partition per day, so retention is a partition drop instead of a large
+-- DELETE. created_at never changes, so sliding an access token never moves
+-- its row between partitions.
+--
+-- Unique constraints on a partitioned table must include the partition key,
+-- hence PRIMARY KEY (id, created_at) and UNIQUE (token, created_at).
+-- Rows from before this migration go to a *_legacy partition, which
+-- `make token-partitions` drops once everything in it has expired.
+
+BEGIN;
+
+-- Create the daily partitions of a token table for today through
+-- today + p_days_ahead. Returns the names of the partitions it created.
+CREATE OR REPLACE FUNCTION create_token_partitions(p_table TEXT, p_days_ahead INTEGER)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+BEGIN
+    FOR day IN
+        SELECT generate_series(CURRENT_DATE, CURRENT_DATE + p_days_ahead, INTERVAL '1 day')::date
+    LOOP
+        partition_name := p_table || '_p' || to_char(day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, p_table, day::timestamp, (day + 1)::timestamp
+            );
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END
+$$;
+
+-- access_tokens
+
+ALTER TABLE access_tokens RENAME TO access_tokens_unpartitioned;
+ALTER TABLE access_tokens_unpartitioned DROP CONSTRAINT access_tokens_pkey;
+ALTER TABLE access_tokens_unpartitioned DROP CONSTRAINT access_tokens_token_key;
+ALTER TABLE access_tokens_unpartitioned DROP CONSTRAINT access_tokens_user_id_fkey;
+DROP INDEX IF EXISTS idx_access_tokens_user_id;
+DROP INDEX IF EXISTS idx_access_tokens_token;
+DROP INDEX IF EXISTS idx_access_tokens_expires_at;
+DROP INDEX IF EXISTS idx_access_tokens_revoked_at;
+
+CREATE TABLE access_tokens (
+    id         INTEGER NOT NULL DEFAULT nextval('access_tokens_id_seq'),
+    user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token      TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    revoked_at TIMESTAMP NULL,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (token, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE access_tokens_id_seq OWNED BY access_tokens.id;
+
+CREATE INDEX idx_access_tokens_user_id ON access_tokens(user_id);
+CREATE INDEX idx_access_tokens_expires_at ON access_tokens(expires_at);
+CREATE INDEX idx_access_tokens_revoked_at
+    ON access_tokens(revoked_at)
+    WHERE revoked_at IS NOT NULL;
+
+CREATE TABLE access_tokens_legacy PARTITION OF access_tokens
+    FOR VALUES FROM (MINVALUE) TO (CURRENT_DATE);
+CREATE TABLE access_tokens_default PARTITION OF access_tokens DEFAULT;
+SELECT create_token_partitions('access_tokens', 7);
+
+INSERT INTO access_tokens (id, user_id, token, created_at, expires_at, revoked_at)
+SELECT id, user_id, token, created_at, expires_at, revoked_at
+FROM access_tokens_unpartitioned;
+
+DROP TABLE access_tokens_unpartitioned;
+
+-- refresh_tokens
+
+ALTER TABLE refresh_tokens RENAME TO refresh_tokens_unpartitioned;
+ALTER TABLE refresh_tokens_unpartitioned DROP CONSTRAINT refresh_tokens_pkey;
+ALTER TABLE refresh_tokens_unpartitioned DROP CONSTRAINT refresh_tokens_token_key;
+ALTER TABLE refresh_tokens_unpartitioned DROP CONSTRAINT refresh_tokens_user_id_fkey;
+DROP INDEX IF EXISTS idx_refresh_tokens_user_id;
+DROP INDEX IF EXISTS idx_refresh_tokens_token;
+DROP INDEX IF EXISTS idx_refresh_tokens_expires_at;
+DROP INDEX IF EXISTS idx_refresh_tokens_revoked_at;
+
+CREATE TABLE refresh_tokens (
+    id         INTEGER NOT NULL DEFAULT nextval('refresh_tokens_id_seq'),
+    user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token      TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    revoked_at TIMESTAMP NULL,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (token, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE refresh_tokens_id_seq OWNED BY refresh_tokens.id;
+
+CREATE INDEX idx_refresh_tokens_user_id ON refresh_tokens(user_id);
+CREATE INDEX idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+CREATE INDEX idx_refresh_tokens_revoked_at
+    ON refresh_tokens(revoked_at)
+    WHERE revoked_at IS NOT NULL;
+
+CREATE TABLE refresh_tokens_legacy PARTITION OF refresh_tokens
+    FOR VALUES FROM (MINVALUE) TO (CURRENT_DATE);
+CREATE TABLE refresh_tokens_default PARTITION OF refresh_tokens DEFAULT;
+SELECT create_token_partitions('refresh_tokens', 7);
+
+INSERT INTO refresh_tokens (id, user_id, token, created_at, expires_at, revoked_at)
+SELECT id, user_id, token, created_at, expires_at, revoked_at
+FROM refresh_tokens_unpartitioned;
+
+DROP TABLE refresh_tokens_unpartitioned;
+
+COMMIT;
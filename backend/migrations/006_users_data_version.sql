@@ -0,0 +1,5 @@
+-- Per-user version stamp, bumped in the same statement as every project or
+-- goal write. GET endpoints expose it as an ETag and answer If-None-Match
+-- with 304 without running the list queries.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,8 @@
+-- A project belongs to one user, so (user_id, project_id) is far more
+-- selective on paper than in fact: without this the planner estimates a
+-- couple of goals per project instead of its whole history.
+
+CREATE STATISTICS IF NOT EXISTS daily_goals_user_project (dependencies)
+    ON user_id, project_id FROM daily_goals;
+
+ANALYZE daily_goals;
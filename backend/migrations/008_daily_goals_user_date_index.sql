@@ -0,0 +1,7 @@
+-- Today's goals of one user (GET /today, the Today page). The unique index
+-- leads with project_id after user_id, so for a user with many projects the
+-- lookup walked every goal the user ever set; this one reads only the day's.
+
+CREATE INDEX IF NOT EXISTS idx_daily_goals_user_date
+    ON daily_goals (user_id, goal_date, project_id)
+    INCLUDE (id, goal_text, created_at);
@@ -0,0 +1,20 @@
+-- goal_text is unbounded TEXT: carried in an index INCLUDE list, a long
+-- goal (about 2.7 KB of incompressible text) overflows the btree row limit
+-- and its insert fails. Rebuild both goal indexes without it; reads fetch
+-- goal_text from the heap, still by index scan.
+-- On a busy table, build the new indexes with CREATE INDEX CONCURRENTLY
+-- (outside a transaction) before swapping them in.
+
+BEGIN;
+
+DROP INDEX IF EXISTS daily_goals_unique_user_project_goal_date;
+CREATE UNIQUE INDEX daily_goals_unique_user_project_goal_date
+    ON daily_goals (user_id, project_id, goal_date DESC)
+    INCLUDE (id, created_at);
+
+DROP INDEX IF EXISTS idx_daily_goals_user_date;
+CREATE INDEX idx_daily_goals_user_date
+    ON daily_goals (user_id, goal_date, project_id)
+    INCLUDE (id, created_at);
+
+COMMIT;
@@ -0,0 +1,62 @@
+-- create_token_partitions() failed for any day that already had rows in the
+-- default partition (the partition job had not run since before that day):
+-- Postgres refuses to create a range partition whose rows sit in the
+-- default. The function now builds such a partition as a plain table,
+-- moves the day's rows out of the default into it and attaches it.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION create_token_partitions(p_table TEXT, p_days_ahead INTEGER)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+    default_partition REGCLASS;
+    has_rows BOOLEAN;
+BEGIN
+    SELECT pg_inherits.inhrelid::regclass INTO default_partition
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass(p_table)
+      AND pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT';
+
+    FOR day IN
+        SELECT generate_series(CURRENT_DATE, CURRENT_DATE + p_days_ahead, INTERVAL '1 day')::date
+    LOOP
+        partition_name := p_table || '_p' || to_char(day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            has_rows := FALSE;
+            IF default_partition IS NOT NULL THEN
+                -- Writes routed to the default wait until the day has its partition.
+                EXECUTE format('LOCK TABLE %s IN EXCLUSIVE MODE', default_partition);
+                EXECUTE format(
+                    'SELECT EXISTS (SELECT 1 FROM %s WHERE created_at >= %L AND created_at < %L)',
+                    default_partition, day::timestamp, (day + 1)::timestamp
+                ) INTO has_rows;
+            END IF;
+
+            IF has_rows THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I)', partition_name, p_table);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    default_partition, day::timestamp, (day + 1)::timestamp, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    p_table, partition_name, day::timestamp, (day + 1)::timestamp
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, p_table, day::timestamp, (day + 1)::timestamp
+                );
+            END IF;
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END
+$$;
+
+COMMIT;
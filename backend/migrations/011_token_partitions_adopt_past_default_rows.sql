@@ -0,0 +1,65 @@
+-- create_token_partitions() only adopted default-partition rows for today
+-- and the days ahead, so rows from a past day that never had a partition
+-- stayed in the default for good: the partition job never drops it, and
+-- only the row-level purge cleared them. The function now gives every day
+-- found in the default its own partition, which the job then drops once
+-- its rows expire.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION create_token_partitions(p_table TEXT, p_days_ahead INTEGER)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+    default_partition REGCLASS;
+    default_days DATE[] := '{}';
+BEGIN
+    SELECT pg_inherits.inhrelid::regclass INTO default_partition
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass(p_table)
+      AND pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT';
+
+    IF default_partition IS NOT NULL THEN
+        -- Writes routed to the default wait until their day has its partition.
+        EXECUTE format('LOCK TABLE %s IN EXCLUSIVE MODE', default_partition);
+        EXECUTE format(
+            'SELECT coalesce(array_agg(DISTINCT created_at::date), ''{}'') FROM %s',
+            default_partition
+        ) INTO default_days;
+    END IF;
+
+    FOR day IN
+        SELECT generate_series(CURRENT_DATE, CURRENT_DATE + p_days_ahead, INTERVAL '1 day')::date
+        UNION
+        SELECT unnest(default_days)
+        ORDER BY 1
+    LOOP
+        partition_name := p_table || '_p' || to_char(day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            IF day = ANY (default_days) THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I)', partition_name, p_table);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    default_partition, day::timestamp, (day + 1)::timestamp, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    p_table, partition_name, day::timestamp, (day + 1)::timestamp
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, p_table, day::timestamp, (day + 1)::timestamp
+                );
+            END IF;
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END
+$$;
+
+COMMIT;
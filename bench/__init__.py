@@ -0,0 +1,5 @@
+"""
+Capacity benchmarks: `bench.seed` fills a database with a synthetic dataset,
+`bench.load` replays a traffic mix against the app and writes a JSON report,
+`bench.report` compares two reports.
+"""
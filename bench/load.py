@@ -0,0 +1,367 @@
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from bench.report import build_report, format_table
+from bench.seed import DEFAULT_PASSWORD, DEFAULT_TAG, bench_email
+
+# Relative weights of the operations each virtual user picks from.
+DEFAULT_MIX = {
+    "today": 50,
+    "upsert": 20,
+    "upsert_batch": 5,
+    "refresh": 10,
+    "login": 5,
+    "archive_restore": 5,
+    "projects": 5,
+}
+
+_GOAL_TEXTS = (
+    "Ship the draft",
+    "Review two pull requests",
+    "Write the test plan",
+    "Clear the inbox",
+    "Pair on the migration",
+)
+
+
+class HttpClient:
+    """Keep-alive JSON client against a running server, one per virtual user."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        connection = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._conn = connection(parts.hostname, parts.port, timeout=timeout)
+        self._prefix = parts.path.rstrip("/")
+
+    def request(self, method: str, path: str, body=None, token: str | None = None):
+        headers = {"Accept": "application/json"}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        try:
+            self._conn.request(method, self._prefix + path, body=data, headers=headers)
+            res = self._conn.getresponse()
+            raw = res.read()
+        except (OSError, http.client.HTTPException):
+            # http.client reconnects on the next request.
+            self._conn.close()
+            raise
+        try:
+            payload = json.loads(raw) if raw else None
+        except ValueError:
+            payload = None
+        return res.status, payload
+
+    def close(self):
+        self._conn.close()
+
+
+class InProcessClient:
+    """Flask test client: no server or network in the way, one process only."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, body=None, token: str | None = None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        res = self._client.open(path, method=method, json=body, headers=headers)
+        return res.status_code, res.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class Recorder:
+    """One thread's samples: seconds per request and status counts, per endpoint."""
+
+    def __init__(self, record_after: float):
+        self.record_after = record_after
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, endpoint: str, started: float, seconds: float, status: int):
+        if started < self.record_after:
+            return
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[status] = counts.get(status, 0) + 1
+
+
+class VirtualUser:
+    """
+    A signed-in user of the app. Each operation is one page load or action
+    of the frontend; endpoints are recorded by route, not by path.
+    """
+
+    def __init__(self, client, email: str, password: str, rng: random.Random, recorder: Recorder):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.recorder = recorder
+        self.access_token = None
+        self.refresh_token = None
+        self.project_ids = []
+
+    def call(self, endpoint: str, method: str, path: str, body=None, auth: bool = True):
+        started = time.perf_counter()
+        try:
+            status, payload = self.client.request(method, path, body, self.access_token if auth else None)
+        except (OSError, http.client.HTTPException):
+            status, payload = 0, None
+        self.recorder.add(endpoint, started, time.perf_counter() - started, status)
+        if auth and status == 401:
+            # Expired or revoked; sign in again before the next operation.
+            self.access_token = None
+        return status, payload
+
+    def login(self):
+        status, body = self.call(
+            "POST /auth/login",
+            "POST",
+            "/auth/login",
+            {"email": self.email, "password": self.password},
+            auth=False,
+        )
+        if status == 200:
+            self.access_token = body["access_token"]
+            self.refresh_token = body["refresh_token"]
+
+    def refresh(self):
+        status, body = self.call(
+            "POST /auth/refresh",
+            "POST",
+            "/auth/refresh",
+            {"refresh_token": self.refresh_token},
+            auth=False,
+        )
+        if status == 200:
+            self.access_token = body["access_token"]
+            self.refresh_token = body["refresh_token"]
+        elif status == 401:
+            self.access_token = None
+
+    def today(self):
+        status, body = self.call("GET /today", "GET", "/today")
+        if status == 200:
+            self.project_ids = [project["id"] for project in body]
+
+    def projects(self):
+        self.call("GET /projects", "GET", "/projects")
+
+    def upsert(self):
+        if not self.project_ids:
+            return self.today()
+        project_id = self.rng.choice(self.project_ids)
+        self.call(
+            "PUT /projects/<id>/goals/today",
+            "PUT",
+            f"/projects/{project_id}/goals/today",
+            {"goal_text": self.rng.choice(_GOAL_TEXTS)},
+        )
+
+    def upsert_batch(self):
+        if not self.project_ids:
+            return self.today()
+        goals = [{"project_id": project_id, "goal_text": self.rng.choice(_GOAL_TEXTS)} for project_id in self.project_ids]
+        self.call("PUT /goals/today", "PUT", "/goals/today", {"goals": goals})
+
+    def archive_restore(self):
+        # Restored straight away so the dataset stays the same size over a run.
+        if not self.project_ids:
+            return self.today()
+        project_id = self.rng.choice(self.project_ids)
+        status, _ = self.call("POST /projects/<id>/archive", "POST", f"/projects/{project_id}/archive")
+        if status == 200:
+            self.call("POST /projects/<id>/restore", "POST", f"/projects/{project_id}/restore")
+
+
+def parse_mix(spec: str) -> dict:
+    """'today=50,upsert=20' -> weights; operations left out get weight 0."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown operation {name!r}; expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    if not any(mix.values()):
+        raise ValueError("mix needs at least one positive weight")
+    return mix
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_load(
+    base_url: str | None = None,
+    clients: int = 10,
+    duration: float = 30.0,
+    warmup: float = 5.0,
+    users: int = 100,
+    tag: str = DEFAULT_TAG,
+    password: str = DEFAULT_PASSWORD,
+    mix: dict | None = None,
+    think_seconds: float = 0.0,
+    random_seed: int = 0,
+) -> dict:
+    """
+    Replay `mix` against the app with `clients` concurrent virtual users for
+    `warmup` + `duration` seconds and return the report of the last
+    `duration` seconds (see bench.report.build_report).
+
+    Clients sign in as the users of a `bench.seed` dataset (`tag`, `users`),
+    round-robin, and run closed-loop: the next operation starts when the
+    last one finishes, after `think_seconds`. With `base_url`, requests go
+    over HTTP to a running server (start it with RATE_LIMIT_ENABLED=0, or
+    logins are throttled); without, they go through the Flask test client in
+    this process, with rate limits off.
+    """
+    mix = dict(mix or DEFAULT_MIX)
+    operations = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in operations]
+
+    app = None
+    rate_limits_were_enabled = None
+    if base_url is None:
+        from backend.app.main import app
+        from backend.app.rate_limit import rate_limiter
+
+        rate_limits_were_enabled = rate_limiter.enabled
+        rate_limiter.enabled = False
+
+    started = time.perf_counter()
+    record_after = started + warmup
+    deadline = record_after + duration
+    recorders = [Recorder(record_after) for _ in range(clients)]
+
+    def run_client(index: int):
+        client = HttpClient(base_url) if base_url else InProcessClient(app)
+        rng = random.Random(random_seed * 1_000_003 + index)
+        user = VirtualUser(client, bench_email(tag, index % users), password, rng, recorders[index])
+        try:
+            while time.perf_counter() < deadline:
+                if user.access_token is None:
+                    user.login()
+                    if user.access_token is None:
+                        # Don't spin on a failing login.
+                        time.sleep(0.1)
+                        continue
+                    user.today()
+                else:
+                    getattr(user, rng.choices(operations, weights)[0])()
+                if think_seconds:
+                    time.sleep(think_seconds)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=run_client, args=(i,), name=f"bench-client-{i}") for i in range(clients)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if rate_limits_were_enabled is not None:
+            rate_limiter.enabled = rate_limits_were_enabled
+    measured = max(0.0, time.perf_counter() - record_after)
+
+    latencies, statuses = {}, {}
+    for recorder in recorders:
+        for endpoint, values in recorder.latencies.items():
+            latencies.setdefault(endpoint, []).extend(values)
+        for endpoint, counts in recorder.statuses.items():
+            merged = statuses.setdefault(endpoint, {})
+            for status, count in counts.items():
+                merged[status] = merged.get(status, 0) + count
+
+    meta = {
+        "commit": _commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": base_url or "in-process",
+        "clients": clients,
+        "duration_seconds": duration,
+        "warmup_seconds": warmup,
+        "measured_seconds": round(measured, 3),
+        "users": users,
+        "tag": tag,
+        "mix": mix,
+        "think_seconds": think_seconds,
+        "python": platform.python_version(),
+    }
+    return build_report(meta, latencies, statuses, measured)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.load")
+    parser.add_argument("--base-url", default=None, help="server to load, e.g. http://127.0.0.1:8000 (default: in-process)")
+    parser.add_argument("--clients", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument("--users", type=int, default=100, help="users in the seeded dataset")
+    parser.add_argument("--tag", default=DEFAULT_TAG, help="tag of the seeded dataset")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument(
+        "--mix",
+        default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+        help="operation weights, e.g. today=50,upsert=20,refresh=10",
+    )
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's operations")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    report = run_load(
+        base_url=args.base_url,
+        clients=args.clients,
+        duration=args.duration,
+        warmup=args.warmup,
+        users=args.users,
+        tag=args.tag,
+        password=args.password,
+        mix=mix,
+        think_seconds=args.think_ms / 1000,
+        random_seed=args.seed,
+    )
+
+    print(format_table(report), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    else:
+        print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import argparse
+import json
+import math
+import sys
+
+# Metrics compared across reports, and whether a higher value is better.
+COMPARED = (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _is_error(status: int) -> bool:
+    # 0: the request never got a response (connection refused/reset, timeout).
+    return status == 0 or status >= 400
+
+
+def summarize_latencies(latencies: list, statuses: dict, seconds: float) -> dict:
+    """Throughput and latency (ms) of one endpoint; `statuses` maps status -> count."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": sum(count for status, count in statuses.items() if _is_error(int(status))),
+        "throughput_rps": round(len(ordered) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def build_report(meta: dict, latencies: dict, statuses: dict, seconds: float) -> dict:
+    """
+    Report of a load run: `latencies` maps endpoint -> seconds per request,
+    `statuses` endpoint -> {status: count}, over `seconds` of measurement.
+    """
+    all_latencies, all_statuses = [], {}
+    for endpoint, values in latencies.items():
+        all_latencies.extend(values)
+        for status, count in statuses.get(endpoint, {}).items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    return {
+        "meta": meta,
+        "totals": summarize_latencies(all_latencies, all_statuses, seconds),
+        "endpoints": {
+            endpoint: summarize_latencies(values, statuses.get(endpoint, {}), seconds)
+            for endpoint, values in sorted(latencies.items())
+        },
+    }
+
+
+def format_table(report: dict) -> str:
+    header = f"{'endpoint':<34} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["totals"])]
+    for endpoint, stats in rows:
+        lines.append(
+            f"{endpoint:<34} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9.1f} "
+            f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def compare(base: dict, new: dict, threshold_pct: float | None = None) -> dict:
+    """
+    Per-endpoint change from `base` to `new` in throughput and percentiles.
+    With `threshold_pct`, any metric that got worse by more than that many
+    percent is listed under `regressions`.
+    """
+    result = {
+        "base": base.get("meta", {}).get("commit"),
+        "new": new.get("meta", {}).get("commit"),
+        "endpoints": {},
+        "regressions": [],
+    }
+    sections = [("TOTAL", base["totals"], new["totals"])] + [
+        (endpoint, stats, new["endpoints"][endpoint])
+        for endpoint, stats in base["endpoints"].items()
+        if endpoint in new["endpoints"]
+    ]
+    for endpoint, before, after in sections:
+        changes = {}
+        for metric, higher_is_better in COMPARED:
+            old, current = before[metric], after[metric]
+            change_pct = round((current - old) / old * 100, 1) if old else None
+            changes[metric] = {"base": old, "new": current, "change_pct": change_pct}
+            worse = change_pct is not None and (-change_pct if higher_is_better else change_pct)
+            if threshold_pct is not None and worse and worse > threshold_pct:
+                result["regressions"].append(f"{endpoint} {metric} {change_pct:+.1f}%")
+        result["endpoints"][endpoint] = changes
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.report", description="compare two load reports")
+    parser.add_argument("base", help="report of the baseline run")
+    parser.add_argument("new", help="report of the run to compare")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="exit 1 if a metric regresses by more than this many percent",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    result = compare(base, new, args.threshold)
+    print(json.dumps(result, indent=2))
+    return 1 if result["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
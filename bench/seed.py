@@ -0,0 +1,326 @@
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from faker import Faker
+
+from backend.app.database import database
+from backend.app.passwords import password_hasher
+
+DEFAULT_TAG = "bench"
+DEFAULT_PASSWORD = "bench-password"
+
+TIMEZONES = ("UTC", "America/New_York", "Europe/Berlin", "Asia/Kolkata", "Asia/Tokyo", "Australia/Sydney")
+
+ACCESS_TOKEN_TTL = timedelta(minutes=15)
+REFRESH_TOKEN_TTL = timedelta(days=30)
+
+# Faker is slow per call; rows draw from pools generated once.
+_POOL_SIZE = 500
+
+
+def bench_email(tag: str, n: int) -> str:
+    """Email of the n-th (0-based) seeded user; the load harness logs in with these."""
+    return f"{tag}-{n:06d}@bench.example.com"
+
+
+def _email_pattern(tag: str) -> str:
+    # A regex rather than LIKE, so tag "bench" doesn't also match "bench-big-000001@...".
+    return "^" + re.escape(tag) + r"-[0-9]+@bench\.example\.com$"
+
+
+class _CopyStream:
+    """
+    Read-only file over an iterator of rows, CSV-encoded on demand, for
+    COPY ... FROM STDIN. Memory stays at one chunk however many rows there are.
+    """
+
+    def __init__(self, rows, chunk_rows: int = 5000):
+        self.rows = 0
+        self._chunks = self._encode(rows, chunk_rows)
+        self._buffer = b""
+        self._offset = 0
+
+    def _encode(self, rows, chunk_rows: int):
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for row in rows:
+            writer.writerow(row)
+            self.rows += 1
+            if self.rows % chunk_rows == 0:
+                yield out.getvalue().encode()
+                out.seek(0)
+                out.truncate()
+        if out.tell():
+            yield out.getvalue().encode()
+
+    def read(self, size: int = -1) -> bytes:
+        if self._offset >= len(self._buffer):
+            self._buffer = next(self._chunks, b"")
+            self._offset = 0
+        if size < 0:
+            size = len(self._buffer)
+        data = self._buffer[self._offset : self._offset + size]
+        self._offset += len(data)
+        return data
+
+
+def _copy(conn, table: str, columns: tuple, rows) -> int:
+    stream = _CopyStream(rows)
+    cur = conn.cursor()
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream, size=1 << 16)
+    cur.close()
+    return stream.rows
+
+
+def delete_dataset(conn, tag: str = DEFAULT_TAG) -> int:
+    """Remove a seeded dataset (tokens cascade with the users). Returns users deleted."""
+    pattern = _email_pattern(tag)
+    cur = conn.cursor()
+    cur.execute(
+        """
+        DELETE FROM daily_goals
+        WHERE user_id IN (SELECT id FROM users WHERE email ~ %s);
+        """,
+        (pattern,),
+    )
+    cur.execute(
+        """
+        DELETE FROM projects
+        WHERE user_id IN (SELECT id FROM users WHERE email ~ %s);
+        """,
+        (pattern,),
+    )
+    cur.execute("DELETE FROM users WHERE email ~ %s;", (pattern,))
+    deleted = cur.rowcount
+    cur.close()
+    return deleted
+
+
+def seed(
+    users: int = 100,
+    projects_per_user: int = 5,
+    years: float = 2.0,
+    goal_density: float = 0.8,
+    archived_fraction: float = 0.2,
+    tokens_per_user: int = 50,
+    token_days: int = 30,
+    tag: str = DEFAULT_TAG,
+    password: str = DEFAULT_PASSWORD,
+    random_seed: int = 0,
+    db=database,
+) -> dict:
+    """
+    Replace the dataset tagged `tag` with a fresh one, loaded with COPY in a
+    single transaction:
+
+    - `users` users, emails from `bench_email`, all sharing `password`
+      (hashed once with the app's hasher, so logins cost what they do in prod);
+    - `projects_per_user` projects each, `archived_fraction` of them archived
+      part-way through their history;
+    - a goal on `goal_density` of the days of the last `years` years, per
+      project, up to yesterday (the load run writes today's);
+    - `tokens_per_user` access and refresh token rows each, created over the
+      last `token_days` days and mostly expired, as the purge job would find them.
+
+    The same `random_seed` gives the same dataset. Returns row counts and
+    seconds per table.
+    """
+    started = time.monotonic()
+    rng = random.Random(random_seed)
+    fake = Faker()
+    fake.seed_instance(random_seed)
+    project_names = [fake.catch_phrase() for _ in range(_POOL_SIZE)]
+    sentences = [fake.sentence(nb_words=8) for _ in range(_POOL_SIZE)]
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    today = now.date()
+    span = timedelta(days=max(1, round(years * 365)))
+    report = {"tag": tag, "seconds": {}}
+
+    def timed(phase: str, fn):
+        phase_started = time.monotonic()
+        result = fn()
+        report["seconds"][phase] = round(time.monotonic() - phase_started, 3)
+        return result
+
+    conn = db.get_connection()
+    discard = False
+    try:
+        report["deleted_users"] = timed("delete", lambda: delete_dataset(conn, tag))
+
+        password_hash = password_hasher.hash(password)
+        report["users"] = timed(
+            "users",
+            lambda: _copy(
+                conn,
+                "users",
+                ("email", "password_hash", "timezone", "created_at"),
+                (
+                    (bench_email(tag, n), password_hash, rng.choice(TIMEZONES), (now - span).isoformat())
+                    for n in range(users)
+                ),
+            ),
+        )
+
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM users WHERE email ~ %s ORDER BY id;", (_email_pattern(tag),))
+        user_ids = [row["id"] for row in cur.fetchall()]
+        cur.close()
+
+        def project_rows():
+            for user_id in user_ids:
+                for _ in range(projects_per_user):
+                    created_at = now - span - timedelta(days=rng.randint(0, 30), seconds=rng.randint(0, 86399))
+                    archived_at = None
+                    if rng.random() < archived_fraction:
+                        archived_at = created_at + (now - created_at) * rng.uniform(0.2, 0.95)
+                    yield (
+                        user_id,
+                        rng.choice(project_names),
+                        rng.choice(sentences) if rng.random() < 0.5 else None,
+                        created_at.isoformat(),
+                        archived_at.replace(microsecond=0).isoformat() if archived_at else None,
+                    )
+
+        report["projects"] = timed(
+            "projects",
+            lambda: _copy(
+                conn,
+                "projects",
+                ("user_id", "name", "description", "created_at", "archived_at"),
+                project_rows(),
+            ),
+        )
+
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT id, user_id, created_at, archived_at
+            FROM projects
+            WHERE user_id = ANY(%s)
+            ORDER BY id;
+            """,
+            (user_ids,),
+        )
+        projects = cur.fetchall()
+        cur.close()
+        report["archived_projects"] = sum(1 for p in projects if p["archived_at"] is not None)
+
+        def goal_rows():
+            # Dates and times as strings up front: formatting per row dominated the run.
+            first_day = today - span
+            days = [(first_day + timedelta(days=n)).isoformat() for n in range(span.days)]
+            times = [f"{rng.randint(6, 21):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}" for _ in range(_POOL_SIZE)]
+            for project in projects:
+                project_id, user_id = project["id"], project["user_id"]
+                start = max(0, (project["created_at"].date() - first_day).days)
+                stop = ((project["archived_at"] or now).date() - first_day).days
+                for day in days[start:stop]:
+                    if rng.random() < goal_density:
+                        yield (project_id, user_id, rng.choice(sentences), day, f"{day} {rng.choice(times)}")
+
+        report["daily_goals"] = timed(
+            "daily_goals",
+            lambda: _copy(
+                conn,
+                "daily_goals",
+                ("project_id", "user_id", "goal_text", "goal_date", "created_at"),
+                goal_rows(),
+            ),
+        )
+
+        def token_rows(ttl: timedelta, revoked_fraction: float):
+            window = token_days * 86400
+            for user_id in user_ids:
+                for _ in range(tokens_per_user):
+                    created_at = now - timedelta(seconds=rng.randint(0, window))
+                    revoked_at = None
+                    if rng.random() < revoked_fraction:
+                        revoked_at = (created_at + ttl * rng.random()).replace(microsecond=0)
+                    yield (
+                        user_id,
+                        uuid.UUID(int=rng.getrandbits(128)).hex,
+                        created_at.isoformat(),
+                        (created_at + ttl).isoformat(),
+                        revoked_at.isoformat() if revoked_at and revoked_at < now else None,
+                    )
+
+        token_columns = ("user_id", "token", "created_at", "expires_at", "revoked_at")
+        report["access_tokens"] = timed(
+            "access_tokens",
+            lambda: _copy(conn, "access_tokens", token_columns, token_rows(ACCESS_TOKEN_TTL, 0.05)),
+        )
+        report["refresh_tokens"] = timed(
+            "refresh_tokens",
+            lambda: _copy(conn, "refresh_tokens", token_columns, token_rows(REFRESH_TOKEN_TTL, 0.3)),
+        )
+
+        def analyze():
+            cur = conn.cursor()
+            cur.execute("ANALYZE users, projects, daily_goals, access_tokens, refresh_tokens;")
+            cur.close()
+            conn.commit()
+
+        timed("commit", analyze)
+    except Exception:
+        discard = True
+        conn.rollback()
+        raise
+    finally:
+        db.release_connection(conn, discard=discard)
+
+    report["seconds"]["total"] = round(time.monotonic() - started, 3)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.seed")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--projects", type=int, default=5, help="projects per user")
+    parser.add_argument("--years", type=float, default=2.0, help="years of daily goal history")
+    parser.add_argument("--goal-density", type=float, default=0.8, help="share of days with a goal")
+    parser.add_argument("--archived", type=float, default=0.2, help="share of projects archived")
+    parser.add_argument("--tokens", type=int, default=50, help="access and refresh token rows per user")
+    parser.add_argument("--token-days", type=int, default=30, help="days the token rows are spread over")
+    parser.add_argument("--tag", default=DEFAULT_TAG, help="dataset name; users are <tag>-NNNNNN@bench.example.com")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--delete", action="store_true", help="only remove the tagged dataset")
+    args = parser.parse_args(argv)
+
+    if args.delete:
+        conn = database.get_connection()
+        try:
+            report = {"tag": args.tag, "deleted_users": delete_dataset(conn, args.tag)}
+            conn.commit()
+        finally:
+            database.release_connection(conn)
+        print(json.dumps(report))
+        return 0
+
+    report = seed(
+        users=args.users,
+        projects_per_user=args.projects,
+        years=args.years,
+        goal_density=args.goal_density,
+        archived_fraction=args.archived,
+        tokens_per_user=args.tokens,
+        token_days=args.token_days,
+        tag=args.tag,
+        password=args.password,
+        random_seed=args.seed,
+    )
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,17 @@ CREATE TABLE IF NOT EXISTS users (
     id            SERIAL PRIMARY KEY,
     email         TEXT UNIQUE NOT NULL,
     password_hash TEXT NOT NULL,
+    timezone      TEXT NOT NULL DEFAULT 'UTC',
+    data_version  BIGINT NOT NULL DEFAULT 0,  -- bumped on project/goal writes (ETags)
     created_at    TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Today's date for a user, in that user's timezone.
+CREATE OR REPLACE FUNCTION user_today(p_user_id INTEGER) RETURNS DATE
+LANGUAGE sql STABLE AS $$
+    SELECT (CURRENT_TIMESTAMP AT TIME ZONE timezone)::date FROM users WHERE id = p_user_id
+$$;
+
 CREATE TABLE IF NOT EXISTS projects (
     id          SERIAL PRIMARY KEY,
     user_id     INTEGER NOT NULL REFERENCES users(id),
@@ -19,39 +27,145 @@ CREATE TABLE IF NOT EXISTS projects (
 
 CREATE INDEX IF NOT EXISTS idx_projects_user_id ON projects(user_id);
 
+-- Keyset pagination for the active and archived project lists.
+CREATE INDEX IF NOT EXISTS idx_projects_user_active
+    ON projects (user_id, id)
+    WHERE archived_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_projects_user_archived
+    ON projects (user_id, archived_at DESC, id DESC)
+    WHERE archived_at IS NOT NULL;
+
 CREATE TABLE IF NOT EXISTS daily_goals (
     id         SERIAL PRIMARY KEY,
     project_id INTEGER NOT NULL REFERENCES projects(id),
     user_id    INTEGER NOT NULL REFERENCES users(id),
     goal_text  TEXT NOT NULL,
+    goal_date  DATE NOT NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE UNIQUE INDEX IF NOT EXISTS daily_goals_unique_user_project_day
-    ON daily_goals (user_id, project_id, (DATE(created_at)));
+-- One goal per project per day; also covers the per-project reads.
+-- goal_text stays out of INCLUDE: unbounded, it could overflow the btree row.
+CREATE UNIQUE INDEX IF NOT EXISTS daily_goals_unique_user_project_goal_date
+    ON daily_goals (user_id, project_id, goal_date DESC)
+    INCLUDE (id, created_at);
+
+-- A user's goals for one day, in project order (the Today page).
+CREATE INDEX IF NOT EXISTS idx_daily_goals_user_date
+    ON daily_goals (user_id, goal_date, project_id)
+    INCLUDE (id, created_at);
+
+-- project_id determines user_id; keeps per-project row estimates honest.
+CREATE STATISTICS IF NOT EXISTS daily_goals_user_project (dependencies)
+    ON user_id, project_id FROM daily_goals;
 
-CREATE INDEX IF NOT EXISTS idx_daily_goals_user_id ON daily_goals(user_id);
+-- Create the daily partitions of a token table for today through
+-- today + p_days_ahead. Returns the names of the partitions it created.
+-- Any day whose rows already sit in the default partition (the job did not
+-- run in time), past days included, gets a partition and its rows moved in.
+CREATE OR REPLACE FUNCTION create_token_partitions(p_table TEXT, p_days_ahead INTEGER)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    day DATE;
+    partition_name TEXT;
+    default_partition REGCLASS;
+    default_days DATE[] := '{}';
+BEGIN
+    SELECT pg_inherits.inhrelid::regclass INTO default_partition
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass(p_table)
+      AND pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT';
 
+    IF default_partition IS NOT NULL THEN
+        -- Writes routed to the default wait until their day has its partition.
+        EXECUTE format('LOCK TABLE %s IN EXCLUSIVE MODE', default_partition);
+        EXECUTE format(
+            'SELECT coalesce(array_agg(DISTINCT created_at::date), ''{}'') FROM %s',
+            default_partition
+        ) INTO default_days;
+    END IF;
+
+    FOR day IN
+        SELECT generate_series(CURRENT_DATE, CURRENT_DATE + p_days_ahead, INTERVAL '1 day')::date
+        UNION
+        SELECT unnest(default_days)
+        ORDER BY 1
+    LOOP
+        partition_name := p_table || '_p' || to_char(day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            IF day = ANY (default_days) THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I)', partition_name, p_table);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE created_at >= %L AND created_at < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    default_partition, day::timestamp, (day + 1)::timestamp, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    p_table, partition_name, day::timestamp, (day + 1)::timestamp
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, p_table, day::timestamp, (day + 1)::timestamp
+                );
+            END IF;
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END
+$$;
+
+-- Token tables are range-partitioned by created_at, one partition per day;
+-- `make token-partitions` creates upcoming days and drops expired ones.
 CREATE TABLE IF NOT EXISTS refresh_tokens (
-    id         SERIAL PRIMARY KEY,
+    id         SERIAL,
     user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-    token      TEXT NOT NULL UNIQUE,
+    token      TEXT NOT NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP NOT NULL,
-    revoked_at TIMESTAMP NULL
-);
+    revoked_at TIMESTAMP NULL,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (token, created_at)
+) PARTITION BY RANGE (created_at);
 
 CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_id ON refresh_tokens(user_id);
-CREATE INDEX IF NOT EXISTS idx_refresh_tokens_token   ON refresh_tokens(token);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires_at ON refresh_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_revoked_at
+    ON refresh_tokens(revoked_at)
+    WHERE revoked_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS refresh_tokens_default PARTITION OF refresh_tokens DEFAULT;
+SELECT create_token_partitions('refresh_tokens', 7);
 
 CREATE TABLE IF NOT EXISTS access_tokens (
-    id         SERIAL PRIMARY KEY,
+    id         SERIAL,
     user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-    token      TEXT NOT NULL UNIQUE,
+    token      TEXT NOT NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP NOT NULL,
-    revoked_at TIMESTAMP NULL
-);
+    revoked_at TIMESTAMP NULL,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (token, created_at)
+) PARTITION BY RANGE (created_at);
 
 CREATE INDEX IF NOT EXISTS idx_access_tokens_user_id ON access_tokens(user_id);
-CREATE INDEX IF NOT EXISTS idx_access_tokens_token   ON access_tokens(token);
+CREATE INDEX IF NOT EXISTS idx_access_tokens_expires_at ON access_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_access_tokens_revoked_at
+    ON access_tokens(revoked_at)
+    WHERE revoked_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS access_tokens_default PARTITION OF access_tokens DEFAULT;
+SELECT create_token_partitions('access_tokens', 7);
+
+CREATE TABLE IF NOT EXISTS access_token_denylist (
+    jti        TEXT PRIMARY KEY,
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_access_token_denylist_expires_at
+    ON access_token_denylist(expires_at);
@@ -2,9 +2,11 @@ import { apiFetch } from './client';
 import type { AuthResponse } from '../types';
 
 export function register(email: string, password: string) {
+  // The backend decides which calendar day a goal belongs to in this timezone
+  const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
   return apiFetch<AuthResponse>('/auth/register', {
     method: 'POST',
-    body: JSON.stringify({ email, password }),
+    body: JSON.stringify({ email, password, timezone }),
   });
 }
 
@@ -1,9 +1,9 @@
 const BASE_URL = import.meta.env.VITE_API_URL ?? '';
 
-export async function apiFetch<T>(
+async function request<T>(
   path: string,
   options: RequestInit = {}
-): Promise<T> {
+): Promise<{ data: T; res: Response }> {
   const token = localStorage.getItem('access_token');
 
   const headers: Record<string, string> = {
@@ -37,5 +37,38 @@ export async function apiFetch<T>(
     throw new Error(data?.error ?? `Request failed (${res.status})`);
   }
 
-  return data as T;
+  return { data: data as T, res };
+}
+
+export async function apiFetch<T>(
+  path: string,
+  options: RequestInit = {}
+): Promise<T> {
+  const { data } = await request<T>(path, options);
+  return data;
+}
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// List endpoints are keyset-paginated; the next page's cursor comes back in X-Next-Cursor
+export async function apiFetchPage<T>(path: string, cursor?: string | null): Promise<Page<T>> {
+  const url = cursor
+    ? `${path}${path.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}`
+    : path;
+  const { data, res } = await request<T[]>(url);
+  return { items: data, nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
+export async function apiFetchAll<T>(path: string): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const page: Page<T> = await apiFetchPage<T>(path, cursor);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return items;
 }
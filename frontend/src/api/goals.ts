@@ -1,5 +1,9 @@
-import { apiFetch } from './client';
-import type { DailyGoal } from '../types';
+import { apiFetch, apiFetchPage } from './client';
+import type { DailyGoal, GoalUpsertResult, ProjectWithTodayGoal } from '../types';
+
+export function getToday() {
+  return apiFetch<ProjectWithTodayGoal[]>('/today');
+}
 
 export function getTodaysGoal(projectId: number) {
   return apiFetch<DailyGoal>(`/projects/${projectId}/goals/today`);
@@ -12,6 +16,15 @@ export function upsertTodaysGoal(projectId: number, goalText: string) {
   });
 }
 
-export function getGoals(projectId: number) {
-  return apiFetch<DailyGoal[]>(`/projects/${projectId}/goals`);
+// Set today's goal for several projects in one request
+export function upsertTodaysGoals(goals: { project_id: number; goal_text: string }[]) {
+  return apiFetch<{ results: GoalUpsertResult[] }>('/goals/today', {
+    method: 'PUT',
+    body: JSON.stringify({ goals }),
+  });
+}
+
+// Newest first; pass the previous page's nextCursor to load older goals
+export function getGoals(projectId: number, cursor?: string | null) {
+  return apiFetchPage<DailyGoal>(`/projects/${projectId}/goals`, cursor);
 }
@@ -1,8 +1,8 @@
-import { apiFetch } from './client';
+import { apiFetch, apiFetchAll } from './client';
 import type { Project } from '../types';
 
 export function getProjects() {
-  return apiFetch<Project[]>('/projects');
+  return apiFetchAll<Project>('/projects');
 }
 
 export function getProject(id: number) {
@@ -25,5 +25,5 @@ export function restoreProject(id: number) {
 }
 
 export function getArchivedProjects() {
-  return apiFetch<Project[]>('/projects/archived');
+  return apiFetchAll<Project>('/projects/archived');
 }
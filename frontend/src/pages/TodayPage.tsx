@@ -1,7 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getProjects } from '../api/projects';
-import { getTodaysGoal, upsertTodaysGoal } from '../api/goals';
+import { getToday, upsertTodaysGoals } from '../api/goals';
 import { logout } from '../api/auth';
 import { useToast } from '../components/ToastProvider';
 import type { Project, DailyGoal } from '../types';
@@ -17,10 +16,10 @@ export default function TodayPage({ onLogout }: Props) {
   const [loading, setLoading] = useState(true);
   const { showToast } = useToast();
 
-  const [editingId, setEditingId] = useState<number | null>(null);
-  const [editText, setEditText] = useState('');
-  const [savingId, setSavingId] = useState<number | null>(null);
-  const [savedId, setSavedId] = useState<number | null>(null);
+  // Open editors, keyed by project id; several can be open and saved together
+  const [drafts, setDrafts] = useState<Record<number, string>>({});
+  const [savingIds, setSavingIds] = useState<number[]>([]);
+  const [savedIds, setSavedIds] = useState<number[]>([]);
 
   const navigate = useNavigate();
 
@@ -36,16 +35,12 @@ export default function TodayPage({ onLogout }: Props) {
 
   async function loadAll() {
     try {
-      const projects = await getProjects();
+      // One request for every project + its goal, instead of one per project
+      const projects = await getToday();
 
-      // allSettled so a 404 (no goal yet) doesn't abort the rest
-      const goalResults = await Promise.allSettled(
-        projects.map((p) => getTodaysGoal(p.id))
-      );
-
-      const combined: ProjectWithGoal[] = projects.map((project, i) => ({
+      const combined: ProjectWithGoal[] = projects.map(({ today_goal, ...project }) => ({
         ...project,
-        todayGoal: goalResults[i].status === 'fulfilled' ? goalResults[i].value : null,
+        todayGoal: today_goal,
       }));
 
       setItems(combined);
@@ -57,39 +52,57 @@ export default function TodayPage({ onLogout }: Props) {
   }
 
   function startEditing(project: ProjectWithGoal) {
-    setEditingId(project.id);
-    setEditText(project.todayGoal?.goal_text ?? '');
+    setDrafts((prev) => ({ ...prev, [project.id]: project.todayGoal?.goal_text ?? '' }));
+  }
+
+  function stopEditing(projectIds: number[]) {
+    setDrafts((prev) => {
+      const next = { ...prev };
+      for (const id of projectIds) delete next[id];
+      return next;
+    });
   }
 
-  async function handleSave(projectId: number) {
-    if (!editText.trim()) return;
-    setSavingId(projectId);
+  async function handleSave(projectIds: number[]) {
+    const goals = projectIds
+      .map((id) => ({ project_id: id, goal_text: (drafts[id] ?? '').trim() }))
+      .filter((goal) => goal.goal_text);
+    if (goals.length === 0) return;
+    setSavingIds(goals.map((goal) => goal.project_id));
 
     try {
-      const updated = await upsertTodaysGoal(projectId, editText.trim());
+      // One request no matter how many projects were edited
+      const { results } = await upsertTodaysGoals(goals);
+
+      const saved = new Map<number, DailyGoal>();
+      for (const result of results) {
+        if (result.goal) saved.set(result.project_id, result.goal);
+        else showToast(result.error ?? 'Failed to save');
+      }
 
       setItems((prev) =>
-        prev.map((item) =>
-          item.id === projectId ? { ...item, todayGoal: updated } : item
-        )
+        prev.map((item) => {
+          const goal = saved.get(item.id);
+          return goal ? { ...item, todayGoal: goal } : item;
+        })
       );
 
-      setEditingId(null);
-      setSavedId(projectId);
-      setTimeout(() => setSavedId(null), 2000);
+      stopEditing([...saved.keys()]);
+      setSavedIds([...saved.keys()]);
+      setTimeout(() => setSavedIds([]), 2000);
     } catch (err) {
       showToast(err instanceof Error ? err.message : 'Failed to save');
     } finally {
-      setSavingId(null);
+      setSavingIds([]);
     }
   }
 
   function handleKeyDown(e: React.KeyboardEvent, projectId: number) {
     if (e.key === 'Enter' && (e.metaKey || e.ctrlKey)) {
-      handleSave(projectId);
+      handleSave([projectId]);
     }
     if (e.key === 'Escape') {
-      setEditingId(null);
+      stopEditing([projectId]);
     }
   }
 
@@ -101,6 +114,7 @@ export default function TodayPage({ onLogout }: Props) {
   }
 
   const goalsSetCount = items.filter((i) => i.todayGoal).length;
+  const openDraftIds = Object.keys(drafts).map(Number);
 
   return (
     <div className="min-h-screen bg-slate-50">
@@ -139,9 +153,20 @@ export default function TodayPage({ onLogout }: Props) {
           <p className="text-xs font-medium text-indigo-500 uppercase tracking-widest mb-1">{today}</p>
           <h1 className="text-2xl font-semibold text-gray-900">Today's Goals</h1>
           {!loading && items.length > 0 && (
-            <p className="text-sm text-gray-400 mt-1">
-              {goalsSetCount} of {items.length} set
-            </p>
+            <div className="flex items-center justify-between mt-1">
+              <p className="text-sm text-gray-400">
+                {goalsSetCount} of {items.length} set
+              </p>
+              {openDraftIds.length > 1 && (
+                <button
+                  onClick={() => handleSave(openDraftIds)}
+                  disabled={savingIds.length > 0}
+                  className="bg-indigo-600 text-white text-xs font-medium px-3.5 py-1.5 rounded-lg hover:bg-indigo-700 disabled:opacity-50 transition-colors"
+                >
+                  Save all ({openDraftIds.length})
+                </button>
+              )}
+            </div>
           )}
         </div>
 
@@ -180,9 +205,10 @@ export default function TodayPage({ onLogout }: Props) {
         {!loading && (
           <ul className="space-y-3">
             {items.map((item) => {
-              const isEditing = editingId === item.id;
-              const isSaving = savingId === item.id;
-              const justSaved = savedId === item.id;
+              const isEditing = item.id in drafts;
+              const editText = drafts[item.id] ?? '';
+              const isSaving = savingIds.includes(item.id);
+              const justSaved = savedIds.includes(item.id);
 
               return (
                 <li key={item.id} className="bg-white border border-gray-200 rounded-2xl p-5 transition-all hover:border-gray-300">
@@ -220,7 +246,7 @@ export default function TodayPage({ onLogout }: Props) {
                         </button>
                       ) : (
                         <button
-                          onClick={() => setEditingId(null)}
+                          onClick={() => stopEditing([item.id])}
                           className="text-xs text-gray-400 hover:text-gray-600 transition-colors"
                         >
                           Cancel
@@ -235,7 +261,7 @@ export default function TodayPage({ onLogout }: Props) {
                       <textarea
                         autoFocus
                         value={editText}
-                        onChange={(e) => setEditText(e.target.value)}
+                        onChange={(e) => setDrafts((prev) => ({ ...prev, [item.id]: e.target.value }))}
                         onKeyDown={(e) => handleKeyDown(e, item.id)}
                         rows={3}
                         placeholder="What's your goal for today?"
@@ -244,7 +270,7 @@ export default function TodayPage({ onLogout }: Props) {
                       <div className="flex items-center justify-between">
                         <p className="text-xs text-gray-300">⌘ Enter to save</p>
                         <button
-                          onClick={() => handleSave(item.id)}
+                          onClick={() => handleSave([item.id])}
                           disabled={isSaving || !editText.trim()}
                           className="bg-indigo-600 text-white text-xs font-medium px-3.5 py-1.5 rounded-lg hover:bg-indigo-700 disabled:opacity-50 transition-colors flex items-center gap-1.5"
                         >
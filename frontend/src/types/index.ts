@@ -27,6 +27,19 @@ export interface DailyGoal {
   created_at: string;
 }
 
+// GET /today: each active project with today's goal inlined
+export interface ProjectWithTodayGoal extends Project {
+  today_goal: DailyGoal | null;
+}
+
+// PUT /goals/today: one result per submitted item, in request order
+export interface GoalUpsertResult {
+  project_id: number;
+  status: 'created' | 'updated' | 'not_found' | 'invalid';
+  goal?: DailyGoal;
+  error?: string;
+}
+
 export interface ApiError {
   error: string;
 }
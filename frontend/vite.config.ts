@@ -9,6 +9,8 @@ export default defineConfig({
     proxy: {
       '/auth': 'http://localhost:8000',
       '/projects': 'http://localhost:8000',
+      '/today': 'http://localhost:8000',
+      '/goals': 'http://localhost:8000',
       '/health': 'http://localhost:8000',
     },
   },
@@ -3,13 +3,9 @@ from assertpy import assert_that
 
 
 @pytest.fixture
-def registered_user(client, fake):
-    email = fake.unique.email()
-    password = fake.password(length=12)
-    res = client.post("/auth/register", json={"email": email, "password": password})
-    assert_that(res.status_code).described_as("register status").is_equal_to(201)
-    body = res.get_json()
-    return {"email": email, "password": password, "access_token": body["access_token"]}
+def registered_user(make_user):
+    user = make_user()
+    return {"email": user["email"], "password": user["password"], "access_token": user["access_token"]}
 
 
 def test_change_password_success(client, registered_user, fake):
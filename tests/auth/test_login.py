@@ -3,12 +3,9 @@ from assertpy import assert_that
 
 
 @pytest.fixture
-def registered_user(client, fake):
-    email = fake.unique.email()
-    password = fake.password(length=12)
-    res = client.post("/auth/register", json={"email": email, "password": password})
-    assert_that(res.status_code).described_as("register before login").is_equal_to(201)
-    return {"email": email, "password": password}
+def registered_user(make_user):
+    user = make_user()
+    return {"email": user["email"], "password": user["password"]}
 
 
 def test_login_success(client, registered_user):
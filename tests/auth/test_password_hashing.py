@@ -0,0 +1,56 @@
+import pytest
+from assertpy import assert_that
+from werkzeug.security import generate_password_hash
+
+from backend.app.errors import HashingBusy
+from backend.app.passwords import PasswordHasher
+
+
+def test_hash_and_verify_in_worker_process():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1)
+    stored = hasher.hash("s3cret")
+    assert_that(stored).described_as("stored hash").starts_with("pbkdf2:sha256:1000$")
+    assert_that(hasher.verify(stored, "s3cret")).described_as("correct password").is_true()
+    assert_that(hasher.verify(stored, "wrong")).described_as("wrong password").is_false()
+
+
+def test_needs_rehash_when_parameters_change():
+    hasher = PasswordHasher(method="pbkdf2:sha256:2000", workers=0)
+    old = generate_password_hash("pw", "pbkdf2:sha256:1000")
+    assert_that(hasher.needs_rehash(old)).described_as("old parameters").is_true()
+    assert_that(hasher.needs_rehash(hasher.hash("pw"))).described_as("current parameters").is_false()
+
+
+def test_shorthand_method_is_not_rehashed_forever():
+    hasher = PasswordHasher(method="pbkdf2", workers=0)
+    assert_that(hasher.needs_rehash(hasher.hash("pw"))).described_as("needs rehash").is_false()
+
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1, max_pending=1, queue_timeout=0.01)
+    hasher._slots.acquire()
+    try:
+        with pytest.raises(HashingBusy):
+            hasher.hash("pw")
+    finally:
+        hasher._slots.release()
+
+
+def test_login_upgrades_outdated_hash(client, db_conn, authenticated_user):
+    cur = db_conn.cursor()
+    cur.execute(
+        "UPDATE users SET password_hash = %s WHERE id = %s;",
+        (generate_password_hash(authenticated_user["password"], "pbkdf2:sha256:1000"), authenticated_user["id"]),
+    )
+    db_conn.commit()
+
+    res = client.post(
+        "/auth/login",
+        json={"email": authenticated_user["email"], "password": authenticated_user["password"]},
+    )
+    assert_that(res.status_code).described_as("login status").is_equal_to(200)
+
+    cur.execute("SELECT password_hash FROM users WHERE id = %s;", (authenticated_user["id"],))
+    stored = cur.fetchone()["password_hash"]
+    cur.close()
+    assert_that(stored.split("$", 1)[0]).described_as("upgraded hash method").is_not_equal_to("pbkdf2:sha256:1000")
@@ -0,0 +1,83 @@
+import pytest
+from assertpy import assert_that
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from backend.app.database import database
+from backend.app.main import app
+from backend.app.rate_limit import MemoryBackend, RateLimiter, Rule, SharedMemoryBackend, rate_limiter
+
+
+def test_memory_backend_blocks_over_limit():
+    backend = MemoryBackend()
+    results = [backend.hit("k", 3, 60) for _ in range(4)]
+    assert_that(results[:3]).described_as("allowed hits").is_equal_to([0.0, 0.0, 0.0])
+    assert_that(results[3]).described_as("retry after").is_greater_than(0)
+
+
+def test_memory_backend_keys_are_independent():
+    backend = MemoryBackend()
+    backend.hit("a", 1, 60)
+    assert_that(backend.hit("b", 1, 60)).described_as("other key").is_equal_to(0.0)
+
+
+def test_shared_backend_counts_across_instances(tmp_path):
+    path = str(tmp_path / "limits")
+    worker_a = SharedMemoryBackend(path, slots=64)
+    worker_b = SharedMemoryBackend(path, slots=64)
+    worker_a.hit("k", 2, 60)
+    worker_b.hit("k", 2, 60)
+    assert_that(worker_a.hit("k", 2, 60)).described_as("third hit").is_greater_than(0)
+
+
+def test_limiter_checks_each_scope():
+    limiter = RateLimiter(MemoryBackend(), {"login": [Rule("email", 1, 60)]})
+    limiter.check("login", ip="1.1.1.1", email="a@example.com")
+    limiter.check("login", ip="1.1.1.1", email="b@example.com")
+    with pytest.raises(Exception) as exc_info:
+        limiter.check("login", ip="2.2.2.2", email="a@example.com")
+    assert_that(exc_info.value.status_code).described_as("status").is_equal_to(429)
+
+
+@pytest.fixture
+def strict_login_limit(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", True)
+    monkeypatch.setattr(rate_limiter, "backend", MemoryBackend())
+    monkeypatch.setattr(rate_limiter, "rules", {"login": [Rule("email", 2, 60)]})
+
+
+def test_login_is_rejected_before_database_work(client, strict_login_limit):
+    body = {"email": "limited@example.com", "password": "wrong"}
+    client.post("/auth/login", json=body)
+    client.post("/auth/login", json=body)
+
+    before = database.pool_stats()["checkouts"]
+    res = client.post("/auth/login", json=body)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(429)
+    assert_that(res.headers.get("Retry-After")).described_as("Retry-After").is_not_none()
+    assert_that(database.pool_stats()["checkouts"]).described_as("checkouts").is_equal_to(before)
+
+
+@pytest.fixture
+def one_login_per_ip(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", True)
+    monkeypatch.setattr(rate_limiter, "backend", MemoryBackend())
+    monkeypatch.setattr(rate_limiter, "rules", {"login": [Rule("ip", 1, 60)]})
+
+
+def _login_from(client, forwarded_for: str):
+    body = {"email": "limited@example.com", "password": "wrong"}
+    return client.post("/auth/login", json=body, headers={"X-Forwarded-For": forwarded_for})
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(client, one_login_per_ip):
+    _login_from(client, "203.0.113.1")
+    res = _login_from(client, "203.0.113.2")
+    assert_that(res.status_code).described_as("status").is_equal_to(429)
+
+
+def test_per_ip_limit_uses_forwarded_for_behind_trusted_proxy(client, one_login_per_ip, monkeypatch):
+    monkeypatch.setattr(app, "wsgi_app", ProxyFix(app.wsgi_app, x_for=1))
+    _login_from(client, "203.0.113.1")
+    assert_that(_login_from(client, "203.0.113.2").status_code).described_as("other client").is_not_equal_to(429)
+    assert_that(_login_from(client, "203.0.113.1").status_code).described_as("same client").is_equal_to(429)
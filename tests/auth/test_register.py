@@ -1,3 +1,4 @@
+import pytest
 from assertpy import assert_that
 
 
@@ -29,3 +30,39 @@ def test_register_duplicate_email_conflict(client, fake):
     second = client.post("/auth/register", json={"email": email, "password": password})
     assert_that(second.status_code).described_as("duplicate register status").is_equal_to(409)
     assert_that(second.get_json()["error"]).described_as("error message").is_equal_to("Email already registered")
+
+
+def test_register_with_timezone(client, fake):
+    res = client.post(
+        "/auth/register",
+        json={
+            "email": fake.unique.email(),
+            "password": fake.password(length=12),
+            "timezone": "America/New_York",
+        },
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(201)
+    assert_that(res.get_json()["timezone"]).described_as("timezone").is_equal_to("America/New_York")
+
+
+def test_register_unknown_timezone(client, fake):
+    res = client.post(
+        "/auth/register",
+        json={
+            "email": fake.unique.email(),
+            "password": fake.password(length=12),
+            "timezone": "Mars/Olympus_Mons",
+        },
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Unknown timezone")
+
+
+@pytest.mark.parametrize("timezone_name", [5, ["UTC"], {"name": "UTC"}])
+def test_register_non_string_timezone(client, fake, timezone_name):
+    res = client.post(
+        "/auth/register",
+        json={"email": fake.unique.email(), "password": fake.password(length=12), "timezone": timezone_name},
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Unknown timezone")
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+from assertpy import assert_that
+from itsdangerous import URLSafeTimedSerializer
+
+from backend.app.access_tokens import Denylist, check_access_token_config
+from backend.app.main import app
+
+
+@pytest.fixture
+def signed_mode(monkeypatch):
+    monkeypatch.setitem(app.config, "ACCESS_TOKEN_MODE", "signed")
+    monkeypatch.setitem(app.config, "ACCESS_TOKEN_SIGNING_KEYS", {"k1": "first-secret"})
+    monkeypatch.setitem(app.config, "ACCESS_TOKEN_SIGNING_KEY_ID", "k1")
+
+
+@pytest.fixture
+def signed_user(signed_mode, authenticated_user):
+    return authenticated_user
+
+
+def test_signed_token_is_issued_and_accepted(client, signed_user, auth_headers):
+    token = signed_user["access_token"]
+    assert_that(token).described_as("signed token").contains(".")
+
+    res = client.get("/projects", headers=auth_headers(token))
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+
+
+def test_tampered_signed_token_is_rejected(client, signed_user, auth_headers):
+    token = signed_user["access_token"]
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+
+    res = client.get("/projects", headers=auth_headers(tampered))
+    assert_that(res.status_code).described_as("status").is_equal_to(401)
+
+
+def test_logout_denylists_signed_token(client, signed_user, auth_headers):
+    headers = auth_headers(signed_user["access_token"])
+    res = client.post(
+        "/auth/logout",
+        headers=headers,
+        json={"refresh_token": signed_user["refresh_token"]},
+    )
+    assert_that(res.get_json()["access_token_revoked"]).described_as("revoked").is_true()
+
+    res = client.get("/projects", headers=headers)
+    assert_that(res.status_code).described_as("status after logout").is_equal_to(401)
+
+
+def test_rotated_key_still_verifies_until_removed(client, signed_user, auth_headers, monkeypatch):
+    headers = auth_headers(signed_user["access_token"])
+    monkeypatch.setitem(
+        app.config, "ACCESS_TOKEN_SIGNING_KEYS", {"k1": "first-secret", "k2": "second-secret"}
+    )
+    monkeypatch.setitem(app.config, "ACCESS_TOKEN_SIGNING_KEY_ID", "k2")
+
+    res = client.get("/projects", headers=headers)
+    assert_that(res.status_code).described_as("status with old key in ring").is_equal_to(200)
+
+    monkeypatch.setitem(app.config, "ACCESS_TOKEN_SIGNING_KEYS", {"k2": "second-secret"})
+    res = client.get("/projects", headers=headers)
+    assert_that(res.status_code).described_as("status after key removal").is_equal_to(401)
+
+
+def test_db_tokens_still_accepted_in_signed_mode(client, authenticated_user, auth_headers, signed_mode):
+    res = client.get("/projects", headers=auth_headers(authenticated_user["access_token"]))
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+
+
+def test_signed_token_is_rejected_without_a_configured_key_ring(client, authenticated_user, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "ACCESS_TOKEN_SIGNING_KEYS", {})
+    forged = URLSafeTimedSerializer("dev-only-change-me", salt="access-token").dumps(
+        {"uid": authenticated_user["id"], "iat": 0, "exp": 2**31, "kid": "default", "jti": "forged"}
+    )
+
+    res = client.get("/projects", headers=auth_headers(forged))
+    assert_that(res.status_code).described_as("status").is_equal_to(401)
+
+
+def test_signed_mode_refuses_to_start_without_keys():
+    config = {"ACCESS_TOKEN_MODE": "signed", "ACCESS_TOKEN_SIGNING_KEYS": {}, "ACCESS_TOKEN_SIGNING_KEY_ID": "default"}
+    with pytest.raises(RuntimeError):
+        check_access_token_config(config)
+
+    config["ACCESS_TOKEN_SIGNING_KEYS"] = {"k1": "first-secret"}
+    with pytest.raises(RuntimeError):
+        check_access_token_config(config)
+
+
+def test_denylist_picks_up_rows_added_elsewhere():
+    table = [{"jti": "a", "expires_in": 900}]
+    queries = []
+
+    def load(within_seconds):
+        queries.append(within_seconds)
+        return list(table)
+
+    denylist = Denylist(reload_seconds=0.05)
+    assert_that(denylist.contains("a", load)).described_as("loaded jti").is_true()
+
+    # Another host's logout: only in the table, never on this host's channel.
+    table.append({"jti": "b", "expires_in": 900})
+    assert_that(denylist.contains("b", load)).described_as("before reload").is_false()
+    time.sleep(0.06)
+    assert_that(denylist.contains("b", load)).described_as("after reload").is_true()
+    assert_that(queries[0]).described_as("first load").is_none()
+    assert_that(queries[-1]).described_as("reload window").is_greater_than_or_equal_to(0.1)
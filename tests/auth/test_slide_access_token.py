@@ -0,0 +1,55 @@
+from assertpy import assert_that
+
+from backend.app import crud
+
+
+def _expires_at(db_conn, token):
+    cur = db_conn.cursor()
+    cur.execute("SELECT expires_at FROM access_tokens WHERE token = %s;", (token,))
+    value = cur.fetchone()["expires_at"]
+    cur.close()
+    return value
+
+
+def test_fresh_token_is_not_extended(db_conn, authenticated_user):
+    token = authenticated_user["access_token"]
+    before = _expires_at(db_conn, token)
+
+    row = crud.slide_access_token(db_conn, token, 900, slide_threshold=0.5)
+
+    assert_that(row).described_as("token row").is_not_none()
+    assert_that(_expires_at(db_conn, token)).described_as("expires_at").is_equal_to(before)
+
+
+def test_token_past_threshold_is_extended(db_conn, authenticated_user):
+    token = authenticated_user["access_token"]
+    cur = db_conn.cursor()
+    cur.execute(
+        "UPDATE access_tokens SET expires_at = CURRENT_TIMESTAMP + INTERVAL '60 seconds' WHERE token = %s;",
+        (token,),
+    )
+    cur.close()
+    before = _expires_at(db_conn, token)
+
+    row = crud.slide_access_token(db_conn, token, 900, slide_threshold=0.5)
+
+    assert_that(row["expires_at"]).described_as("returned expires_at").is_greater_than(before)
+    assert_that(_expires_at(db_conn, token)).described_as("stored expires_at").is_greater_than(before)
+
+
+def test_zero_threshold_always_extends(db_conn, authenticated_user):
+    token = authenticated_user["access_token"]
+    before = _expires_at(db_conn, token)
+
+    crud.slide_access_token(db_conn, token, 900, slide_threshold=0)
+
+    assert_that(_expires_at(db_conn, token)).described_as("expires_at").is_greater_than_or_equal_to(before)
+
+
+def test_revoked_token_is_rejected(db_conn, authenticated_user):
+    token = authenticated_user["access_token"]
+    crud.revoke_access_token_by_token(db_conn, token)
+
+    row = crud.slide_access_token(db_conn, token, 900, slide_threshold=0.5)
+
+    assert_that(row).described_as("token row").is_none()
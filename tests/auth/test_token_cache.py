@@ -0,0 +1,77 @@
+import time
+
+from assertpy import assert_that
+
+from backend.app.token_cache import RevocationChannel, TokenCache
+
+
+def test_cache_hit_after_put():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("tok", 7, 30)
+    assert_that(cache.get("tok")).described_as("cached user id").is_equal_to(7)
+    assert_that(cache.stats()["hits"]).described_as("hits").is_equal_to(1)
+
+
+def test_cache_entry_expires():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("tok", 7, 0.01)
+    time.sleep(0.02)
+    assert_that(cache.get("tok")).described_as("expired entry").is_none()
+
+
+def test_cache_skips_non_positive_lifetime():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("tok", 7, 0)
+    assert_that(cache.get("tok")).described_as("uncached entry").is_none()
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1, 30)
+    cache.put("b", 2, 30)
+    cache.get("a")
+    cache.put("c", 3, 30)
+    assert_that(cache.get("b")).described_as("evicted entry").is_none()
+    assert_that(cache.get("a")).described_as("recently used entry").is_equal_to(1)
+    assert_that(cache.stats()["evictions"]).described_as("evictions").is_equal_to(1)
+
+
+def test_invalidation_reaches_other_process_cache(tmp_path):
+    path = str(tmp_path / "revocations")
+    worker_a = TokenCache(max_entries=10, ttl_seconds=60, channel=RevocationChannel(path))
+    worker_b = TokenCache(max_entries=10, ttl_seconds=60, channel=RevocationChannel(path))
+    worker_a.put("tok", 7, 30)
+    worker_b.put("tok", 7, 30)
+    assert_that(worker_b.get("tok")).described_as("worker b before revoke").is_equal_to(7)
+
+    worker_a.invalidate("tok")
+
+    assert_that(worker_a.get("tok")).described_as("worker a after revoke").is_none()
+    assert_that(worker_b.get("tok")).described_as("worker b after revoke").is_none()
+
+
+def test_channel_rotation_clears_cache(tmp_path):
+    path = str(tmp_path / "revocations")
+    publisher = RevocationChannel(path, max_bytes=10)
+    worker = TokenCache(max_entries=10, ttl_seconds=60, channel=RevocationChannel(path))
+    worker.put("other", 1, 30)
+    worker.get("other")
+
+    publisher.publish("x" * 64)
+
+    assert_that(worker.get("other")).described_as("entry after rotation").is_none()
+
+
+def test_logout_rejects_cached_access_token(client, authenticated_user, auth_headers):
+    headers = auth_headers(authenticated_user["access_token"])
+    first = client.get("/projects", headers=headers)
+    assert_that(first.status_code).described_as("status before logout").is_equal_to(200)
+
+    client.post(
+        "/auth/logout",
+        headers=headers,
+        json={"refresh_token": authenticated_user["refresh_token"]},
+    )
+
+    res = client.get("/projects", headers=headers)
+    assert_that(res.status_code).described_as("status after logout").is_equal_to(401)
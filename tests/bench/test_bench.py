@@ -0,0 +1,65 @@
+import uuid
+
+import pytest
+from assertpy import assert_that
+
+from backend.app.database import database
+from bench.load import parse_mix, run_load
+from bench.report import build_report, compare, percentile
+from bench.seed import delete_dataset, seed
+
+
+@pytest.fixture
+def dataset():
+    tag = f"benchtest-{uuid.uuid4().hex[:8]}"
+    report = seed(users=2, projects_per_user=3, years=0.1, tokens_per_user=4, tag=tag)
+    yield tag, report
+    conn = database.get_connection()
+    try:
+        delete_dataset(conn, tag)
+        conn.commit()
+    finally:
+        database.release_connection(conn)
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+
+    assert_that(percentile(values, 0.50)).is_equal_to(50.0)
+    assert_that(percentile(values, 0.99)).is_equal_to(99.0)
+    assert_that(percentile([], 0.95)).is_equal_to(0.0)
+
+
+def test_compare_flags_regressions():
+    base = build_report({"commit": "a"}, {"GET /today": [0.010] * 100}, {"GET /today": {200: 100}}, 10.0)
+    new = build_report({"commit": "b"}, {"GET /today": [0.020] * 50}, {"GET /today": {200: 49, 500: 1}}, 10.0)
+
+    result = compare(base, new, threshold_pct=20)
+
+    assert_that(new["endpoints"]["GET /today"]["errors"]).is_equal_to(1)
+    assert_that(result["endpoints"]["GET /today"]["p95_ms"]["change_pct"]).is_equal_to(100.0)
+    assert_that(result["regressions"]).contains("GET /today p95_ms +100.0%", "GET /today throughput_rps -50.0%")
+
+
+def test_parse_mix_rejects_unknown_operations():
+    assert_that(parse_mix("today=3,login=1")).is_equal_to({"today": 3.0, "login": 1.0})
+    with pytest.raises(ValueError):
+        parse_mix("today=1,delete_everything=1")
+
+
+def test_seed_counts(dataset):
+    _, report = dataset
+
+    assert_that(report).contains_entry({"users": 2}, {"projects": 6}, {"access_tokens": 8}, {"refresh_tokens": 8})
+    assert_that(report["daily_goals"]).described_as("goals").is_greater_than(0)
+
+
+@pytest.mark.commits
+def test_load_run_reports_every_endpoint(dataset):
+    tag, _ = dataset
+
+    report = run_load(clients=2, duration=1.0, warmup=0.0, users=2, tag=tag)
+
+    assert_that(report["endpoints"]).contains_key("POST /auth/login", "GET /today")
+    assert_that(report["totals"]["errors"]).is_equal_to(0)
+    assert_that(report["totals"]).contains_key("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
@@ -1,14 +1,348 @@
-import pytest
-from faker import Faker
+"""
+Fixtures shared by the whole suite.
 
-from backend.app.main import app
+Every test runs in a transaction that is rolled back at teardown, on one
+connection that every pool checkout of the test gets (the app's requests,
+`db_conn`, the maintenance jobs). What the app commits is released to a
+savepoint instead, so later requests of the same test see it and nothing
+outlives the test. Within a test the transaction never ends: CURRENT_TIMESTAMP
+stays put, and ON COMMIT actions don't run.
+
+Tests that need real commits or several connections (concurrent clients, a
+lock held by another session, a CLI opening its own connection) are marked
+`commits`: they use the real pool, and every table is emptied afterwards.
+
+Each process works in its own schema, built from create_tables.sql at the
+start of the session, so pytest-xdist workers (`pytest -n auto`) never see
+each other's rows, locks or metrics.
+
+With `--serving asgi`, the `client` fixture sends its requests through the
+ASGI server app (backend/app/asgi.py) instead of the Flask app directly:
+same tests, same assertions, other serving mode.
+"""
+
+import asyncio
+import os
+import tempfile
+import uuid
+from collections import deque
+
+_WORKER = os.getenv("PYTEST_XDIST_WORKER", "main")
+TEST_SCHEMA = f"tests_{_WORKER}"
+
+# Before the app is imported: these are read once, at import or connect time.
+# Files the app shares between its worker processes get one set per test worker.
+_STATE_DIR = os.path.join(tempfile.gettempdir(), f"daily_goal_{TEST_SCHEMA}")
+os.makedirs(_STATE_DIR, exist_ok=True)
+os.environ["PGOPTIONS"] = f"{os.getenv('PGOPTIONS', '')} -c search_path={TEST_SCHEMA}".strip()
+os.environ["METRICS_DIR"] = os.path.join(_STATE_DIR, "metrics")
+for _variable, _name in (
+    ("READ_CACHE_CHANNEL_PATH", "read_cache_invalidations"),
+    ("TOKEN_CACHE_CHANNEL_PATH", "token_revocations"),
+    ("ACCESS_TOKEN_DENYLIST_CHANNEL_PATH", "access_token_denylist"),
+):
+    os.environ[_variable] = os.path.join(_STATE_DIR, _name)
+# Same KDF as production at a fraction of the cost; override to test with the real one.
+os.environ.setdefault("PASSWORD_HASH_METHOD", "scrypt:1024:8:1")
+
+import pytest  # noqa: E402
+from faker import Faker  # noqa: E402
+from flask.testing import FlaskClient  # noqa: E402
+from psycopg2 import extensions, sql as pg_sql  # noqa: E402
+from werkzeug.http import HTTP_STATUS_CODES  # noqa: E402
+from werkzeug.test import run_wsgi_app  # noqa: E402
+
+from backend.app import crud  # noqa: E402
+from backend.app.access_tokens import issue_access_token  # noqa: E402
+from backend.app.asgi import app as asgi_app  # noqa: E402
+from backend.app.database import ConnectionPool, database, get_db  # noqa: E402
+from backend.app.instrumentation import InstrumentedConnection  # noqa: E402
+from backend.app.main import app  # noqa: E402
+from backend.app.passwords import password_hasher  # noqa: E402
+from backend.app.rate_limit import rate_limiter  # noqa: E402
+from backend.app.read_cache import read_cache  # noqa: E402
+
+_SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "create_tables.sql")
+
+# Password of the users made by `make_user` unless a test picks its own.
+TEST_PASSWORD = "test-password-1234"
+
+_SAVEPOINT = "test_commit"
+
+
+class RollbackConnection(InstrumentedConnection):
+    """
+    Connection of the per-test transaction. Between begin_test() and
+    end_test(), commit() and rollback() act on a savepoint, and end_test()
+    rolls everything back; outside a test it behaves as usual.
+    """
+
+    in_test = False
+
+    def begin_test(self):
+        self.in_test = True
+        self._run(f"SAVEPOINT {_SAVEPOINT};")
+
+    def end_test(self):
+        self.in_test = False
+        super().rollback()
+
+    def commit(self):
+        if not self.in_test:
+            return super().commit()
+        if self.info.transaction_status == extensions.TRANSACTION_STATUS_INERROR:
+            # Committing a failed transaction rolls it back.
+            return self.rollback()
+        self._run(f"RELEASE SAVEPOINT {_SAVEPOINT}; SAVEPOINT {_SAVEPOINT};")
+
+    def rollback(self):
+        if not self.in_test:
+            return super().rollback()
+        self._run(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT};")
+
+    def _run(self, statement: str):
+        cur = self.cursor()
+        cur.execute(statement)
+        cur.close()
+
+
+class SharedConnectionPool(ConnectionPool):
+    """Gives every checkout the same connection; keeps the pool's stats."""
+
+    def __init__(self, conn):
+        super().__init__(lambda: conn, min_size=0, max_size=1)
+        self.conn = conn
+        self._size = 1
+
+    def getconn(self):
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+        return self.conn
+
+    def putconn(self, conn, discard: bool = False):
+        with self._cond:
+            self._in_use -= 1
+
+
+class AsgiExchange:
+    """
+    One request to the ASGI app, driven from the test's thread: the event
+    loop only runs while the test waits for the next message. The app may
+    not run ahead of a streamed body, so a test can look at the state
+    between two chunks, as with the Flask client.
+    """
+
+    def __init__(self, loop, body: bytes, chunk_size: int = 65536):
+        self.loop = loop
+        chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+        self._requests = deque(
+            {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)
+        )
+        self._disconnected = loop.create_future()
+        self._messages = deque()
+        self._arrived = None
+        self._pull = None
+
+    async def receive(self):
+        if self._requests:
+            return self._requests.popleft()
+        await self._disconnected
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if self._disconnected.done():
+            return
+        self._messages.append(message)
+        if self._arrived and not self._arrived.done():
+            self._arrived.set_result(None)
+        if message["type"] == "http.response.body" and message.get("more_body"):
+            self._pull = self.loop.create_future()
+            await self._pull
+
+    def next_message(self, task) -> dict:
+        self._release()
+        if not self._messages and not task.done():
+            self._arrived = self.loop.create_future()
+            self.loop.run_until_complete(asyncio.wait([self._arrived, task], return_when=asyncio.FIRST_COMPLETED))
+        if self._messages:
+            return self._messages.popleft()
+        task.result()
+        raise RuntimeError("ASGI app returned without completing the response")
+
+    def body(self, task):
+        try:
+            while True:
+                message = self.next_message(task)
+                if message["body"]:
+                    yield message["body"]
+                if not message.get("more_body"):
+                    break
+            self.loop.run_until_complete(task)
+        finally:
+            if not task.done():
+                # Closed early: the client went away.
+                self._disconnected.set_result(None)
+                self._release()
+                self.loop.run_until_complete(task)
+
+    def _release(self):
+        if self._pull and not self._pull.done():
+            self._pull.set_result(None)
+
+
+class AsgiClient(FlaskClient):
+    """FlaskClient whose requests go through `backend.app.asgi.app`, on its own event loop."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = asyncio.new_event_loop()
+        self._lifespan_in = asyncio.Queue()
+        self._lifespan_out = asyncio.Queue()
+        self._lifespan = self.loop.create_task(
+            asgi_app({"type": "lifespan", "asgi": {"version": "3.0"}}, self._lifespan_in.get, self._lifespan_out.put)
+        )
+        self._lifespan_event("startup")
+
+    def close(self):
+        self._lifespan_event("shutdown")
+        self.loop.run_until_complete(self._lifespan)
+        self.loop.close()
+
+    def run_wsgi_app(self, environ, buffered: bool = False):
+        return run_wsgi_app(self._call_asgi, environ, buffered)
+
+    def _lifespan_event(self, name: str):
+        self._lifespan_in.put_nowait({"type": f"lifespan.{name}"})
+        message = self.loop.run_until_complete(self._lifespan_out.get())
+        assert message["type"] == f"lifespan.{name}.complete", message
+
+    def _call_asgi(self, environ, start_response):
+        exchange = AsgiExchange(self.loop, environ["wsgi.input"].read())
+        task = self.loop.create_task(asgi_app(_asgi_scope(environ), exchange.receive, exchange.send))
+        start = exchange.next_message(task)
+        start_response(
+            f"{start['status']} {HTTP_STATUS_CODES.get(start['status'], 'UNKNOWN')}",
+            [(name.decode("latin-1"), value.decode("latin-1")) for name, value in start["headers"]],
+        )
+        return exchange.body(task)
+
+
+def _asgi_scope(environ) -> dict:
+    headers = [
+        (key[5:].replace("_", "-").lower().encode("latin-1"), value.encode("latin-1"))
+        for key, value in environ.items()
+        if key.startswith("HTTP_")
+    ]
+    for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+        if environ.get(key):
+            headers.append((key.replace("_", "-").lower().encode("latin-1"), environ[key].encode("latin-1")))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": environ["REQUEST_METHOD"],
+        "scheme": environ["wsgi.url_scheme"],
+        "path": environ["PATH_INFO"].encode("latin-1").decode(),
+        "query_string": environ["QUERY_STRING"].encode("latin-1"),
+        "root_path": environ.get("SCRIPT_NAME", ""),
+        "headers": headers,
+        "client": (environ.get("REMOTE_ADDR", "127.0.0.1"), int(environ.get("REMOTE_PORT") or 0)),
+        "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+    }
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--serving",
+        choices=("wsgi", "asgi"),
+        default="wsgi",
+        help="serve the client fixture's requests with the Flask app (wsgi) or backend.app.asgi (asgi)",
+    )
+
+
+def _build_schema(conn):
+    cur = conn.cursor()
+    cur.execute(pg_sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE;").format(pg_sql.Identifier(TEST_SCHEMA)))
+    cur.execute(pg_sql.SQL("CREATE SCHEMA {};").format(pg_sql.Identifier(TEST_SCHEMA)))
+    with open(_SCHEMA_FILE) as f:
+        cur.execute(f.read())
+    cur.close()
+    conn.commit()
+
+
+def _empty_tables(conn):
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT string_agg(format('%%I', relname), ', ') AS tables
+        FROM pg_class
+        WHERE relnamespace = to_regnamespace(%s)
+          AND relkind IN ('r', 'p')
+          AND NOT relispartition;
+        """,
+        (TEST_SCHEMA,),
+    )
+    cur.execute(f"TRUNCATE {cur.fetchone()['tables']};")
+    cur.close()
+    conn.commit()
+
+
+@pytest.fixture(scope="session")
+def test_connection():
+    conn = database.connect(connection_factory=RollbackConnection)
+    _build_schema(conn)
+    yield conn
+    conn.rollback()
+    cur = conn.cursor()
+    cur.execute(pg_sql.SQL("DROP SCHEMA {} CASCADE;").format(pg_sql.Identifier(TEST_SCHEMA)))
+    cur.close()
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def db_transaction(request, test_connection, monkeypatch):
+    if request.node.get_closest_marker("commits"):
+        yield None
+        _empty_tables(test_connection)
+        return
+
+    pool = SharedConnectionPool(test_connection)
+    monkeypatch.setattr(database, "get_connection", pool.getconn)
+    monkeypatch.setattr(database, "release_connection", pool.putconn)
+    monkeypatch.setattr(database, "pool_stats", pool.stats)
+    test_connection.begin_test()
+    yield test_connection
+    test_connection.end_test()
+    read_cache.end_transaction(test_connection)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    # Every test client request comes from one IP; limits are tested explicitly.
+    monkeypatch.setattr(rate_limiter, "enabled", False)
 
 
 @pytest.fixture
-def client():
-    client = app.test_client()
+def client(request):
+    if request.config.getoption("serving") == "asgi":
+        client = AsgiClient(app, app.response_class)
+    else:
+        client = app.test_client()
     client.preserve_context = False
-    return client
+    yield client
+    if isinstance(client, AsgiClient):
+        client.close()
+
+
+@pytest.fixture
+def db_conn():
+    conn = database.get_connection()
+    yield conn
+    conn.rollback()
+    read_cache.end_transaction(conn)
+    database.release_connection(conn)
 
 
 @pytest.fixture()
@@ -24,19 +358,44 @@ def fake():
     return Faker()
 
 
+@pytest.fixture(scope="session")
+def password_hashes():
+    """Hash per password, made once a session: the KDF is slow on purpose."""
+    hashes = {}
+
+    def _hash(password: str) -> str:
+        if password not in hashes:
+            hashes[password] = password_hasher.hash(password)
+        return hashes[password]
+
+    return _hash
+
+
 @pytest.fixture
-def authenticated_user(client, fake):
-    email = fake.email()
-    password = fake.password(length=12)
+def make_user(password_hashes):
+    """
+    Create users the way /auth/register does, minus the work under test
+    elsewhere: the password hash is reused across the session, and the
+    tokens are issued directly instead of through /auth/login.
+    """
+
+    def _make(email: str = None, password: str = TEST_PASSWORD, timezone_name: str = "UTC") -> dict:
+        email = email or f"user-{uuid.uuid4().hex[:12]}@example.com"
+        with app.test_request_context():
+            user = crud.create_user_with_password_hash(get_db(), email, password_hashes(password), timezone_name)
+            access_token = issue_access_token(user["id"])
+            refresh_token = crud.create_refresh_token(get_db(), user["id"])["token"]
+        return {
+            "id": user["id"],
+            "email": email,
+            "password": password,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+        }
 
-    client.post("/auth/register", json={"email": email, "password": password})
-    res = client.post("/auth/login", json={"email": email, "password": password})
+    return _make
 
-    body = res.get_json()
 
-    return {
-        "email": email,
-        "password": password,
-        "access_token": body["access_token"],
-        "refresh_token": body["refresh_token"],
-    }
+@pytest.fixture
+def authenticated_user(make_user):
+    return make_user()
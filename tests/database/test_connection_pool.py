@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import pytest
+from assertpy import assert_that
+from psycopg2 import extensions
+
+from backend.app import green
+from backend.app.database import ConnectionPool
+from backend.app.errors import PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rolled_back = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rolled_back += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pool():
+    return ConnectionPool(FakeConnection, min_size=1, max_size=2, timeout=0.05)
+
+
+def test_pool_reuses_returned_connection(pool):
+    first = pool.getconn()
+    pool.putconn(first)
+    second = pool.getconn()
+    assert_that(second).described_as("reused connection").is_same_as(first)
+    assert_that(pool.stats()["size"]).described_as("pool size").is_equal_to(1)
+
+
+def test_pool_times_out_when_exhausted(pool):
+    pool.getconn()
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert_that(pool.stats()["timeouts"]).described_as("timeouts").is_equal_to(1)
+
+
+def test_pool_waiter_gets_released_connection(pool):
+    held = [pool.getconn(), pool.getconn()]
+    pool.timeout = 2
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    pool.putconn(held[0])
+    waiter.join(timeout=2)
+
+    assert_that(got).described_as("waiter result").is_equal_to([held[0]])
+    assert_that(pool.stats()["waits"]).described_as("waits").is_equal_to(1)
+
+
+def test_pool_greenlet_waits_on_the_event_loop(pool):
+    held = [pool.getconn(), pool.getconn()]
+    pool.timeout = 2
+
+    def release_later():
+        green.await_(asyncio.sleep(0.01))
+        pool.putconn(held[0])
+
+    async def requests():
+        # A waiter blocking the loop's thread would never let release_later run.
+        return await asyncio.gather(green.run(pool.getconn), green.run(release_later))
+
+    got, _ = asyncio.run(requests())
+
+    assert_that(got).described_as("waiter result").is_same_as(held[0])
+    assert_that(pool.stats()["waits"]).described_as("waits").is_equal_to(1)
+
+
+def test_pool_rolls_back_open_transaction_on_return(pool):
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert_that(conn.rolled_back).described_as("rollbacks").is_equal_to(1)
+    assert_that(pool.stats()["idle"]).described_as("idle").is_equal_to(1)
+
+
+def test_pool_discards_closed_connection(pool):
+    conn = pool.getconn()
+    conn.closed = 1
+    pool.putconn(conn)
+    stats = pool.stats()
+    assert_that(stats["size"]).described_as("pool size").is_equal_to(0)
+    assert_that(stats["discarded"]).described_as("discarded").is_equal_to(1)
+    assert_that(pool.getconn()).described_as("fresh connection").is_not_same_as(conn)
+
+
+def test_pool_stats_track_in_use(pool):
+    conn = pool.getconn()
+    stats = pool.stats()
+    assert_that(stats["in_use"]).described_as("in use").is_equal_to(1)
+    assert_that(stats["idle"]).described_as("idle").is_equal_to(0)
+    pool.putconn(conn)
+    assert_that(pool.stats()["in_use"]).described_as("in use after return").is_equal_to(0)
@@ -0,0 +1,124 @@
+import json
+import logging
+
+import pytest
+from assertpy import assert_that
+from psycopg2 import sql as pg_sql
+from psycopg2.extras import RealDictCursor
+
+from backend.app import crud
+from backend.app.instrumentation import normalize_sql, route_timings, slow_query_log
+from backend.app.main import app
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+def _request_logs(caplog) -> list:
+    return [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == "backend.app.requests"
+    ]
+
+
+def test_server_timing_header_reports_sql(client, auth_headers):
+    res = client.get("/projects", headers=auth_headers)
+
+    timing = res.headers["Server-Timing"]
+    assert_that(timing).described_as("Server-Timing").contains("db-checkout;dur=", "sql;dur=", "app;dur=")
+    assert_that(timing).described_as("Server-Timing").does_not_contain('desc="0 statements"')
+
+
+def test_server_timing_can_be_disabled(client, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "SERVER_TIMING_ENABLED", False)
+
+    res = client.get("/projects", headers=auth_headers)
+
+    assert_that(res.headers).does_not_contain_key("Server-Timing")
+
+
+def test_request_log_line(client, auth_headers, caplog):
+    caplog.set_level(logging.INFO, logger="backend.app.requests")
+
+    res = client.get("/projects", headers=auth_headers)
+
+    entry = _request_logs(caplog)[-1]
+    assert_that(entry).contains_entry(
+        {"event": "request"}, {"method": "GET"}, {"route": "/projects"}, {"status": 200}
+    )
+    assert_that(entry["sql_statements"]).described_as("statements").is_greater_than(0)
+    assert_that(entry["response_bytes"]).described_as("bytes").is_equal_to(len(res.get_data()))
+
+
+def test_streamed_response_size_is_logged(client, auth_headers, caplog):
+    caplog.set_level(logging.INFO, logger="backend.app.requests")
+    client.post("/projects", headers=auth_headers, json={"name": "Streamed"})
+
+    res = client.get("/projects?stream=1", headers=auth_headers)
+    body = res.get_data()
+    res.close()
+
+    entry = _request_logs(caplog)[-1]
+    assert_that(entry["response_bytes"]).described_as("bytes").is_equal_to(len(body))
+
+
+def test_streamed_request_is_counted_once(client, auth_headers, caplog):
+    caplog.set_level(logging.INFO, logger="backend.app.requests")
+    before = route_timings.stats().get("GET /projects", {}).get("requests", 0)
+
+    res = client.get("/projects?stream=1", headers=auth_headers)
+    res.get_data()
+    res.close()
+
+    assert_that(_request_logs(caplog)).described_as("log lines").is_length(1)
+    totals = route_timings.stats()["GET /projects"]
+    assert_that(totals["requests"]).described_as("requests").is_equal_to(before + 1)
+
+
+def test_route_totals_accumulate(client, auth_headers):
+    before = route_timings.stats().get("GET /projects/<int:project_id>", {}).get("requests", 0)
+
+    client.get("/projects/0", headers=auth_headers)
+
+    totals = route_timings.stats()["GET /projects/<int:project_id>"]
+    assert_that(totals["requests"]).described_as("requests").is_equal_to(before + 1)
+
+
+def test_slow_query_log_names_crud_function(db_conn, caplog, monkeypatch):
+    monkeypatch.setattr(slow_query_log, "threshold_seconds", 0.0)
+    caplog.set_level(logging.WARNING, logger="backend.app.slow_queries")
+
+    crud.get_user_by_email(db_conn, "nobody@example.com")
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert_that(entry["function"]).is_equal_to("get_user_by_email")
+    assert_that(entry["sql"]).starts_with("SELECT").does_not_contain("\n", "nobody@example.com")
+    assert_that(slow_query_log.stats()["get_user_by_email"]).is_greater_than(0)
+
+
+def test_fast_queries_are_not_logged(db_conn, caplog, monkeypatch):
+    monkeypatch.setattr(slow_query_log, "threshold_seconds", 60.0)
+    caplog.set_level(logging.WARNING, logger="backend.app.slow_queries")
+
+    crud.get_user_by_email(db_conn, "nobody@example.com")
+
+    assert_that(caplog.records).is_empty()
+
+
+def test_explicit_cursor_factory_is_kept(db_conn):
+    cur = db_conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("SELECT 1 AS one;")
+    row = cur.fetchone()
+    cur.close()
+
+    assert_that(row).is_equal_to({"one": 1})
+    assert_that(cur).is_instance_of(RealDictCursor)
+
+
+def test_normalize_sql_collapses_whitespace(db_conn):
+    composed = pg_sql.SQL("SELECT *\n  FROM {}\n").format(pg_sql.Identifier("projects"))
+
+    assert_that(normalize_sql(composed, db_conn)).is_equal_to('SELECT * FROM "projects"')
@@ -0,0 +1,641 @@
+"""
+Query-plan regression tests: every statement crud.py issues is EXPLAINed
+against a seeded dataset, and the plan is held to the access path it is
+meant to use.
+
+The dataset lives in its own schema (`query_plans`), built from
+create_tables.sql and filled by `bench.seed`, so the rest of the suite never
+sees it and its statistics are not disturbed by other tests. The schema is
+kept between runs and rebuilt whenever create_tables.sql, the seed or its
+parameters change.
+"""
+
+import hashlib
+import inspect
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import pytest
+from assertpy import assert_that
+from psycopg2 import sql as pg_sql
+
+from backend.app import crud
+from backend.app.database import database
+from backend.app.instrumentation import InstrumentedCursorMixin
+from backend.app.read_cache import read_cache
+from bench import seed as seed_module
+from bench.seed import bench_email, seed
+
+SCHEMA = "query_plans"
+
+# Typical users, plus one user with many projects for the list/keyset paths.
+SEED = {
+    "users": 200,
+    "projects_per_user": 5,
+    "years": 1.0,
+    "tokens_per_user": 100,
+    "random_seed": 1,
+}
+HEAVY_SEED = {
+    "users": 1,
+    "projects_per_user": 1000,
+    "years": 0.1,
+    "tokens_per_user": 0,
+    "random_seed": 2,
+}
+
+# A sequential scan over a relation at least this big is a regression.
+SEQ_SCAN_MIN_ROWS = 1000
+
+# Estimated and actual rows of a plan node may differ by at most this factor
+# (nodes where both are small are not compared).
+ESTIMATE_FACTOR = 10
+_ESTIMATE_MIN_ROWS = 20
+
+_SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "..", "create_tables.sql")
+
+# Held while the schema is checked and built: under pytest-xdist every worker
+# runs the fixture, and one builds while the others wait.
+_BUILD_LOCK_KEY = 0x706C616E73  # "plans"
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|DECLARE)\b", re.IGNORECASE)
+
+
+class _SchemaDatabase:
+    """`database`, with every connection working in SCHEMA."""
+
+    def get_connection(self):
+        conn = database.connect()
+        cur = conn.cursor()
+        cur.execute("SELECT set_config('search_path', %s, false);", (SCHEMA,))
+        cur.close()
+        conn.commit()
+        return conn
+
+    def release_connection(self, conn, discard: bool = False):
+        conn.close()
+
+
+def _schema_version() -> str:
+    with open(_SCHEMA_FILE, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(repr([sorted(SEED.items()), sorted(HEAVY_SEED.items())]).encode())
+    digest.update(inspect.getsource(_build_schema).encode())
+    digest.update(inspect.getsource(seed_module).encode())
+    return digest.hexdigest()[:16]
+
+
+def _build_schema(db: _SchemaDatabase):
+    version = _schema_version()
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT obj_description(oid, 'pg_namespace') AS version FROM pg_namespace WHERE nspname = %s;",
+            (SCHEMA,),
+        )
+        row = cur.fetchone()
+        if row and row["version"] == version:
+            cur.close()
+            conn.rollback()
+            return
+
+        cur.execute(pg_sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE;").format(pg_sql.Identifier(SCHEMA)))
+        cur.execute(pg_sql.SQL("CREATE SCHEMA {};").format(pg_sql.Identifier(SCHEMA)))
+        with open(_SCHEMA_FILE) as f:
+            cur.execute(f.read())
+        cur.close()
+        conn.commit()
+    finally:
+        db.release_connection(conn)
+
+    seed(tag="plans", db=db, **SEED)
+    seed(tag="plans-heavy", db=db, **HEAVY_SEED)
+
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        # The seed leaves it empty; never-analyzed tables get made-up estimates.
+        cur.execute("ANALYZE access_token_denylist;")
+        # The cases' rolled-back writes would get tables auto-analyzed, and
+        # plans would drift with each new sample; keep the seed's statistics.
+        cur.execute("SELECT relname FROM pg_class WHERE relnamespace = to_regnamespace(%s) AND relkind = 'r';", (SCHEMA,))
+        for row in cur.fetchall():
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {} SET (autovacuum_enabled = off);").format(pg_sql.Identifier(row["relname"]))
+            )
+        # Written last: an interrupted build is redone on the next run.
+        cur.execute(
+            pg_sql.SQL("COMMENT ON SCHEMA {} IS {};").format(pg_sql.Identifier(SCHEMA), pg_sql.Literal(version))
+        )
+        cur.close()
+        conn.commit()
+    finally:
+        db.release_connection(conn)
+
+
+@pytest.fixture(scope="module")
+def plans_db():
+    db = _SchemaDatabase()
+    lock_conn = db.get_connection()
+    try:
+        cur = lock_conn.cursor()
+        cur.execute("SELECT pg_advisory_lock(%s);", (_BUILD_LOCK_KEY,))
+        cur.close()
+        _build_schema(db)
+    finally:
+        db.release_connection(lock_conn)
+    conn = db.get_connection()
+    yield conn
+    db.release_connection(conn)
+
+
+@pytest.fixture
+def plan_conn(plans_db, monkeypatch):
+    # Cached reads would skip their SELECT, and user ids here overlap the main schema's.
+    monkeypatch.setattr(read_cache, "max_entries", 0)
+    yield plans_db
+    plans_db.rollback()
+
+
+@pytest.fixture(scope="module")
+def sample(plans_db):
+    """
+    Ids and values for representative parameters: the typical user with
+    the most goals among those with both active and archived projects.
+    """
+    cur = plans_db.cursor()
+    cur.execute(
+        """
+        SELECT g.user_id, count(*) AS goals
+        FROM daily_goals g
+        WHERE g.user_id IN (
+            SELECT user_id
+            FROM projects
+            GROUP BY user_id
+            HAVING bool_or(archived_at IS NULL)
+               AND bool_or(archived_at IS NOT NULL)
+               AND count(*) <= %s
+        )
+        GROUP BY g.user_id
+        ORDER BY goals DESC, g.user_id
+        LIMIT 1;
+        """,
+        (SEED["projects_per_user"],),
+    )
+    user_id = cur.fetchone()["user_id"]
+    cur.execute("SELECT email FROM users WHERE id = %s;", (user_id,))
+    email = cur.fetchone()["email"]
+    cur.execute(
+        """
+        SELECT id, archived_at IS NOT NULL AS archived
+        FROM projects
+        WHERE user_id = %s
+        ORDER BY id;
+        """,
+        (user_id,),
+    )
+    projects = cur.fetchall()
+    active = [p["id"] for p in projects if not p["archived"]]
+    archived = [p["id"] for p in projects if p["archived"]]
+    cur.execute(
+        """
+        SELECT goal_date
+        FROM daily_goals
+        WHERE user_id = %s AND project_id = %s
+        ORDER BY goal_date DESC
+        OFFSET 30
+        LIMIT 1;
+        """,
+        (user_id, active[0]),
+    )
+    row = cur.fetchone()
+    cur.execute(
+        """
+        SELECT p.user_id, p.id
+        FROM projects p
+        JOIN users u ON u.id = p.user_id
+        WHERE u.email = %s AND p.archived_at IS NULL
+        ORDER BY p.id;
+        """,
+        (bench_email("plans-heavy", 0),),
+    )
+    heavy = cur.fetchall()
+    cur.close()
+    plans_db.rollback()
+
+    return {
+        "user_id": user_id,
+        "email": email,
+        "project_id": active[0],
+        "active_project_ids": active,
+        "archived_project_id": archived[0],
+        "before_date": (row["goal_date"] if row else date.today() - timedelta(days=30)).isoformat(),
+        "heavy_user_id": heavy[0]["user_id"],
+        "heavy_project_ids": [p["id"] for p in heavy],
+    }
+
+
+def _capture(monkeypatch) -> list:
+    """Record the final text (parameters bound) of every statement run from here on."""
+    statements = []
+    execute = InstrumentedCursorMixin.execute
+
+    def recording_execute(self, query, vars=None):
+        result = execute(self, query, vars)
+        statements.append(self.query.decode())
+        return result
+
+    monkeypatch.setattr(InstrumentedCursorMixin, "execute", recording_execute)
+    return statements
+
+
+def _explain(conn, statement: str, analyze: bool = False) -> dict:
+    cur = conn.cursor()
+    cur.execute(("EXPLAIN (ANALYZE, FORMAT JSON) " if analyze else "EXPLAIN (FORMAT JSON) ") + statement)
+    plan = cur.fetchone()["QUERY PLAN"][0]["Plan"]
+    cur.close()
+    return plan
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _fully_run_nodes(plan: dict):
+    """
+    Nodes that ran to completion. Below a Limit, or in a subplan such as an
+    EXISTS, execution stops early, so actual rows say nothing of the estimate.
+    """
+    yield plan
+    if plan["Node Type"] == "Limit":
+        return
+    for child in plan.get("Plans", []):
+        if child.get("Parent Relationship") not in ("SubPlan", "InitPlan"):
+            yield from _fully_run_nodes(child)
+
+
+def _misestimates(conn, statement: str) -> list:
+    """Nodes of a read-only statement whose row estimate is off by more than ESTIMATE_FACTOR."""
+    query = re.sub(r"^\s*DECLARE\s+\S+\s+CURSOR\s+.*?\bFOR\s+", "", statement, flags=re.IGNORECASE | re.DOTALL)
+    wrong = []
+    for node in _fully_run_nodes(_explain(conn, query, analyze=True)):
+        if not node.get("Actual Loops"):
+            continue
+        estimated, actual = node["Plan Rows"], node["Actual Rows"]
+        # Nothing found (a missing key, no goal yet today) says nothing about the estimate.
+        if actual == 0 or max(estimated, actual) < _ESTIMATE_MIN_ROWS:
+            continue
+        if max(estimated, actual) > ESTIMATE_FACTOR * max(min(estimated, actual), 1):
+            wrong.append(f"{node['Node Type']} {node.get('Relation Name', '')}: estimated {estimated}, actual {actual}")
+    return wrong
+
+
+def _relation_sizes(conn) -> dict:
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT relname, reltuples
+        FROM pg_class
+        WHERE relnamespace = to_regnamespace(%s);
+        """,
+        (SCHEMA,),
+    )
+    sizes = {row["relname"]: row["reltuples"] for row in cur.fetchall()}
+    cur.close()
+    return sizes
+
+
+@dataclass
+class PlanCase:
+    """
+    One crud call and what its statements' plans must look like.
+
+    `indexes`: every one must be used by some statement of the call (a
+    partition's index matches by the parent index's column suffix, e.g.
+    "token_created_at_key"; "a|b" accepts either). `sorted_rows`: no Sort node is allowed
+    (the rows must come out of an index in order). `max_rows`: upper bound
+    on the row estimate of each explained statement; `max_scan_rows`, of
+    each scan node (1 for a unique lookup in every partition).
+    `seq_scan_ok`: the statement is meant to read most of a table.
+    `statements`: how many statements the call issues.
+
+    Read-only statements are also run with EXPLAIN ANALYZE and their row
+    estimates compared with the actual counts.
+    """
+
+    run: object
+    indexes: tuple = ()
+    sorted_rows: bool = False
+    max_rows: float | None = None
+    max_scan_rows: float | None = None
+    seq_scan_ok: bool = False
+    statements: int = 1
+
+
+def _first(rows):
+    first = next(iter(rows), None)
+    close = getattr(rows, "close", None)
+    if close:
+        close()
+    return first
+
+
+def _execute(conn, sql: str, params: tuple):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    cur.close()
+
+
+def _heavy_upsert(conn, s):
+    items = [(project_id, "Planned") for project_id in s["heavy_project_ids"][:5]]
+    return crud.upsert_daily_goals_today(conn, s["heavy_user_id"], items)
+
+
+def _fresh_refresh_token(conn, s):
+    return crud.create_refresh_token(conn, s["user_id"])["token"]
+
+
+def _fresh_access_token(conn, s):
+    return crud.create_access_token(conn, s["user_id"], 900)["token"]
+
+
+CASES = {
+    "get_projects": PlanCase(
+        lambda conn, s: crud.get_projects(conn, s["heavy_user_id"], limit=51),
+        indexes=("idx_projects_user_active",),
+        sorted_rows=True,
+        max_rows=51,
+    ),
+    "get_projects_after_id": PlanCase(
+        lambda conn, s: crud.get_projects(
+            conn, s["heavy_user_id"], limit=51, after_id=s["heavy_project_ids"][400]
+        ),
+        sorted_rows=True,
+        max_rows=51,
+    ),
+    "iter_projects": PlanCase(
+        lambda conn, s: _first(crud.iter_projects(conn, s["heavy_user_id"])),
+        indexes=("idx_projects_user_active",),
+        sorted_rows=True,
+    ),
+    "get_project": PlanCase(
+        lambda conn, s: crud.get_project(conn, s["project_id"], s["user_id"]),
+        indexes=("projects_pkey",),
+        max_rows=1,
+    ),
+    "get_data_version": PlanCase(
+        lambda conn, s: crud.get_data_version(conn, s["user_id"]),
+        indexes=("users_pkey",),
+        max_rows=1,
+    ),
+    "create_project": PlanCase(
+        lambda conn, s: crud.create_project(conn, s["user_id"], "Planned", None),
+        indexes=("users_pkey",),
+        max_rows=1,
+    ),
+    "update_project": PlanCase(
+        lambda conn, s: crud.update_project(conn, s["project_id"], s["user_id"], name="Renamed"),
+        indexes=("projects_pkey", "users_pkey"),
+        max_rows=1,
+    ),
+    "archive_project": PlanCase(
+        lambda conn, s: crud.archive_project(conn, s["project_id"], s["user_id"]),
+        indexes=("projects_pkey", "users_pkey"),
+        max_rows=1,
+    ),
+    "restore_project": PlanCase(
+        lambda conn, s: crud.restore_project(conn, s["archived_project_id"], s["user_id"]),
+        indexes=("projects_pkey", "users_pkey"),
+        max_rows=1,
+    ),
+    "get_archived_projects": PlanCase(
+        lambda conn, s: crud.get_archived_projects(conn, s["heavy_user_id"], limit=51),
+        indexes=("idx_projects_user_archived",),
+        sorted_rows=True,
+        max_rows=51,
+    ),
+    "iter_archived_projects": PlanCase(
+        lambda conn, s: _first(crud.iter_archived_projects(conn, s["heavy_user_id"])),
+        indexes=("idx_projects_user_archived",),
+        sorted_rows=True,
+    ),
+    "create_daily_goal": PlanCase(
+        lambda conn, s: crud.create_daily_goal(conn, s["project_id"], s["user_id"], "Planned"),
+        indexes=("projects_pkey", "users_pkey"),
+        max_rows=1,
+    ),
+    "get_daily_goals": PlanCase(
+        lambda conn, s: crud.get_daily_goals(conn, s["project_id"], s["user_id"], limit=31),
+        indexes=("projects_pkey", "daily_goals_unique_user_project_goal_date"),
+        sorted_rows=True,
+        max_rows=31,
+    ),
+    "get_daily_goals_before_date": PlanCase(
+        lambda conn, s: crud.get_daily_goals(
+            conn, s["project_id"], s["user_id"], limit=31, before_date=s["before_date"]
+        ),
+        indexes=("projects_pkey", "daily_goals_unique_user_project_goal_date"),
+        sorted_rows=True,
+        max_rows=31,
+    ),
+    "iter_daily_goals": PlanCase(
+        lambda conn, s: _first(crud.iter_daily_goals(conn, s["project_id"], s["user_id"])),
+        indexes=("projects_pkey", "daily_goals_unique_user_project_goal_date"),
+        sorted_rows=True,
+    ),
+    "get_todays_goal": PlanCase(
+        lambda conn, s: crud.get_todays_goal(conn, s["project_id"], s["user_id"]),
+        indexes=("projects_pkey", "daily_goals_unique_user_project_goal_date|idx_daily_goals_user_date"),
+        max_rows=1,
+    ),
+    "upsert_daily_goals_today": PlanCase(
+        _heavy_upsert,
+        indexes=("projects_pkey", "users_pkey"),
+        max_rows=5,
+    ),
+    "get_projects_with_todays_goal": PlanCase(
+        lambda conn, s: crud.get_projects_with_todays_goal(conn, s["heavy_user_id"]),
+        indexes=("idx_projects_user_active", "idx_daily_goals_user_date"),
+        sorted_rows=True,
+    ),
+    "get_user_by_id": PlanCase(
+        lambda conn, s: crud.get_user_by_id(conn, s["user_id"]),
+        indexes=("users_pkey",),
+        max_rows=1,
+    ),
+    "get_user_by_email": PlanCase(
+        lambda conn, s: crud.get_user_by_email(conn, s["email"]),
+        indexes=("users_email_key",),
+        max_rows=1,
+    ),
+    "create_user_with_password_hash": PlanCase(
+        lambda conn, s: crud.create_user_with_password_hash(conn, "planned@bench.example.com", "planned-hash"),
+        max_rows=1,
+    ),
+    "update_password_hash": PlanCase(
+        lambda conn, s: crud.update_password_hash(conn, s["user_id"], "scrypt:1:1:1$x$y"),
+        indexes=("users_pkey",),
+        max_rows=1,
+    ),
+    "create_refresh_token": PlanCase(
+        lambda conn, s: crud.create_refresh_token(conn, s["user_id"]),
+        max_rows=1,
+    ),
+    "get_valid_refresh_token": PlanCase(
+        lambda conn, s: crud.get_valid_refresh_token(conn, "no-such-token"),
+        indexes=("token_created_at_key",),
+        max_scan_rows=1,
+    ),
+    "use_refresh_token": PlanCase(
+        lambda conn, s: crud.use_refresh_token(conn, _fresh_refresh_token(conn, s)),
+        indexes=("token_created_at_key", "_pkey"),
+        max_scan_rows=1,
+        statements=4,
+    ),
+    "revoke_refresh_token": PlanCase(
+        lambda conn, s: crud.revoke_refresh_token(conn, s["user_id"], "no-such-token"),
+        indexes=("token_created_at_key",),
+        max_scan_rows=1,
+    ),
+    "revoke_refresh_token_by_token": PlanCase(
+        lambda conn, s: crud.revoke_refresh_token_by_token(conn, "no-such-token"),
+        indexes=("token_created_at_key",),
+        max_scan_rows=1,
+    ),
+    "create_access_token": PlanCase(
+        lambda conn, s: crud.create_access_token(conn, s["user_id"], 900),
+        max_rows=1,
+    ),
+    "slide_access_token": PlanCase(
+        lambda conn, s: crud.slide_access_token(conn, _fresh_access_token(conn, s), 900),
+        # Most seeded tokens are expired, so the expiry index may be the narrower one.
+        indexes=("token_created_at_key|expires_at_idx", "_pkey"),
+        max_scan_rows=1,
+        statements=3,
+    ),
+    "get_access_token_status": PlanCase(
+        lambda conn, s: crud.get_access_token_status(conn, "no-such-token"),
+        indexes=("token_created_at_key",),
+        max_scan_rows=1,
+    ),
+    "revoke_access_token": PlanCase(
+        lambda conn, s: crud.revoke_access_token(conn, "no-such-token"),
+        indexes=("token_created_at_key",),
+        max_scan_rows=1,
+    ),
+    "revoke_access_token_by_token": PlanCase(
+        lambda conn, s: crud.revoke_access_token_by_token(conn, "no-such-token"),
+        indexes=("token_created_at_key",),
+        max_scan_rows=1,
+    ),
+    "deny_access_token": PlanCase(
+        lambda conn, s: crud.deny_access_token(conn, "planned-jti", 4102444800),
+        max_rows=1,
+    ),
+    "get_denied_access_tokens": PlanCase(
+        lambda conn, s: crud.get_denied_access_tokens(conn),
+    ),
+    "get_recently_denied_access_tokens": PlanCase(
+        lambda conn, s: crud.get_denied_access_tokens(conn, 60),
+    ),
+    "purge_expired_access_tokens": PlanCase(
+        lambda conn, s: crud.purge_expired_tokens(conn, "access_tokens", 5000, 3600),
+        seq_scan_ok=True,
+    ),
+    "purge_expired_refresh_tokens": PlanCase(
+        lambda conn, s: crud.purge_expired_tokens(conn, "refresh_tokens", 5000, 3600),
+        seq_scan_ok=True,
+    ),
+    "purge_expired_denylist": PlanCase(
+        lambda conn, s: crud.purge_expired_denylist(conn, 5000),
+    ),
+    "partition_has_live_tokens": PlanCase(
+        lambda conn, s: crud.partition_has_live_tokens(conn, "access_tokens_default", 3600),
+        max_rows=1,
+    ),
+    "goal_history_export": PlanCase(
+        lambda conn, s: _execute(conn, crud._GOAL_HISTORY_EXPORT_SQL, (s["heavy_user_id"],)),
+        indexes=("idx_projects_user_id|projects_pkey", "daily_goals_unique_user_project_goal_date|idx_daily_goals_user_date"),
+    ),
+}
+
+# crud functions with no plan case, and why.
+NOT_PLANNED = {
+    "copy_goal_history_out": "COPY; its query is goal_history_export",
+    "iter_goal_history": "copy_goal_history_out without COPY; its query is goal_history_export",
+    "create_goal_history_staging": "DDL",
+    "copy_goal_history_in": "COPY into the import's temp table",
+    "stage_goal_history": "INSERT into the import's temp table",
+    "get_duplicate_goal_history_lines": "reads the whole import temp table by design",
+    "insert_goal_history": "set-based over the import temp tables",
+    "create_user": "wraps create_user_with_password_hash",
+    "update_password": "wraps update_password_hash",
+    "verify_user_password": "wraps get_user_by_email",
+    "upsert_daily_goal_today": "wraps upsert_daily_goals_today",
+    "try_advisory_lock": "no table access",
+    "advisory_unlock": "no table access",
+    "is_partitioned": "catalog lookup",
+    "create_token_partitions": "DDL",
+    "get_token_partitions": "catalog lookup",
+    "drop_token_partition": "DDL",
+}
+
+
+def test_every_crud_statement_has_a_plan_case():
+    issuing_sql = {
+        name
+        for name, fn in inspect.getmembers(crud, inspect.isfunction)
+        if fn.__module__ == crud.__name__
+        and not name.startswith("_")
+        and re.search(r"\b(execute|copy_expert|_iter_rows)\(", inspect.getsource(fn))
+    }
+    # Cases are named after their function, plus a suffix when one function has several.
+    covered = {name for name in issuing_sql if any(case == name or case.startswith(name + "_") for case in CASES)}
+    covered |= {"purge_expired_tokens"} | set(NOT_PLANNED)
+
+    assert_that(sorted(issuing_sql - covered)).described_as("crud functions without a plan case").is_empty()
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_query_plan(name, plan_conn, sample, monkeypatch):
+    case = CASES[name]
+    statements = _capture(monkeypatch)
+    case.run(plan_conn, sample)
+    statements = list(statements)
+
+    explained = [statement for statement in statements if _EXPLAINABLE.match(statement)]
+    assert_that(explained).described_as("statements").is_length(case.statements)
+
+    sizes = _relation_sizes(plan_conn)
+    used_indexes = set()
+    for statement in explained:
+        plan = _explain(plan_conn, statement)
+        for node in _nodes(plan):
+            relation = node.get("Relation Name")
+            if node["Node Type"] == "Seq Scan" and not case.seq_scan_ok:
+                assert_that(sizes.get(relation, 0)).described_as(
+                    f"{name}: Seq Scan on {relation}\n{statement}"
+                ).is_less_than(SEQ_SCAN_MIN_ROWS)
+            if case.sorted_rows:
+                assert_that(node["Node Type"]).described_as(f"{name}: sort\n{statement}").is_not_equal_to("Sort")
+            if node["Node Type"].endswith("Scan") and relation and case.max_scan_rows is not None:
+                assert_that(node["Plan Rows"]).described_as(
+                    f"{name}: estimated rows of {relation}\n{statement}"
+                ).is_less_than_or_equal_to(case.max_scan_rows)
+            if "Index Name" in node:
+                used_indexes.add(node["Index Name"])
+        if case.max_rows is not None:
+            assert_that(plan["Plan Rows"]).described_as(f"{name}: estimated rows\n{statement}").is_less_than_or_equal_to(
+                case.max_rows
+            )
+        if re.match(r"^\s*(SELECT|DECLARE)\b", statement, re.IGNORECASE):
+            assert_that(_misestimates(plan_conn, statement)).described_as(f"{name}: row estimates\n{statement}").is_empty()
+
+    for index in case.indexes:
+        matched = [used for used in used_indexes for option in index.split("|") if used.endswith(option)]
+        assert_that(matched).described_as(f"{name}: uses {index} (used: {sorted(used_indexes)})").is_not_empty()
@@ -40,3 +40,10 @@ def test_get_daily_goals_project_not_found(client, auth_headers):
     res = client.get("/projects/999999/goals", headers=auth_headers)
     assert_that(res.status_code).described_as("status").is_equal_to(404)
     assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Project not found")
+
+
+def test_get_daily_goals_empty_project(client, auth_headers):
+    created = client.post("/projects", headers=auth_headers, json={"name": "EMPTY"})
+    res = client.get(f"/projects/{created.get_json()['id']}/goals", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.get_json()).described_as("response body").is_empty()
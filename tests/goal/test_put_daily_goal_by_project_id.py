@@ -1,3 +1,5 @@
+import secrets
+
 import pytest
 from assertpy import assert_that
 
@@ -49,3 +51,30 @@ def test_upsert_today_goal_missing_goal_text(client, auth_headers, created_proje
     )
     assert_that(res.status_code).described_as("status").is_equal_to(400)
     assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("goal_text required")
+
+
+def test_upsert_today_goal_missing_project_without_goal_text(client, auth_headers):
+    res = client.put("/projects/999999/goals/today", headers=auth_headers, json={})
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+
+
+def test_upsert_today_goal_foreign_project_without_json(client, created_project, make_user):
+    other = make_user()
+    res = client.put(
+        f"/projects/{created_project}/goals/today",
+        headers={"Authorization": f"Bearer {other['access_token']}"},
+        data="goal_text=x",
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+
+
+def test_upsert_today_goal_accepts_long_text(client, auth_headers, created_project):
+    # Incompressible and past the btree row limit, were goal_text indexed.
+    goal_text = secrets.token_hex(4000)
+    res = client.put(
+        f"/projects/{created_project}/goals/today",
+        headers=auth_headers,
+        json={"goal_text": goal_text},
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(201)
+    assert_that(res.get_json()["goal_text"]).described_as("goal text").is_equal_to(goal_text)
@@ -0,0 +1,110 @@
+import pytest
+from assertpy import assert_that
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+@pytest.fixture
+def created_projects(client, auth_headers):
+    ids = []
+    for name in ("BATCH-A", "BATCH-B"):
+        res = client.post("/projects", headers=auth_headers, json={"name": name, "description": ""})
+        assert_that(res.status_code).described_as("create project status").is_equal_to(201)
+        ids.append(res.get_json()["id"])
+    return ids
+
+
+def test_batch_upsert_creates_then_updates(client, auth_headers, created_projects):
+    first, second = created_projects
+    client.put(f"/projects/{first}/goals/today", headers=auth_headers, json={"goal_text": "old"})
+
+    res = client.put(
+        "/goals/today",
+        headers=auth_headers,
+        json={
+            "goals": [
+                {"project_id": first, "goal_text": "new A"},
+                {"project_id": second, "goal_text": "new B"},
+            ]
+        },
+    )
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    results = res.get_json()["results"]
+    assert_that([r["status"] for r in results]).described_as("statuses").is_equal_to(["updated", "created"])
+    assert_that([r["goal"]["goal_text"] for r in results]).described_as("goal texts").is_equal_to(["new A", "new B"])
+
+    today = client.get("/today", headers=auth_headers).get_json()
+    goals = {p["id"]: p["today_goal"]["goal_text"] for p in today}
+    assert_that(goals).described_as("today's goals").is_equal_to({first: "new A", second: "new B"})
+
+
+def test_batch_upsert_reports_per_item_errors(client, auth_headers, created_projects):
+    res = client.put(
+        "/goals/today",
+        headers=auth_headers,
+        json={
+            "goals": [
+                {"project_id": 999999999, "goal_text": "nope"},
+                {"project_id": created_projects[0]},
+                {"project_id": created_projects[1], "goal_text": "ok"},
+                {"project_id": created_projects[1], "goal_text": "again"},
+            ]
+        },
+    )
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    statuses = [r["status"] for r in res.get_json()["results"]]
+    assert_that(statuses).described_as("statuses").is_equal_to(["not_found", "invalid", "created", "invalid"])
+
+
+@pytest.mark.parametrize("project_id", [0, -1, 2**31, 2**63])
+def test_batch_upsert_rejects_out_of_range_project_id(client, auth_headers, created_projects, project_id):
+    res = client.put(
+        "/goals/today",
+        headers=auth_headers,
+        json={
+            "goals": [
+                {"project_id": project_id, "goal_text": "nope"},
+                {"project_id": created_projects[0], "goal_text": "ok"},
+            ]
+        },
+    )
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    results = res.get_json()["results"]
+    assert_that([r["status"] for r in results]).described_as("statuses").is_equal_to(["invalid", "created"])
+    assert_that(results[0]["error"]).described_as("error message").is_equal_to("project_id out of range")
+
+
+def test_batch_upsert_ignores_other_users_projects(client, auth_headers, make_user):
+    other = make_user()
+    other_headers = {"Authorization": f"Bearer {other['access_token']}"}
+    project_id = client.post("/projects", headers=other_headers, json={"name": "theirs"}).get_json()["id"]
+
+    res = client.put(
+        "/goals/today",
+        headers=auth_headers,
+        json={"goals": [{"project_id": project_id, "goal_text": "mine now"}]},
+    )
+
+    assert_that(res.get_json()["results"][0]["status"]).described_as("status").is_equal_to("not_found")
+
+
+def test_batch_upsert_requires_goal_list(client, auth_headers):
+    res = client.put("/goals/today", headers=auth_headers, json={"goals": "nope"})
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
+
+
+def test_batch_upsert_empty_list(client, auth_headers):
+    res = client.put("/goals/today", headers=auth_headers, json={"goals": []})
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.get_json()["results"]).described_as("results").is_empty()
+
+
+def test_batch_upsert_requires_auth(client):
+    res = client.put("/goals/today", json={"goals": []})
+    assert_that(res.status_code).described_as("status").is_equal_to(401)
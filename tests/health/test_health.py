@@ -0,0 +1,37 @@
+from assertpy import assert_that
+
+from backend.app.database import database
+
+
+def test_health_ok(client):
+    res = client.get("/health")
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.get_json()["status"]).described_as("health status").is_equal_to("ok")
+
+
+def test_health_does_not_check_out_connection(client):
+    before = database.pool_stats()["checkouts"]
+    client.get("/health")
+    after = database.pool_stats()["checkouts"]
+    assert_that(after).described_as("checkouts").is_equal_to(before)
+
+
+def test_preflight_skips_auth_and_database(client):
+    before = database.pool_stats()["checkouts"]
+    res = client.options(
+        "/projects",
+        headers={
+            "Origin": "http://localhost:5173",
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "Authorization",
+        },
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(database.pool_stats()["checkouts"]).described_as("checkouts").is_equal_to(before)
+
+
+def test_missing_auth_header_does_not_check_out_connection(client):
+    before = database.pool_stats()["checkouts"]
+    res = client.get("/projects")
+    assert_that(res.status_code).described_as("status").is_equal_to(401)
+    assert_that(database.pool_stats()["checkouts"]).described_as("checkouts").is_equal_to(before)
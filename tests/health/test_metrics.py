@@ -0,0 +1,132 @@
+import glob
+import multiprocessing
+import os
+
+import pytest
+from assertpy import assert_that
+
+from backend.app.main import app
+from backend.app.metrics import Metrics
+
+
+@pytest.fixture(autouse=True)
+def no_metrics_token(monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_BEARER_TOKEN", "")
+
+
+def _value(text: str, sample: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def _record_in_child(directory: str):
+    child = Metrics(directory)
+    child.inc("http_requests_total", (("method", "GET"), ("route", "/x"), ("status", 200)), 3)
+    child.set("db_pool_connections", (("state", "in_use"),), 5)
+
+
+def test_counters_from_other_workers_are_summed(tmp_path):
+    directory = str(tmp_path)
+    worker = Metrics(directory)
+    worker.inc("http_requests_total", (("method", "GET"), ("route", "/x"), ("status", 200)))
+    worker.set("db_pool_connections", (("state", "in_use"),), 1)
+
+    process = multiprocessing.get_context("fork").Process(target=_record_in_child, args=(directory,))
+    process.start()
+    process.join()
+
+    text = worker.render()
+    assert_that(_value(text, 'http_requests_total{method="GET",route="/x",status="200"}')).described_as("requests").is_equal_to(4)
+    # The child has exited: its gauge no longer describes anything live.
+    assert_that(_value(text, 'db_pool_connections{state="in_use"}')).described_as("in use").is_equal_to(1)
+
+
+def test_exited_workers_files_are_folded_at_startup(tmp_path):
+    directory = str(tmp_path)
+    for _ in range(2):
+        process = multiprocessing.get_context("fork").Process(target=_record_in_child, args=(directory,))
+        process.start()
+        process.join()
+
+    worker = Metrics(directory)
+    worker.inc("http_requests_total", (("method", "GET"), ("route", "/x"), ("status", 200)))
+
+    files = sorted(os.path.basename(path) for path in glob.glob(os.path.join(directory, "*.metrics")))
+    assert_that(files).described_as("worker files").is_equal_to([f"{os.getpid()}.metrics"])
+    text = worker.render()
+    assert_that(_value(text, 'http_requests_total{method="GET",route="/x",status="200"}')).described_as("requests").is_equal_to(7)
+    assert_that(text).described_as("rendered").does_not_contain("db_pool_connections")
+
+
+def test_histogram_buckets_are_cumulative(tmp_path):
+    metrics = Metrics(str(tmp_path))
+    for seconds in (0.001, 0.02, 0.3, 30):
+        metrics.observe("http_request_duration_seconds", (("method", "GET"), ("route", "/x")), seconds)
+
+    text = metrics.render()
+    bucket = 'http_request_duration_seconds_bucket{method="GET",route="/x",le="%s"}'
+    for le, count in (("0.005", 1), ("0.025", 2), ("0.5", 3), ("10.0", 3), ("+Inf", 4)):
+        assert_that(_value(text, bucket % le)).described_as(f"le={le}").is_equal_to(count)
+    assert_that(_value(text, 'http_request_duration_seconds_count{method="GET",route="/x"}')).described_as("count").is_equal_to(4)
+
+
+def test_full_file_drops_new_series(tmp_path):
+    metrics = Metrics(str(tmp_path), file_bytes=256)
+    for n in range(20):
+        metrics.inc("auth_outcomes_total", (("mode", "db"), ("outcome", f"o{n}")))
+
+    assert_that(_value(metrics.render(), "metrics_dropped_series_total")).described_as("dropped series").is_greater_than(0)
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics(None)
+    metrics.inc("auth_outcomes_total", (("mode", 'a"b\\c'), ("outcome", "x")))
+
+    assert_that(metrics.render()).described_as("rendered").contains('auth_outcomes_total{mode="a\\"b\\\\c",outcome="x"} 1')
+
+
+def test_metrics_endpoint_counts_requests_and_auth(client, authenticated_user):
+    before = client.get("/metrics").get_data(as_text=True)
+    client.get("/projects")
+    client.get("/projects", headers={"Authorization": "Bearer not-a-token"})
+    client.get("/projects", headers={"Authorization": f"Bearer {authenticated_user['access_token']}"})
+
+    res = client.get("/metrics")
+    after = res.get_data(as_text=True)
+
+    assert_that(res.mimetype).described_as("mimetype").is_equal_to("text/plain")
+    for sample, delta in (
+        ('http_requests_total{method="GET",route="/projects",status="401"}', 2),
+        ('http_requests_total{method="GET",route="/projects",status="200"}', 1),
+        ('auth_outcomes_total{mode="none",outcome="missing"}', 1),
+        ('auth_outcomes_total{mode="db",outcome="invalid"}', 1),
+    ):
+        assert_that(_value(after, sample) - _value(before, sample)).described_as(sample).is_equal_to(delta)
+    assert_that(after).described_as("rendered").contains('db_pool_connections{state="idle"}', "# TYPE http_request_duration_seconds histogram")
+
+
+def test_revoked_token_is_counted(client, authenticated_user):
+    headers = {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+    client.post("/auth/logout", headers=headers, json={"refresh_token": authenticated_user["refresh_token"]})
+    sample = 'auth_outcomes_total{mode="db",outcome="revoked"}'
+    before = _value(client.get("/metrics").get_data(as_text=True), sample)
+
+    client.get("/projects", headers=headers)
+
+    assert_that(_value(client.get("/metrics").get_data(as_text=True), sample)).described_as(sample).is_equal_to(before + 1)
+
+
+def test_metrics_token_is_enforced(client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_BEARER_TOKEN", "scrape-secret")
+
+    assert_that(client.get("/metrics").status_code).described_as("status without token").is_equal_to(401)
+    res = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert_that(res.status_code).described_as("status with token").is_equal_to(200)
+
+
+def test_metrics_without_token_are_local_only(client):
+    res = client.get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.5"})
+    assert_that(res.status_code).described_as("remote status").is_equal_to(403)
+    assert_that(client.get("/metrics").status_code).described_as("local status").is_equal_to(200)
@@ -0,0 +1,159 @@
+import time
+
+import pytest
+from assertpy import assert_that
+
+from backend.app import crud, maintenance
+from backend.app.maintenance import PurgeScheduler, _PURGE_LOCK_KEY, purge_tokens
+
+
+def _expire(db_conn, table, token, seconds_ago=10):
+    cur = db_conn.cursor()
+    cur.execute(
+        f"UPDATE {table} SET expires_at = CURRENT_TIMESTAMP - (%s * INTERVAL '1 second') WHERE token = %s;",
+        (seconds_ago, token),
+    )
+    cur.close()
+    db_conn.commit()
+
+
+def _backdate_revocation(db_conn, table, token, seconds_ago=10):
+    cur = db_conn.cursor()
+    cur.execute(
+        f"UPDATE {table} SET revoked_at = revoked_at - (%s * INTERVAL '1 second') WHERE token = %s;",
+        (seconds_ago, token),
+    )
+    cur.close()
+    db_conn.commit()
+
+
+def _token_exists(db_conn, table, token):
+    cur = db_conn.cursor()
+    cur.execute(f"SELECT 1 FROM {table} WHERE token = %s;", (token,))
+    row = cur.fetchone()
+    cur.close()
+    db_conn.rollback()
+    return row is not None
+
+
+def test_purge_removes_expired_tokens(db_conn, authenticated_user):
+    _expire(db_conn, "access_tokens", authenticated_user["access_token"])
+    _expire(db_conn, "refresh_tokens", authenticated_user["refresh_token"])
+
+    report = purge_tokens(grace_seconds=0, pause_seconds=0)
+
+    assert_that(report["access_tokens"]).described_as("access tokens removed").is_greater_than_or_equal_to(1)
+    assert_that(report["refresh_tokens"]).described_as("refresh tokens removed").is_greater_than_or_equal_to(1)
+    assert_that(report).contains_key("seconds")
+    assert_that(_token_exists(db_conn, "access_tokens", authenticated_user["access_token"])).is_false()
+    assert_that(_token_exists(db_conn, "refresh_tokens", authenticated_user["refresh_token"])).is_false()
+
+
+def test_purge_keeps_live_tokens(db_conn, authenticated_user):
+    purge_tokens(grace_seconds=0, pause_seconds=0)
+
+    assert_that(_token_exists(db_conn, "access_tokens", authenticated_user["access_token"])).is_true()
+    assert_that(_token_exists(db_conn, "refresh_tokens", authenticated_user["refresh_token"])).is_true()
+
+
+def test_purge_keeps_tokens_within_grace_period(db_conn, authenticated_user):
+    _expire(db_conn, "access_tokens", authenticated_user["access_token"], seconds_ago=10)
+
+    purge_tokens(grace_seconds=3600, pause_seconds=0)
+
+    assert_that(_token_exists(db_conn, "access_tokens", authenticated_user["access_token"])).is_true()
+
+
+def test_purge_removes_revoked_tokens(db_conn, authenticated_user):
+    crud.revoke_access_token_by_token(db_conn, authenticated_user["access_token"])
+    _backdate_revocation(db_conn, "access_tokens", authenticated_user["access_token"])
+
+    purge_tokens(grace_seconds=0, pause_seconds=0)
+
+    assert_that(_token_exists(db_conn, "access_tokens", authenticated_user["access_token"])).is_false()
+
+
+def test_purge_runs_in_batches(db_conn, authenticated_user):
+    for _ in range(3):
+        token = crud.create_access_token(db_conn, authenticated_user["id"], ttl_seconds=900)["token"]
+        _expire(db_conn, "access_tokens", token)
+
+    report = purge_tokens(batch_size=1, grace_seconds=0, pause_seconds=0)
+
+    assert_that(report["access_tokens"]).described_as("access tokens removed").is_greater_than_or_equal_to(3)
+    assert_that(report["batches"]).described_as("batches").is_greater_than(3)
+
+
+@pytest.mark.commits
+def test_purge_skips_while_another_purge_holds_the_lock(db_conn, authenticated_user):
+    _expire(db_conn, "access_tokens", authenticated_user["access_token"])
+    assert_that(crud.try_advisory_lock(db_conn, _PURGE_LOCK_KEY)).is_true()
+
+    report = purge_tokens(grace_seconds=0, pause_seconds=0)
+
+    assert_that(report["skipped"]).described_as("skipped").is_true()
+    assert_that(report["access_tokens"]).described_as("access tokens removed").is_equal_to(0)
+    crud.advisory_unlock(db_conn, _PURGE_LOCK_KEY)
+    db_conn.commit()
+
+
+@pytest.mark.commits
+def test_purge_ignores_the_lock_held_for_another_schema(db_conn, authenticated_user):
+    _expire(db_conn, "access_tokens", authenticated_user["access_token"])
+    cur = db_conn.cursor()
+    cur.execute("SET search_path TO pg_catalog;")
+    assert_that(crud.try_advisory_lock(db_conn, _PURGE_LOCK_KEY)).is_true()
+    cur.execute("RESET search_path;")
+    db_conn.commit()
+
+    report = purge_tokens(grace_seconds=0, pause_seconds=0)
+
+    assert_that(report["skipped"]).described_as("skipped").is_false()
+    cur.execute("SET search_path TO pg_catalog;")
+    crud.advisory_unlock(db_conn, _PURGE_LOCK_KEY)
+    cur.execute("RESET search_path;")
+    cur.close()
+    db_conn.commit()
+
+
+@pytest.mark.commits
+def test_purge_holds_the_lock_between_batches(db_conn, authenticated_user, monkeypatch):
+    for _ in range(3):
+        token = crud.create_access_token(db_conn, authenticated_user["id"], ttl_seconds=900)["token"]
+        _expire(db_conn, "access_tokens", token)
+
+    taken_between_batches = []
+
+    def pause(seconds):
+        taken_between_batches.append(crud.try_advisory_lock(db_conn, _PURGE_LOCK_KEY))
+        db_conn.rollback()
+
+    monkeypatch.setattr(maintenance.time, "sleep", pause)
+    purge_tokens(batch_size=1, grace_seconds=0, pause_seconds=0)
+
+    assert_that(taken_between_batches).described_as("lock taken between batches").is_not_empty().does_not_contain(True)
+    assert_that(crud.try_advisory_lock(db_conn, _PURGE_LOCK_KEY)).described_as("lock after purge").is_true()
+    crud.advisory_unlock(db_conn, _PURGE_LOCK_KEY)
+    db_conn.commit()
+
+
+def test_scheduler_runs_purge_in_background():
+    scheduler = PurgeScheduler(0.01, grace_seconds=0, pause_seconds=0)
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while scheduler.last_report is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.stop(timeout=5)
+
+    assert_that(scheduler.last_error).described_as("last error").is_none()
+    assert_that(scheduler.last_report).described_as("last report").contains_key("partitions", "purge")
+
+
+def test_scheduler_starts_one_thread():
+    scheduler = PurgeScheduler(60)
+    scheduler.start()
+    thread = scheduler._thread
+    scheduler.start()
+    scheduler.stop(timeout=5)
+
+    assert_that(scheduler._thread).described_as("thread").is_same_as(thread)
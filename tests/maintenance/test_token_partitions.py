@@ -0,0 +1,152 @@
+import pytest
+from assertpy import assert_that
+
+from backend.app import crud
+from backend.app.maintenance import manage_token_partitions
+
+SCRATCH_TABLE = "scratch_tokens"
+
+
+def _execute(db_conn, statement, params=()):
+    cur = db_conn.cursor()
+    cur.execute(statement, params)
+    cur.close()
+    db_conn.commit()
+
+
+@pytest.fixture
+def scratch_tokens(db_conn):
+    """A throwaway table shaped like the token tables, with one past partition."""
+    _execute(db_conn, f"DROP TABLE IF EXISTS {SCRATCH_TABLE};")
+    _execute(
+        db_conn,
+        f"""
+        CREATE TABLE {SCRATCH_TABLE} (
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            revoked_at TIMESTAMP NULL
+        ) PARTITION BY RANGE (created_at);
+        """,
+    )
+    _execute(
+        db_conn,
+        f"""
+        CREATE TABLE {SCRATCH_TABLE}_p20000101 PARTITION OF {SCRATCH_TABLE}
+            FOR VALUES FROM ('2000-01-01') TO ('2000-01-02');
+        """,
+    )
+    yield SCRATCH_TABLE
+    _execute(db_conn, f"DROP TABLE IF EXISTS {SCRATCH_TABLE};")
+
+
+def _insert(db_conn, expires_at, revoked_at=None):
+    _execute(
+        db_conn,
+        f"INSERT INTO {SCRATCH_TABLE} (created_at, expires_at, revoked_at) VALUES ('2000-01-01 12:00', %s, %s);",
+        (expires_at, revoked_at),
+    )
+
+
+def _partition_names(db_conn, table):
+    names = [row["name"] for row in crud.get_token_partitions(db_conn, table)]
+    db_conn.rollback()
+    return names
+
+
+def test_token_tables_are_partitioned(db_conn):
+    for table in ("access_tokens", "refresh_tokens"):
+        assert_that(crud.is_partitioned(db_conn, table)).described_as(table).is_true()
+        assert_that(_partition_names(db_conn, table)).described_as(f"{table} partitions").contains(
+            f"{table}_default"
+        )
+
+
+def test_new_tokens_land_in_todays_partition(db_conn, authenticated_user):
+    cur = db_conn.cursor()
+    cur.execute(
+        """
+        SELECT tableoid::regclass::text AS partition, to_char(created_at, 'YYYYMMDD') AS today
+        FROM access_tokens
+        WHERE token = %s;
+        """,
+        (authenticated_user["access_token"],),
+    )
+    row = cur.fetchone()
+    cur.close()
+
+    # The token's own created_at, not the clock, names the partition it belongs in.
+    assert_that(row["partition"]).described_as("partition").is_equal_to(f"access_tokens_p{row['today']}")
+
+
+def test_partition_adopts_its_days_rows_from_the_default(db_conn, scratch_tokens):
+    _execute(db_conn, f"CREATE TABLE {scratch_tokens}_default PARTITION OF {scratch_tokens} DEFAULT;")
+    _execute(
+        db_conn,
+        f"INSERT INTO {scratch_tokens} (created_at, expires_at) VALUES (CURRENT_DATE + INTERVAL '1 hour', '2999-01-01');",
+    )
+
+    report = manage_token_partitions(days_ahead=0, tables=(scratch_tokens,))
+
+    cur = db_conn.cursor()
+    cur.execute(
+        f"SELECT tableoid::regclass::text AS partition, to_char(created_at, 'YYYYMMDD') AS day FROM {scratch_tokens};"
+    )
+    rows = cur.fetchall()
+    cur.close()
+    db_conn.rollback()
+    assert_that(report["errors"]).described_as("errors").is_empty()
+    assert_that(rows).described_as("rows").is_length(1)
+    assert_that(rows[0]["partition"]).described_as("partition").is_equal_to(f"{scratch_tokens}_p{rows[0]['day']}")
+
+
+def test_creates_partitions_ahead(db_conn, scratch_tokens):
+    report = manage_token_partitions(days_ahead=2, tables=(scratch_tokens,))
+
+    assert_that(report["created"]).described_as("created").is_length(3)
+    assert_that(_partition_names(db_conn, scratch_tokens)).contains(*report["created"])
+
+    again = manage_token_partitions(days_ahead=2, tables=(scratch_tokens,))
+    assert_that(again["created"]).described_as("created on second run").is_empty()
+
+
+def test_drops_past_partition_once_all_rows_expired(db_conn, scratch_tokens):
+    _insert(db_conn, "2000-01-02")
+    _insert(db_conn, "2030-01-01", revoked_at="2000-01-01 13:00")
+
+    report = manage_token_partitions(days_ahead=0, grace_seconds=0, tables=(scratch_tokens,))
+
+    assert_that(report["dropped"]).is_equal_to([f"{scratch_tokens}_p20000101"])
+    assert_that(_partition_names(db_conn, scratch_tokens)).does_not_contain(f"{scratch_tokens}_p20000101")
+
+
+def test_keeps_past_partition_with_live_token(db_conn, scratch_tokens):
+    _insert(db_conn, "2000-01-02")
+    _insert(db_conn, "2999-01-01")
+
+    report = manage_token_partitions(days_ahead=0, grace_seconds=0, tables=(scratch_tokens,))
+
+    assert_that(report["kept"]).is_equal_to([f"{scratch_tokens}_p20000101"])
+    assert_that(report["dropped"]).is_empty()
+
+
+def test_skips_tables_that_are_not_partitioned(db_conn):
+    report = manage_token_partitions(tables=("access_token_denylist",))
+
+    assert_that(report["created"]).is_empty()
+    assert_that(report["errors"]).is_empty()
+
+
+def test_past_days_rows_leave_the_default_and_are_dropped(db_conn, scratch_tokens):
+    _execute(db_conn, f"CREATE TABLE {scratch_tokens}_default PARTITION OF {scratch_tokens} DEFAULT;")
+    _execute(
+        db_conn,
+        f"INSERT INTO {scratch_tokens} (created_at, expires_at) VALUES ('2000-01-03 12:00', '2000-01-04');",
+    )
+
+    report = manage_token_partitions(days_ahead=0, grace_seconds=0, tables=(scratch_tokens,))
+
+    assert_that(report["created"]).described_as("created").contains(f"{scratch_tokens}_p20000103")
+    assert_that(report["dropped"]).described_as("dropped").contains(
+        f"{scratch_tokens}_p20000101", f"{scratch_tokens}_p20000103"
+    )
+    assert_that(report["errors"]).described_as("errors").is_empty()
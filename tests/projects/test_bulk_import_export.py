@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+
+import pytest
+from assertpy import assert_that
+
+from backend.app import bulk
+
+CSV_IMPORT = """project_key,project_name,project_description,project_created_at,project_archived_at,goal_date,goal_text,goal_created_at
+old-1,Writing,Daily pages,2024-01-01T08:00:00Z,,2024-01-02,"500 words, no edits",
+old-1,Writing,Daily pages,2024-01-01T08:00:00Z,,2024-01-03,1000 words,2024-01-03T09:30:00+02:00
+old-2,Running,,,,,,
+,Nameless,,,,,,
+old-3,Broken,,,,not-a-date,oops,
+old-1,Writing,Daily pages,,,2024-01-03,dupe,
+"""
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+def _import(client, auth_headers, body, fmt="csv", **params):
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return client.post(
+        f"/projects/import?{query}",
+        headers={**auth_headers, "Content-Type": mimetype},
+        data=body.encode(),
+    )
+
+
+def test_import_csv_creates_projects_and_goals(client, auth_headers):
+    res = _import(client, auth_headers, CSV_IMPORT)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    report = res.get_json()
+    assert_that(report["rows"]).described_as("rows").is_equal_to(6)
+    assert_that(report["projects"]).described_as("projects").is_equal_to(2)
+    assert_that(report["goals"]).described_as("goals").is_equal_to(2)
+    assert_that([e["line"] for e in report["errors"]]).described_as("error lines").is_equal_to([5, 6, 7])
+
+    projects = client.get("/projects", headers=auth_headers).get_json()
+    assert_that([p["name"] for p in projects]).described_as("project names").contains("Writing", "Running")
+
+    writing = next(p for p in projects if p["name"] == "Writing")
+    goals = client.get(f"/projects/{writing['id']}/goals", headers=auth_headers).get_json()
+    assert_that([goal["goal_text"] for goal in goals]).described_as("goal texts").is_equal_to(["1000 words", "500 words, no edits"])
+
+
+def test_import_ndjson_reports_bad_lines(client, auth_headers):
+    body = "\n".join(
+        [
+            json.dumps({"project_key": 1, "project_name": "Reading", "goal_date": "2024-02-01", "goal_text": "ch 1"}),
+            "{not json",
+            json.dumps(["not", "an", "object"]),
+            json.dumps({"project_key": 1, "project_name": "Reading", "goal_date": "2024-02-02"}),
+        ]
+    )
+
+    report = _import(client, auth_headers, body, fmt="ndjson").get_json()
+
+    assert_that(report["goals"]).described_as("goals").is_equal_to(1)
+    assert_that(report["errors"]).described_as("errors").extracting("line").is_equal_to([2, 3, 4])
+
+
+def test_import_reports_undecodable_lines(client, auth_headers):
+    body = "\n".join(
+        [
+            json.dumps({"project_key": 1, "project_name": "Reading", "goal_date": "2024-02-01", "goal_text": "ch 1"}),
+            '{"project_key": 1, "project_name": "Re\xffding"}',
+            json.dumps({"project_key": 1, "project_name": "Reading", "goal_date": "2024-02-02", "goal_text": "ch 2"}),
+        ]
+    ).encode("latin-1")
+
+    res = client.post(
+        "/projects/import", headers={**auth_headers, "Content-Type": "application/x-ndjson"}, data=body
+    )
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    report = res.get_json()
+    assert_that(report["goals"]).described_as("goals").is_equal_to(2)
+    assert_that(report["errors"]).described_as("errors").is_equal_to([{"line": 2, "error": "Invalid UTF-8"}])
+
+
+def test_import_reports_unparseable_csv_lines(client, auth_headers):
+    oversized = "x" * (csv.field_size_limit() + 1)
+    body = CSV_IMPORT.splitlines()[0] + f"\nold-1,Writing,,,,2024-01-02,{oversized},\nold-1,Writing,,,,2024-01-03,ok,\n"
+
+    res = _import(client, auth_headers, body)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    report = res.get_json()
+    assert_that(report["goals"]).described_as("goals").is_equal_to(1)
+    assert_that(report["errors"]).described_as("errors").extracting("line").is_equal_to([2])
+
+
+def test_import_dry_run_writes_nothing(client, auth_headers):
+    report = _import(client, auth_headers, CSV_IMPORT, dry_run=1).get_json()
+
+    assert_that(report["dry_run"]).described_as("dry run").is_true()
+    assert_that(report["projects"]).described_as("projects").is_equal_to(2)
+    assert_that(client.get("/projects", headers=auth_headers).get_json()).described_as("stored projects").is_empty()
+
+
+def test_import_rejects_unknown_format(client, auth_headers):
+    res = _import(client, auth_headers, CSV_IMPORT, format="xml")
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
+
+
+def test_export_csv_round_trips(client, auth_headers):
+    _import(client, auth_headers, CSV_IMPORT)
+
+    res = client.get("/projects/export?format=csv", headers=auth_headers)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.mimetype).described_as("mimetype").is_equal_to("text/csv")
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert_that(rows).described_as("rows").is_length(3)
+    assert_that([r["goal_text"] for r in rows]).described_as("goal texts").is_equal_to(["500 words, no edits", "1000 words", ""])
+    assert_that(rows[1]["goal_created_at"]).described_as("goal created_at in UTC").starts_with("2024-01-03 07:30:00")
+
+
+def test_export_ndjson(client, auth_headers):
+    _import(client, auth_headers, CSV_IMPORT)
+
+    res = client.get("/projects/export", headers={**auth_headers, "Accept": "application/x-ndjson"})
+
+    lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert_that(res.mimetype).described_as("mimetype").is_equal_to("application/x-ndjson")
+    assert_that(lines).described_as("lines").is_length(3)
+    assert_that(lines[0]).described_as("first line").contains_entry({"goal_text": "500 words, no edits"})
+    assert_that(lines[0]["project_description"]).described_as("project description").is_equal_to("Daily pages")
+
+
+def test_export_ignores_request_content_type(client, auth_headers):
+    res = client.get("/projects/export", headers={**auth_headers, "Content-Type": "application/x-ndjson"})
+    assert_that(res.mimetype).described_as("mimetype").is_equal_to("text/csv")
+
+
+def test_export_requires_auth(client):
+    res = client.get("/projects/export")
+    assert_that(res.status_code).described_as("status").is_equal_to(401)
+
+
+def test_stream_goal_history_stops_copy_when_consumer_stops(db_conn, authenticated_user):
+    chunks = bulk.stream_goal_history(db_conn, authenticated_user["id"], "csv", max_chunks=1)
+    header = next(chunks)
+    chunks.close()
+
+    assert_that(bytes(header).decode()).described_as("header").starts_with("project_key")
+
+
+@pytest.mark.commits
+def test_cli_import_then_export(tmp_path, authenticated_user, capsys):
+    source = tmp_path / "in.csv"
+    source.write_text(CSV_IMPORT)
+    target = tmp_path / "out.ndjson"
+
+    bulk.main(["import", "--email", authenticated_user["email"], "--chunk-size", "2", str(source)])
+    report = json.loads(capsys.readouterr().out)
+    bulk.main(["export", "--email", authenticated_user["email"], "--format", "ndjson", "-o", str(target)])
+
+    assert_that(report["goals"]).described_as("goals").is_equal_to(2)
+    assert_that(report["error_count"]).described_as("error count").is_equal_to(3)
+    assert_that(target.read_text().splitlines()).described_as("exported lines").is_length(3)
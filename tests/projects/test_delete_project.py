@@ -23,6 +23,14 @@ def test_delete_project_archives_success(client, auth_headers, created_project):
     assert_that(res.get_json()["status"]).described_as("delete status").is_equal_to("archived")
 
 
+def test_delete_project_already_archived_conflict(client, auth_headers, created_project):
+    project_id = created_project["id"]
+    client.delete(f"/projects/{project_id}", headers=auth_headers)
+    res = client.delete(f"/projects/{project_id}", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(409)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Project already archived")
+
+
 def test_delete_project_not_found(client, auth_headers):
     res = client.delete("/projects/999999", headers=auth_headers)
     assert_that(res.status_code).described_as("status").is_equal_to(404)
@@ -0,0 +1,89 @@
+import pytest
+from assertpy import assert_that
+
+from backend.app import crud
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+@pytest.fixture
+def created_project(client, auth_headers):
+    res = client.post("/projects", headers=auth_headers, json={"name": "ETAG"})
+    return res.get_json()["id"]
+
+
+def _revalidate(client, auth_headers, path, etag):
+    return client.get(path, headers={**auth_headers, "If-None-Match": etag})
+
+
+def test_matching_etag_returns_304(client, auth_headers, created_project):
+    first = client.get("/projects", headers=auth_headers)
+    etag = first.headers["ETag"]
+
+    second = _revalidate(client, auth_headers, "/projects", etag)
+
+    assert_that(second.status_code).described_as("status").is_equal_to(304)
+    assert_that(second.get_data()).is_empty()
+    assert_that(second.headers["ETag"]).is_equal_to(etag)
+
+
+def test_304_skips_the_list_query(client, auth_headers, created_project, monkeypatch):
+    etag = client.get("/projects", headers=auth_headers).headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("list query ran")
+
+    monkeypatch.setattr(crud, "get_projects", fail)
+    res = _revalidate(client, auth_headers, "/projects", etag)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(304)
+
+
+def test_project_write_changes_etag(client, auth_headers, created_project):
+    etag = client.get("/projects", headers=auth_headers).headers["ETag"]
+
+    client.patch(f"/projects/{created_project}", headers=auth_headers, json={"name": "renamed"})
+    res = _revalidate(client, auth_headers, "/projects", etag)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.headers["ETag"]).is_not_equal_to(etag)
+
+
+def test_goal_write_changes_goal_list_etag(client, auth_headers, created_project):
+    path = f"/projects/{created_project}/goals"
+    etag = client.get(path, headers=auth_headers).headers["ETag"]
+
+    client.put(f"/projects/{created_project}/goals/today", headers=auth_headers, json={"goal_text": "go"})
+    res = _revalidate(client, auth_headers, path, etag)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.get_json()).is_length(1)
+
+
+def test_archive_changes_archived_list_etag(client, auth_headers, created_project):
+    etag = client.get("/projects/archived", headers=auth_headers).headers["ETag"]
+
+    client.post(f"/projects/{created_project}/archive", headers=auth_headers)
+    res = _revalidate(client, auth_headers, "/projects/archived", etag)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that([p["id"] for p in res.get_json()]).contains(created_project)
+
+
+def test_failed_write_keeps_etag(client, auth_headers, created_project):
+    etag = client.get("/projects", headers=auth_headers).headers["ETag"]
+
+    client.patch("/projects/999999999", headers=auth_headers, json={"name": "nope"})
+    res = _revalidate(client, auth_headers, "/projects", etag)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(304)
+
+
+def test_missing_project_has_no_etag(client, auth_headers):
+    res = client.get("/projects/999999999", headers=auth_headers)
+
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+    assert_that(res.headers.get("ETag")).is_none()
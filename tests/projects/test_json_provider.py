@@ -0,0 +1,107 @@
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from assertpy import assert_that
+
+from backend.app.json_provider import FastJSONProvider
+from backend.app.main import app
+
+ROW = {
+    "id": 1,
+    "name": "Ünïcode",
+    "created_at": datetime(2024, 1, 2, 3, 4, 5, 678000),
+    "archived_at": None,
+    "goal_date": date(2024, 1, 2),
+    "updated_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+}
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def provider(request):
+    provider = FastJSONProvider(app)
+    if request.param == "stdlib":
+        provider.orjson_options = None
+    elif provider.orjson_options is None:
+        pytest.skip("orjson not installed")
+    return provider
+
+
+def test_datetimes_and_dates_are_iso(provider):
+    decoded = json.loads(provider.dumps(ROW))
+
+    assert_that(decoded["created_at"]).is_equal_to("2024-01-02T03:04:05.678000Z")
+    assert_that(decoded["updated_at"]).is_equal_to("2024-01-02T03:04:05Z")
+    assert_that(decoded["goal_date"]).is_equal_to("2024-01-02")
+
+
+def test_both_backends_write_the_same_bytes():
+    fast = FastJSONProvider(app)
+    if fast.orjson_options is None:
+        pytest.skip("orjson not installed")
+    stdlib = FastJSONProvider(app)
+    stdlib.orjson_options = None
+
+    rows = [ROW, {**ROW, "id": 2, "archived_at": datetime(2024, 2, 1)}]
+
+    assert_that(fast.dumps(rows)).is_equal_to(stdlib.dumps(rows))
+
+
+def test_keys_keep_row_order(provider):
+    assert_that(provider.dumps({"b": 1, "a": 2})).is_equal_to('{"b":1,"a":2}')
+
+
+def test_non_native_values_use_flask_defaults(provider):
+    value = uuid.uuid4()
+    decoded = json.loads(provider.dumps({"id": value, "amount": Decimal("1.50")}))
+
+    assert_that(decoded).is_equal_to({"id": str(value), "amount": "1.50"})
+
+
+def test_oversized_int_falls_back_to_stdlib(provider):
+    assert_that(json.loads(provider.dumps({"n": 2**70}))).is_equal_to({"n": 2**70})
+
+
+def test_aware_non_utc_datetime_keeps_its_offset(provider):
+    value = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2)))
+
+    assert_that(json.loads(provider.dumps([value]))).is_equal_to(["2024-01-02T03:04:05+02:00"])
+
+
+def test_unserializable_value_raises_type_error(provider):
+    with pytest.raises(TypeError):
+        provider.dumps({"x": object()})
+
+
+def test_loads_rejects_invalid_json(provider):
+    with pytest.raises(ValueError):
+        provider.loads(b"{nope")
+
+
+def test_project_timestamps_are_utc_z(client, auth_headers):
+    client.post("/projects", headers=auth_headers, json={"name": "Stamped"})
+    project = client.get("/projects", headers=auth_headers).get_json()[0]
+
+    assert_that(project["created_at"]).described_as("created_at").ends_with("Z")
+    assert_that(datetime.fromisoformat(project["created_at"].replace("Z", "+00:00")).tzinfo).is_not_none()
+
+
+def test_streamed_rows_use_the_same_encoding(client, auth_headers):
+    client.post("/projects", headers=auth_headers, json={"name": "Streamed"})
+    res = client.get("/projects", headers={**auth_headers, "Accept": "application/x-ndjson"})
+
+    first = json.loads(res.get_data(as_text=True).splitlines()[0])
+    assert_that(first["created_at"]).described_as("created_at").ends_with("Z")
+
+
+def test_request_bodies_parse_through_the_provider(client, auth_headers):
+    res = client.post("/projects", headers=auth_headers, data="{nope", content_type="application/json")
+
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
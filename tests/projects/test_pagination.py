@@ -0,0 +1,102 @@
+import pytest
+from assertpy import assert_that
+
+from backend.app.pagination import encode_cursor
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+@pytest.fixture
+def three_projects(client, auth_headers):
+    ids = []
+    for name in ("P1", "P2", "P3"):
+        res = client.post("/projects", headers=auth_headers, json={"name": name})
+        ids.append(res.get_json()["id"])
+    return ids
+
+
+@pytest.fixture
+def goal_history(client, auth_headers, authenticated_user, db_conn):
+    res = client.post("/projects", headers=auth_headers, json={"name": "HISTORY"})
+    project_id = res.get_json()["id"]
+
+    cur = db_conn.cursor()
+    for days_ago in range(5):
+        cur.execute(
+            """
+            INSERT INTO daily_goals (project_id, user_id, goal_text, goal_date)
+            VALUES (%s, %s, %s, CURRENT_DATE - %s);
+            """,
+            (project_id, authenticated_user["id"], f"goal {days_ago}", days_ago),
+        )
+    cur.close()
+    db_conn.commit()
+    return project_id
+
+
+def _collect(client, path, headers, limit):
+    pages = []
+    res = client.get(f"{path}?limit={limit}", headers=headers)
+    while True:
+        assert_that(res.status_code).described_as("page status").is_equal_to(200)
+        pages.append(res.get_json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+        res = client.get(f"{path}?limit={limit}&cursor={cursor}", headers=headers)
+
+
+def test_projects_are_paged_by_id(client, auth_headers, three_projects):
+    pages = _collect(client, "/projects", auth_headers, 2)
+    assert_that([len(p) for p in pages]).described_as("page sizes").is_equal_to([2, 1])
+    ids = [p["id"] for page in pages for p in page]
+    assert_that(ids).described_as("project ids").is_equal_to(three_projects)
+
+
+def test_archived_projects_are_paged(client, auth_headers, three_projects):
+    for project_id in three_projects:
+        client.post(f"/projects/{project_id}/archive", headers=auth_headers)
+
+    pages = _collect(client, "/projects/archived", auth_headers, 2)
+    ids = [p["id"] for page in pages for p in page]
+    assert_that(ids).described_as("archived ids").is_equal_to(list(reversed(three_projects)))
+
+
+def test_goal_history_is_paged_newest_first(client, auth_headers, goal_history):
+    pages = _collect(client, f"/projects/{goal_history}/goals", auth_headers, 2)
+    assert_that([len(p) for p in pages]).described_as("page sizes").is_equal_to([2, 2, 1])
+    texts = [goal["goal_text"] for page in pages for goal in page]
+    assert_that(texts).described_as("goal order").is_equal_to([f"goal {n}" for n in range(5)])
+    assert_that(pages[0][0]).described_as("goal fields").does_not_contain_key("goal_date")
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    res = client.get("/projects?cursor=not-a-cursor", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Invalid cursor")
+
+
+@pytest.mark.parametrize(
+    "path, values",
+    [
+        ("/projects", ["x"]),
+        ("/projects", [2**31]),
+        ("/projects", [True]),
+        ("/projects/archived", ["x", {}]),
+        ("/projects/archived", ["2024-01-01T00:00:00", "1"]),
+        ("/projects/{project}/goals", ["yesterday"]),
+    ],
+)
+def test_cursor_with_wrongly_typed_values_is_rejected(client, auth_headers, goal_history, path, values):
+    cursor = encode_cursor(values)
+    res = client.get(f"{path.format(project=goal_history)}?cursor={cursor}", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Invalid cursor")
+
+
+def test_invalid_limit_is_rejected(client, auth_headers):
+    res = client.get("/projects?limit=0", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(400)
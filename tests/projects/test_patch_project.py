@@ -71,6 +71,32 @@ def test_patch_project_not_found(client, auth_headers):
     assert_that(res.status_code).described_as("status").is_equal_to(404)
 
 
+def test_patch_archived_project_not_found(client, auth_headers, project):
+    client.post(f"/projects/{project['id']}/archive", headers=auth_headers)
+    res = client.patch(
+        f"/projects/{project['id']}",
+        headers=auth_headers,
+        json={"name": "x"},
+    )
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Project not found or archived")
+
+
 def test_patch_project_requires_auth(client, project):
     res = client.patch(f"/projects/{project['id']}", json={"name": "x"})
     assert_that(res.status_code).described_as("status").is_equal_to(401)
+
+
+def test_patch_missing_project_without_fields_not_found(client, auth_headers):
+    res = client.patch("/projects/999999", headers=auth_headers, json={})
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+
+
+def test_patch_missing_project_without_json_not_found(client, auth_headers):
+    res = client.patch("/projects/999999", headers=auth_headers, data="name=x")
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+
+
+def test_patch_project_without_json(client, auth_headers, project):
+    res = client.patch(f"/projects/{project['id']}", headers=auth_headers, data="name=x")
+    assert_that(res.status_code).described_as("status").is_equal_to(415)
@@ -0,0 +1,220 @@
+import time
+
+import pytest
+from assertpy import assert_that
+
+from backend.app.read_cache import ReadCache, read_cache
+from backend.app.token_cache import RevocationChannel
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+def _cache_with_reader(**options):
+    cache = ReadCache(**options)
+    calls = []
+
+    @cache.cached("goals:{project_id}")
+    def get_goals(conn, project_id, user_id, limit=None):
+        calls.append((project_id, user_id, limit))
+        return [{"id": project_id, "goal_text": f"goal {len(calls)}"}]
+
+    return cache, get_goals, calls
+
+
+def test_second_read_is_served_from_cache():
+    cache, get_goals, calls = _cache_with_reader()
+    get_goals(None, 1, user_id=7)
+    rows = get_goals(None, 1, 7)
+
+    assert_that(calls).described_as("queries run").is_length(1)
+    assert_that(rows[0]["goal_text"]).is_equal_to("goal 1")
+    assert_that(cache.stats()["hits"]).described_as("hits").is_equal_to(1)
+
+
+def test_arguments_are_part_of_the_key():
+    _, get_goals, calls = _cache_with_reader()
+    get_goals(None, 1, 7)
+    get_goals(None, 1, 7, limit=5)
+    get_goals(None, 1, 8)
+
+    assert_that(calls).described_as("queries run").is_length(3)
+
+
+def test_mutating_a_returned_row_does_not_touch_the_cache():
+    _, get_goals, _ = _cache_with_reader()
+    get_goals(None, 1, 7)[0]["goal_text"] = "changed"
+    del get_goals(None, 1, 7)[0]["id"]
+
+    assert_that(get_goals(None, 1, 7)[0]).is_equal_to({"id": 1, "goal_text": "goal 1"})
+
+
+def test_invalidate_drops_only_that_scope():
+    cache, get_goals, calls = _cache_with_reader()
+    get_goals(None, 1, 7)
+    get_goals(None, 2, 7)
+
+    cache.invalidate(object(), 7, "goals:1")
+    get_goals(None, 1, 7)
+    get_goals(None, 2, 7)
+
+    assert_that(calls).described_as("queries run").is_equal_to(
+        [(1, 7, None), (2, 7, None), (1, 7, None)]
+    )
+
+
+def test_end_transaction_invalidates_again():
+    cache, get_goals, calls = _cache_with_reader()
+    conn = object()
+    cache.invalidate(conn, 7, "goals:1")
+    # A read between the write and its commit still sees the old rows.
+    get_goals(None, 1, 7)
+
+    cache.end_transaction(conn)
+    get_goals(None, 1, 7)
+
+    assert_that(calls).described_as("queries run").is_length(2)
+
+
+def test_read_racing_an_invalidation_is_not_stored():
+    cache = ReadCache()
+    calls = []
+
+    @cache.cached("projects")
+    def get_projects(conn, user_id):
+        calls.append(user_id)
+        if len(calls) == 1:
+            cache.invalidate(object(), user_id, "projects")
+        return []
+
+    get_projects(None, 7)
+    get_projects(None, 7)
+
+    assert_that(calls).described_as("queries run").is_length(2)
+
+
+def test_entries_are_served_only_at_their_data_version():
+    cache, get_goals, calls = _cache_with_reader()
+    with cache.at_data_version(7, 1):
+        get_goals(None, 1, 7)
+        get_goals(None, 1, 7)
+    with cache.at_data_version(7, 2):
+        get_goals(None, 1, 7)
+    with cache.at_data_version(8, 1):
+        get_goals(None, 1, 7)
+
+    assert_that(calls).described_as("queries run").is_length(2)
+
+
+def test_entries_expire():
+    _, get_goals, calls = _cache_with_reader(ttl_seconds=0.01)
+    get_goals(None, 1, 7)
+    time.sleep(0.02)
+    get_goals(None, 1, 7)
+
+    assert_that(calls).described_as("queries run").is_length(2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, get_goals, calls = _cache_with_reader(max_entries=2)
+    get_goals(None, 1, 7)
+    get_goals(None, 2, 7)
+    get_goals(None, 1, 7)
+    get_goals(None, 3, 7)
+    get_goals(None, 1, 7)
+    get_goals(None, 2, 7)
+
+    assert_that(calls).described_as("queries run").is_length(4)
+    assert_that(cache.stats()["evictions"]).described_as("evictions").is_equal_to(2)
+    assert_that(cache.stats()["size"]).described_as("size").is_equal_to(2)
+
+
+def test_disabled_cache_always_queries():
+    _, get_goals, calls = _cache_with_reader(max_entries=0)
+    get_goals(None, 1, 7)
+    get_goals(None, 1, 7)
+
+    assert_that(calls).described_as("queries run").is_length(2)
+
+
+def test_invalidation_reaches_other_process_cache(tmp_path):
+    path = str(tmp_path / "invalidations")
+    worker_a, read_a, _ = _cache_with_reader(channel=RevocationChannel(path))
+    worker_b, read_b, calls_b = _cache_with_reader(channel=RevocationChannel(path))
+    read_a(None, 1, 7)
+    read_b(None, 1, 7)
+
+    worker_a.invalidate(object(), 7, "goals:1")
+    read_b(None, 1, 7)
+
+    assert_that(calls_b).described_as("worker b queries").is_length(2)
+
+
+def test_new_project_is_listed_after_cached_read(client, auth_headers):
+    client.get("/projects", headers=auth_headers)
+    client.post("/projects", headers=auth_headers, json={"name": "Fresh"})
+
+    res = client.get("/projects", headers=auth_headers)
+
+    names = [project["name"] for project in res.get_json()]
+    assert_that(names).described_as("project names").contains("Fresh")
+
+
+def test_patched_project_is_served_fresh(client, auth_headers):
+    project_id = client.post("/projects", headers=auth_headers, json={"name": "Old"}).get_json()["id"]
+    client.get(f"/projects/{project_id}", headers=auth_headers)
+
+    client.patch(f"/projects/{project_id}", headers=auth_headers, json={"name": "New"})
+    res = client.get(f"/projects/{project_id}", headers=auth_headers)
+
+    assert_that(res.get_json()["name"]).described_as("project name").is_equal_to("New")
+
+
+def test_archive_moves_project_between_cached_lists(client, auth_headers):
+    project_id = client.post("/projects", headers=auth_headers, json={"name": "Move"}).get_json()["id"]
+    client.get("/projects", headers=auth_headers)
+    client.get("/projects/archived", headers=auth_headers)
+
+    client.post(f"/projects/{project_id}/archive", headers=auth_headers)
+
+    active = [p["id"] for p in client.get("/projects", headers=auth_headers).get_json()]
+    archived = [p["id"] for p in client.get("/projects/archived", headers=auth_headers).get_json()]
+    assert_that(active).described_as("active ids").does_not_contain(project_id)
+    assert_that(archived).described_as("archived ids").contains(project_id)
+
+
+def test_goal_upsert_refreshes_cached_goal_list(client, auth_headers):
+    project_id = client.post("/projects", headers=auth_headers, json={"name": "Goals"}).get_json()["id"]
+    client.post(f"/projects/{project_id}/goals", headers=auth_headers, json={"goal_text": "first"})
+    client.get(f"/projects/{project_id}/goals", headers=auth_headers)
+
+    client.put("/goals/today", headers=auth_headers, json={"goals": [{"project_id": project_id, "goal_text": "second"}]})
+    res = client.get(f"/projects/{project_id}/goals", headers=auth_headers)
+
+    assert_that(res.get_json()[0]["goal_text"]).described_as("goal text").is_equal_to("second")
+
+
+def test_repeated_list_reads_hit_the_cache(client, auth_headers):
+    client.get("/projects", headers=auth_headers)
+    hits = read_cache.stats()["hits"]
+
+    client.get("/projects", headers=auth_headers)
+
+    assert_that(read_cache.stats()["hits"]).described_as("hits").is_equal_to(hits + 1)
+
+
+def test_missed_invalidation_does_not_pair_a_stale_body_with_a_new_etag(client, auth_headers, authenticated_user, db_conn):
+    project_id = client.post("/projects", headers=auth_headers, json={"name": "Before"}).get_json()["id"]
+    client.get("/projects", headers=auth_headers)
+
+    # A write whose invalidation never reached this worker.
+    cur = db_conn.cursor()
+    cur.execute("UPDATE projects SET name = 'After' WHERE id = %s;", (project_id,))
+    cur.execute("UPDATE users SET data_version = data_version + 1 WHERE id = %s;", (authenticated_user["id"],))
+    cur.close()
+    db_conn.commit()
+    res = client.get("/projects", headers=auth_headers)
+
+    assert_that([p["name"] for p in res.get_json()]).described_as("names").is_equal_to(["After"])
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from assertpy import assert_that
+
+from backend.app.database import database
+from backend.app.streaming import release_after_stream
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+@pytest.fixture
+def project_ids(client, auth_headers):
+    ids = []
+    for name in ("S1", "S2", "S3"):
+        res = client.post("/projects", headers=auth_headers, json={"name": name})
+        ids.append(res.get_json()["id"])
+    return ids
+
+
+def test_stream_projects_as_json_array(client, auth_headers, project_ids):
+    res = client.get("/projects?stream=1", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.is_streamed).described_as("streamed").is_true()
+    assert_that([p["id"] for p in json.loads(res.data)]).described_as("ids").is_equal_to(project_ids)
+
+
+def test_stream_projects_as_ndjson(client, auth_headers, project_ids):
+    res = client.get(
+        "/projects", headers={**auth_headers, "Accept": "application/x-ndjson"}
+    )
+    assert_that(res.mimetype).described_as("mimetype").is_equal_to("application/x-ndjson")
+    lines = res.get_data(as_text=True).splitlines()
+    assert_that([json.loads(line)["id"] for line in lines]).described_as("ids").is_equal_to(project_ids)
+
+
+def test_stream_empty_goal_history(client, auth_headers, project_ids):
+    res = client.get(f"/projects/{project_ids[0]}/goals?stream=1", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(json.loads(res.data)).described_as("body").is_equal_to([])
+
+
+def test_stream_goals_project_not_found(client, auth_headers):
+    res = client.get("/projects/999999/goals?stream=1", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(404)
+    assert_that(res.get_json()["error"]).described_as("error message").is_equal_to("Project not found")
+
+
+def test_stream_returns_connection_to_pool(client, auth_headers, project_ids):
+    client.get("/projects?stream=1", headers=auth_headers).get_data()
+    assert_that(database.pool_stats()["in_use"]).described_as("connections in use").is_equal_to(0)
+
+
+def test_stream_keeps_its_connection_until_the_last_chunk(client, auth_headers, project_ids):
+    in_use = database.pool_stats()["in_use"]
+    res = client.get("/projects?stream=1", headers=auth_headers)
+
+    chunks = iter(res.response)
+    next(chunks)
+    assert_that(database.pool_stats()["in_use"]).described_as("mid-stream").is_equal_to(in_use + 1)
+
+    list(chunks)
+    assert_that(database.pool_stats()["in_use"]).described_as("after stream").is_equal_to(in_use)
+
+
+def test_stream_hands_its_failure_to_release():
+    released = []
+
+    def chunks():
+        yield "["
+        raise RuntimeError("cursor lost")
+
+    stream = release_after_stream(chunks(), released.append)
+    assert_that(next(stream)).described_as("first chunk").is_equal_to("[")
+    assert_that(released).described_as("released mid-stream").is_empty()
+    assert_that(lambda: next(stream)).described_as("failing chunk").raises(RuntimeError).when_called_with()
+    assert_that(released).described_as("released with").is_length(1)
+    assert_that(released[0]).described_as("released with").is_instance_of(RuntimeError)
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import uvicorn
+from assertpy import assert_that
+
+from backend.app import green
+from backend.app.asgi import app as asgi_app
+from backend.app.database import database
+
+
+@pytest.fixture
+def green_mode():
+    green.enable()
+    yield
+    green.disable()
+
+
+@pytest.fixture
+def server():
+    """backend.app.asgi under uvicorn on a free port, in a thread of this process."""
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert_that(time.monotonic()).described_as("server start").is_less_than(deadline)
+        time.sleep(0.01)
+    yield server.servers[0].sockets[0].getsockname()[:2]
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+async def _get(reader, writer, path: str, headers: dict | None = None):
+    lines = [f"GET {path} HTTP/1.1", "Host: test"] + [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    fields = dict(line.split(": ", 1) for line in head[1:] if line)
+    body = await reader.readexactly(int(fields.get("content-length", 0)))
+    return int(head[0].split(" ")[1]), json.loads(body) if body else None
+
+
+@pytest.mark.commits
+def test_queries_of_concurrent_requests_overlap(green_mode):
+    def slow_query():
+        conn = database.get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT pg_sleep(0.3);")
+            cur.close()
+        finally:
+            database.release_connection(conn)
+
+    async def requests():
+        await asyncio.gather(*(green.run(slow_query) for _ in range(5)))
+
+    started = time.monotonic()
+    asyncio.run(requests())
+
+    # One at a time would take 1.5s.
+    assert_that(time.monotonic() - started).described_as("seconds").is_less_than(1.0)
+
+
+@pytest.mark.commits
+def test_server_handles_many_keep_alive_clients(server, make_user):
+    host, port = server
+    user = make_user()
+    headers = {"Authorization": f"Bearer {user['access_token']}"}
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            # Three requests on one connection, one of them against the DB.
+            return [
+                await _get(reader, writer, "/health"),
+                await _get(reader, writer, "/projects", headers),
+                await _get(reader, writer, "/health"),
+            ]
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def clients(count: int):
+        return await asyncio.gather(*(client() for _ in range(count)))
+
+    responses = [response for exchange in asyncio.run(clients(200)) for response in exchange]
+
+    assert_that(responses).is_length(600)
+    assert_that({status for status, _ in responses}).described_as("statuses").is_equal_to({200})
+    assert_that(responses[1][1]).described_as("projects").is_equal_to([])
@@ -0,0 +1,48 @@
+import pytest
+from assertpy import assert_that
+
+
+@pytest.fixture
+def auth_headers(authenticated_user):
+    return {"Authorization": f"Bearer {authenticated_user['access_token']}"}
+
+
+@pytest.fixture
+def projects(client, auth_headers):
+    ids = []
+    for name in ("WITH GOAL", "NO GOAL", "ARCHIVED"):
+        res = client.post("/projects", headers=auth_headers, json={"name": name})
+        ids.append(res.get_json()["id"])
+
+    client.put(
+        f"/projects/{ids[0]}/goals/today",
+        headers=auth_headers,
+        json={"goal_text": "ship it"},
+    )
+    client.post(f"/projects/{ids[2]}/archive", headers=auth_headers)
+    return ids
+
+
+def test_get_today_returns_active_projects_with_goals(client, auth_headers, projects):
+    res = client.get("/today", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+
+    body = res.get_json()
+    assert_that([p["id"] for p in body]).described_as("project ids").is_equal_to(projects[:2])
+
+    with_goal, without_goal = body
+    assert_that(with_goal["today_goal"]["goal_text"]).described_as("goal text").is_equal_to("ship it")
+    assert_that(with_goal["today_goal"]["project_id"]).described_as("goal project").is_equal_to(projects[0])
+    assert_that(with_goal["today_goal"]["created_at"]).described_as("goal created_at").ends_with("Z")
+    assert_that(without_goal["today_goal"]).described_as("missing goal").is_none()
+
+
+def test_get_today_empty(client, auth_headers):
+    res = client.get("/today", headers=auth_headers)
+    assert_that(res.status_code).described_as("status").is_equal_to(200)
+    assert_that(res.get_json()).described_as("response body").is_empty()
+
+
+def test_get_today_requires_auth(client):
+    res = client.get("/today")
+    assert_that(res.status_code).described_as("status").is_equal_to(401)